@@ -12,47 +12,116 @@ sys.path.append(project_root)
 # Import project components after path configuration
 from src.scraper.data_extraction.data_extraction import DataExtraction
 from src.scraper.data_transformation.data_transformation import DataTransformation
+from src.scraper.data_analysis.data_analysis import DataAnalysis
+from src.scraper.price_history import PriceHistory
+from src.scraper.utils import create_output_directory
+from src.scraper.suite_gate import SuiteGate
 
-def run_unittest(test_module, **kwargs):
+def run_test_gate(test_modules, **kwargs):
     """
-    Runs unittest for the specified test module with proper PYTHONPATH
+    Runs the test modules that have not passed against the current source tree yet, all in
+    a single subprocess with proper PYTHONPATH. Suites whose sources did not change since
+    they last passed are skipped (see src/scraper/suite_gate.py).
     """
-    print(f"Running tests in {test_module}...")
+    pending = SuiteGate(project_root).pending(test_modules)
+    if not pending:
+        print(f"Sources unchanged since the last passing run, skipping {len(test_modules)} test suites.")
+        return
+
+    print(f"Running tests in {', '.join(pending)}...")
     
     # Create environment with updated PYTHONPATH
     env = os.environ.copy()
     env["PYTHONPATH"] = f"{project_root}{os.pathsep}{env.get('PYTHONPATH', '')}"
     
     result = subprocess.run(
-        ["python", "-m", "unittest", test_module],
+        [sys.executable, "-m", "src.scraper.suite_gate", "--root", project_root, *pending],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
+        cwd=project_root,
         env=env  # Pass the modified environment
     )
     
+    print(result.stdout)
     if result.returncode != 0:
-        print(result.stdout)
         print(result.stderr)
-        raise Exception(f"Tests failed in {test_module}. Aborting workflow.")
+        raise Exception("Tests failed. Aborting workflow.")
     else:
-        print(f"All tests passed in {test_module}.")
+        print("All tests passed.")
+
+def get_extractor():
+    """
+    Uses the warm scraping service when SCRAPER_SERVICE_URL is set
+    (python src/scraper/scraping_service.py), otherwise starts its own browser.
+    """
+    service_url = os.getenv("SCRAPER_SERVICE_URL")
+    if service_url:
+        return DataExtraction(backend="service", service_url=service_url)
+    return DataExtraction()
+
+def plan_data_extraction(**kwargs):
+    """
+    Task creating the bronze folder of the run; returns the arguments of one
+    extraction task per (country, collection) page.
+    """
+    run_dir = create_output_directory("bronze")
+    return [{"country": country, "collection": collection, "run_dir": run_dir}
+            for country, collection in DataExtraction().partition_units()]
+
+def run_partition_extraction(country, collection, run_dir, **kwargs):
+    """
+    Mapped task extracting one (country, collection) page into its own bronze partition.
+    Only the partition path goes to XCom.
+    """
+    return get_extractor().extract_partition(country, collection, run_dir)
 
-def run_data_extraction(**kwargs):
+def merge_extraction_partitions(**kwargs):
     """
-    Task to run the data extraction process.
+    Fan-in task merging the partitions written by the mapped extraction tasks into the
+    bronze files of the run. Returns the path of the merged all_watches file; fails (and the
+    run is recorded as partial) when pages are still missing, so transformation and gold
+    never run on a partial catalog.
     """
-    extractor = DataExtraction()
-    extractor.run()
+    ti = kwargs["ti"]
+    plan = ti.xcom_pull(task_ids="plan_data_extraction")
+    if not plan:
+        raise Exception("No extraction plan for this run. Aborting workflow.")
+    run_dir = plan[0]["run_dir"]
+    partition_paths = [path for path in ti.xcom_pull(task_ids="data_extraction") or [] if path]
+    return get_extractor().merge_partitions(partition_paths, run_dir)
 
 def run_data_transformation(**kwargs):
     """
-    Task to run the data transformation process.
+    Task to run the data transformation process on the merged bronze file of this run.
     """
-    destinations = ["silver", "gold"]
-    transformer = DataTransformation(destinations=destinations)
+    ti = kwargs.get("ti")
+    input_file = ti.xcom_pull(task_ids="merge_extraction_partitions") if ti else None
+    destinations = ["silver"]
+    transformer = DataTransformation(input_file=input_file, destinations=destinations)
     transformer.run()
 
+def run_price_history_compaction(**kwargs):
+    """
+    Task to fold the new bronze snapshot into the compacted price history.
+    Folded bronze folders older than BRONZE_RETENTION_DAYS (when set) are deleted.
+    """
+    retention_days = os.getenv("BRONZE_RETENTION_DAYS")
+    summary = PriceHistory().compact(retention_days=float(retention_days) if retention_days else None)
+    print(summary)
+
+def run_data_analysis(**kwargs):
+    """
+    Task to compute the gold tables from the latest silver data.
+    Only the tables affected by changed references are recomputed; trigger the DAG with
+    {"gold_full_refresh": true} as run configuration to recompute everything.
+    """
+    dag_run = kwargs.get("dag_run")
+    full = bool(dag_run and (dag_run.conf or {}).get("gold_full_refresh"))
+    analysis = DataAnalysis()
+    if not analysis.run(full=full):
+        raise Exception("Gold analysis failed. See the analysis log for details.")
+
 default_args = {
     'owner': 'airflow',
     'depends_on_past': False,
@@ -66,7 +135,7 @@ default_args = {
 dag = DAG(
     'panerai_workflow_with_tests',
     default_args=default_args,
-    description='Orchestrates tests, data extraction, and transformation for Panerai watches',
+    description='Orchestrates tests, data extraction, transformation and gold analysis for Panerai watches',
     schedule_interval=timedelta(days=1),
     catchup=False,
 )
@@ -75,34 +144,40 @@ dag = DAG(
 test_modules = {
     'utils': 'src.scraper.tests.test_utils',
     'data_extraction': 'src.scraper.tests.test_data_extraction',
-    'data_transformation': 'src.scraper.tests.test_data_transformation'
+    'data_transformation': 'src.scraper.tests.test_data_transformation',
+    'data_analysis': 'src.scraper.tests.test_data_analysis'
 }
 
-# --- TESTING TASKS ---
-utils_test_task = PythonOperator(
-    task_id='run_utils_test',
-    python_callable=run_unittest,
-    op_kwargs={'test_module': test_modules['utils']},
+# --- TESTING TASK ---
+# Every suite the pipeline depends on, gated once before extraction
+test_gate_task = PythonOperator(
+    task_id='run_test_gate',
+    python_callable=run_test_gate,
+    op_kwargs={'test_modules': list(test_modules.values())},
     dag=dag,
 )
 
-data_extraction_test_task = PythonOperator(
-    task_id='run_data_extraction_test',
-    python_callable=run_unittest,
-    op_kwargs={'test_module': test_modules['data_extraction']},
+plan_extraction_task = PythonOperator(
+    task_id='plan_data_extraction',
+    python_callable=plan_data_extraction,
     dag=dag,
 )
 
-extraction_task = PythonOperator(
+# One task per (country, collection) page: a failing page is retried on its own, quickly
+extraction_task = PythonOperator.partial(
     task_id='data_extraction',
-    python_callable=run_data_extraction,
+    python_callable=run_partition_extraction,
+    retries=3,
+    retry_delay=timedelta(seconds=30),
+    retry_exponential_backoff=True,
     dag=dag,
-)
+).expand(op_kwargs=plan_extraction_task.output)
 
-data_transformation_test_task = PythonOperator(
-    task_id='run_data_transformation_test',
-    python_callable=run_unittest,
-    op_kwargs={'test_module': test_modules['data_transformation']},
+# Runs even if some pages kept failing: their partitions are reported missing
+merge_extraction_task = PythonOperator(
+    task_id='merge_extraction_partitions',
+    python_callable=merge_extraction_partitions,
+    trigger_rule='all_done',
     dag=dag,
 )
 
@@ -112,6 +187,19 @@ transformation_task = PythonOperator(
     dag=dag,
 )
 
+price_history_task = PythonOperator(
+    task_id='price_history_compaction',
+    python_callable=run_price_history_compaction,
+    dag=dag,
+)
+
+analysis_task = PythonOperator(
+    task_id='data_analysis',
+    python_callable=run_data_analysis,
+    dag=dag,
+)
+
 # --- TASK DEPENDENCIES ---
-utils_test_task >> data_extraction_test_task >> extraction_task
-extraction_task >> data_transformation_test_task >> transformation_task
\ No newline at end of file
+test_gate_task >> plan_extraction_task >> extraction_task >> merge_extraction_task
+merge_extraction_task >> transformation_task >> analysis_task
+transformation_task >> price_history_task
\ No newline at end of file
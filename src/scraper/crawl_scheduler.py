@@ -0,0 +1,163 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import asyncio
+import random
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+from log_handler import log_error
+
+
+@dataclass(frozen=True)
+class CrawlUnit:
+    """One collection page to fetch: a (country, collection) pair and its URL."""
+    country: str
+    country_url: str
+    collection: str
+    url: str
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc
+
+    @property
+    def key(self) -> str:
+        return f"{self.country}/{self.collection}"
+
+
+@dataclass
+class UnitReport:
+    """Outcome of a unit: how many attempts it took and the last error, if any."""
+    unit: CrawlUnit
+    attempts: int = 0
+    status: str = "pending"
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+    products: int = 0
+
+    @property
+    def retried(self) -> bool:
+        return self.attempts > 1
+
+    def to_dict(self) -> dict:
+        return {
+            "unit": self.unit.key,
+            "url": self.unit.url,
+            "status": self.status,
+            "attempts": self.attempts,
+            "products": self.products,
+            "elapsed": round(self.elapsed, 3),
+            "errors": self.errors,
+        }
+
+
+def build_crawl_units(countries: dict, collections: list, base_url: str) -> list:
+    """Build the work units in COUNTRIES x COLLECTIONS order."""
+    return [
+        CrawlUnit(country, country_url, collection, base_url.format(country_url, collection.lower()))
+        for country, country_url in countries.items()
+        for collection in collections
+    ]
+
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("TokenBucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CrawlScheduler:
+    """
+    Run page fetches concurrently with a global concurrency cap, a per-host token bucket
+    and jittered exponential backoff between retries.
+
+    `fetch(unit)` is a blocking callable returning the unit's products; it runs in a worker
+    thread. An exception (or an empty result when empty_is_failure is set) counts as a
+    failed attempt. Every unit gets a UnitReport, available in `reports` after `run`.
+    """
+
+    def __init__(self, fetch, concurrency: int = 4, rate_per_host: float = 1.0, burst: float = 2.0,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 empty_is_failure: bool = True):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.empty_is_failure = empty_is_failure
+        self.reports = []
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) failed attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    async def _run_unit(self, unit, report, semaphore, buckets):
+        start = time.monotonic()
+        while report.attempts <= self.max_retries:
+            await buckets[unit.host].acquire()
+            async with semaphore:
+                report.attempts += 1
+                try:
+                    products = await asyncio.to_thread(self.fetch, unit)
+                    if not products and self.empty_is_failure:
+                        raise ValueError("no products found")
+                    report.status = "ok"
+                    report.products = len(products or [])
+                    report.elapsed = time.monotonic() - start
+                    return products or []
+                except Exception as e:
+                    report.errors.append(str(e))
+            if report.attempts <= self.max_retries:
+                await asyncio.sleep(self.backoff_delay(report.attempts))
+        report.status = "failed"
+        report.elapsed = time.monotonic() - start
+        log_error(f"CrawlScheduler: {unit.key} failed after {report.attempts} attempts: {report.errors[-1]}",
+                  exc_info=False)
+        return []
+
+    async def run_async(self, units: list) -> list:
+        """Fetch every unit; returns the products per unit, in the order of `units`."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buckets = {host: TokenBucket(self.rate_per_host, self.burst) for host in {unit.host for unit in units}}
+        self.reports = [UnitReport(unit) for unit in units]
+        return await asyncio.gather(*(
+            self._run_unit(unit, report, semaphore, buckets) for unit, report in zip(units, self.reports)
+        ))
+
+    def run(self, units: list) -> list:
+        """Blocking wrapper around run_async."""
+        return asyncio.run(self.run_async(units))
+
+    def summary(self) -> dict:
+        """Machine-readable report: totals plus the units that needed retries or failed."""
+        return {
+            "units": len(self.reports),
+            "ok": sum(report.status == "ok" for report in self.reports),
+            "failed": [report.to_dict() for report in self.reports if report.status == "failed"],
+            "retried": [report.to_dict() for report in self.reports if report.retried and report.status == "ok"],
+        }
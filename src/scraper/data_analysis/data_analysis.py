@@ -0,0 +1,161 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import glob
+import hashlib
+import json
+import shutil
+import pandas as pd
+from scraper.utils import create_output_directory, save_data, save_json, get_latest_folder, load_data
+from scraper.schema import read_silver
+from scraper.run_catalog import RunCatalog
+from scraper.gold_metrics import compute_gold, update_gold, prepare_silver, data_year, row_fingerprints, changed_references
+from log_handler import setup_logging, log_error
+
+
+class DataAnalysis:
+    """
+    Gold stage: computes the business tables of the notebooks (growth rate and CAGR by product,
+    collection and country, difference rate against the cross-country USD median, margin lost
+    to the gray market, products available in the 4 countries, exclusive products) from the
+    baseline silver export and the latest silver run, and saves them into data/gold/<timestamp>/.
+
+    Runs are incremental: every gold folder keeps a fingerprint of each silver (reference, country)
+    row it was computed from (gold_state.csv), and the next run only recomputes the tables affected
+    by the references whose rows changed, merging them into the previous gold tables. Unchanged
+    tables are copied over. run(full=True) recomputes everything.
+    """
+    BASELINE_FILE = "data/silver/PANERAI_DATA_2021.csv"
+    STATE_FILE = "gold_state"
+    REPORT_FILE = "gold_report"
+
+    def __init__(self, input_file: str = None, baseline_file: str = None, output_formats: tuple = ("csv",)):
+        """
+        If no input_file is provided, the PANERAI_DATA file of the latest folder under 'data/silver/' is used.
+        baseline_file defaults to the 2021 silver export.
+        """
+        self.log_filename = f'logs/analysis_glitches_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log'
+        setup_logging(self.log_filename)
+        self.input_file = input_file
+        self.baseline_file = baseline_file or self.BASELINE_FILE
+        self.output_formats = output_formats
+        self.report = {}
+
+    def get_input_file_path(self, prefix: str) -> str:
+        """
+        Retrieves the silver file (CSV, or Parquet dataset) of the latest successful run under the
+        given prefix (run catalog first, then the latest run folder).
+        """
+        catalog, stage = RunCatalog.for_stage_dir(prefix)
+        file_path = catalog.latest_file(stage, "PANERAI_DATA_")
+        if file_path:
+            return file_path
+        latest_folder = get_latest_folder(prefix)
+        if not latest_folder:
+            raise FileNotFoundError(f"No folder found under prefix: {prefix}")
+        candidates = sorted(glob.glob(os.path.join(latest_folder, "PANERAI_DATA_*")))
+        if not candidates:
+            raise FileNotFoundError(f"No PANERAI_DATA file in {latest_folder}")
+        csv_files = [path for path in candidates if path.endswith(".csv")]
+        return csv_files[-1] if csv_files else candidates[-1]
+
+    @staticmethod
+    def _inputs_signature(base, current, baseline_state) -> dict:
+        """What the previous gold must share with this run for an incremental update to be valid."""
+        return {
+            "baseline_hash": hashlib.sha256("".join(baseline_state["row_hash"]).encode("utf-8")).hexdigest(),
+            "base_year": data_year(base),
+            "current_year": data_year(current),
+            "countries": sorted(map(str, current["country"].unique())),
+        }
+
+    def _load_previous(self, folder: str, signature: dict):
+        """(tables, state) of a previous gold folder, or None when it cannot be updated incrementally."""
+        if not folder:
+            return None
+        try:
+            with open(os.path.join(folder, f"{self.REPORT_FILE}.json"), encoding="utf-8") as f:
+                previous_report = json.load(f)
+            if previous_report.get("inputs") != signature:
+                return None
+            tables = {}
+            for name, rows in previous_report["tables"].items():
+                if not rows:
+                    return None
+                tables[name] = load_data(os.path.join(folder, f"{name}.csv"))
+            state = pd.read_csv(os.path.join(folder, f"{self.STATE_FILE}.csv"), dtype=str)
+            return tables, state
+        except (OSError, ValueError, KeyError) as e:
+            log_error(f"DataAnalysis: previous gold in {folder} is not usable, recomputing everything - {str(e)}",
+                      exc_info=False)
+            return None
+
+    def _copy_table(self, folder: str, name: str, gold_dir: str) -> None:
+        if os.path.abspath(folder) == os.path.abspath(gold_dir):
+            return
+        for path in glob.glob(os.path.join(folder, f"{name}.csv")) + glob.glob(os.path.join(folder, name)):
+            if os.path.isdir(path):
+                shutil.copytree(path, os.path.join(gold_dir, name), dirs_exist_ok=True)
+            else:
+                shutil.copy2(path, gold_dir)
+
+    def run(self, full: bool = False) -> dict:
+        """
+        Reads the baseline and current silver data, computes the gold tables and saves them.
+
+        Args:
+            full (bool): Recompute every table instead of updating the latest gold folder.
+
+        Returns:
+            dict: {table name: number of rows}, also saved with the run details in gold_report.json.
+                Empty on failure.
+        """
+        try:
+            file_path = self.input_file or self.get_input_file_path("data/silver/")
+            started = time.perf_counter()
+            base, current = read_silver(self.baseline_file), read_silver(file_path)
+            state = row_fingerprints(prepare_silver(current))
+            signature = self._inputs_signature(base, current, row_fingerprints(prepare_silver(base)))
+
+            previous_dir = None if full else get_latest_folder("data/gold/")
+            previous = self._load_previous(previous_dir, signature)
+            if previous is None:
+                tables = compute_gold(base, current)
+                references, recomputed = None, list(tables)
+            else:
+                previous_tables, previous_state = previous
+                references = changed_references(previous_state, state)
+                updated = update_gold(previous_tables, base, current, references) if references else {}
+                tables, recomputed = {**previous_tables, **updated}, list(updated)
+            elapsed = time.perf_counter() - started
+
+            gold_dir = create_output_directory("gold")
+            for name, table in tables.items():
+                if name in recomputed:
+                    save_data(table, name, gold_dir, formats=self.output_formats)
+                else:
+                    self._copy_table(previous_dir, name, gold_dir)
+            save_data(state, self.STATE_FILE, gold_dir)
+            self.report = {name: len(table) for name, table in tables.items()}
+            save_json({
+                "input_file": file_path,
+                "baseline_file": self.baseline_file,
+                "mode": "full" if references is None else "incremental",
+                "previous_gold": previous_dir if references is not None else None,
+                "changed_references": sorted(references) if references is not None else None,
+                "recomputed_tables": recomputed,
+                "seconds": round(elapsed, 3),
+                "inputs": signature,
+                "tables": self.report,
+            }, self.REPORT_FILE, gold_dir)
+            RunCatalog().record("gold", gold_dir, rows=self.report)
+            print(f"{len(recomputed)}/{len(tables)} gold tables computed in {elapsed:.2f}s into {gold_dir}")
+            return self.report
+        except FileNotFoundError as fnf_error:
+            log_error(f"File not found: {str(fnf_error)}")
+        except Exception as e:
+            log_error(f"An error occurred during data analysis: {str(e)}")
+        return {}
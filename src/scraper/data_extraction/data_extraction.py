@@ -4,20 +4,91 @@ from datetime import datetime
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+import glob
+import json
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from scraper.utils import start_webdriver, create_output_directory, close_webdriver, launch_extraction, save_data
+from scraper.utils import start_http_session, close_http_session, launch_http_extraction, fetch_collection_products, save_json
+from scraper.utils import launch_network_extraction, save_run_metrics
+from scraper.utils import fetch_collection_cards, render_collection_cards, build_products_from_cards, tag_products, get_latest_folder
+from scraper.page_fingerprints import PageFingerprints
+from scraper.parquet_store import default_output_formats
+from scraper.run_catalog import RunCatalog
+from scraper.run_metrics import get_default_metrics
+from scraper.crawl_scheduler import CrawlScheduler, build_crawl_units
+from scraper.webdriver_pool import WebDriverPool, free_port
+from scraper.scraping_service import stream_extraction
 from log_handler import setup_logging, log_error
 
+PARTITIONS_DIR = "partitions"
+
 class DataExtraction:
     COUNTRIES = {"USA": "us/en", "France": "fr/fr", "UK": "gb/en", "Japan": "jp/ja"}
     COLLECTIONS = ['RADIOMIR', 'LUMINOR', 'SUBMERSIBLE', 'LUMINOR-DUE']
     BASE_URL = "https://www.panerai.com/{}/collections/watch-collection/{}.html"
+    BACKENDS = ("selenium", "http", "service", "network")
     
-    def __init__(self):
+    def __init__(self, backend: str = "selenium", bulk_harvest: bool = False, max_workers: int = 1,
+                 use_scheduler: bool = False, scheduler_options: dict = None,
+                 lean: bool = False, blocked_urls: list = None, service_url: str = None,
+                 incremental: bool = False, output_formats: tuple = None, resume=False):
+        """
+        backend selects how collection pages are read:
+          - 'selenium': render every page in headless Chromium (default).
+          - 'http': fetch the pages with a pooled HTTP session and parse the card markup directly.
+          - 'service': send the job to a warm ScrapingService at service_url and stream the products back.
+          - 'network': render the pages in headless Chromium but read the product JSON the page
+            loads from the browser's network log instead of the DOM (deduplicated by reference).
+        incremental fingerprints every page (ETag/Last-Modified when the server sends them,
+        otherwise a hash of the card payload) and carries the rows of unchanged pages forward
+        from the latest bronze folder instead of re-extracting them.
+        bulk_harvest makes the Selenium backend read all cards of a page in one script call.
+        max_workers > 1 spreads the (country, collection) pages over that many workers
+        (a pool of browsers for the Selenium backend).
+        use_scheduler runs the pages through the asyncio CrawlScheduler (max_workers is its
+        concurrency cap, scheduler_options its rate limit / retry settings) and writes a
+        crawl_report.json with the units that needed retries or failed.
+        lean starts browsers with the eager page-load strategy and blocks images, fonts,
+        video and trackers (blocked_urls overrides the block list); per-page timing and
+        transferred bytes are then saved to page_metrics.json.
+        output_formats for the bronze files: 'csv' and/or 'parquet' (all_watches as a dataset
+        partitioned by year/country); CSV plus Parquet when pyarrow is installed by default.
+        Every finished (country, collection) page is checkpointed in the run's bronze folder
+        (partitions/<country>_<collection>.csv). resume=True continues the latest bronze run if
+        it did not finish (or resume=<run folder> that run): checkpointed pages are reused and
+        only the missing ones are extracted.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown extraction backend: {backend}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if backend == "service" and not service_url:
+            raise ValueError("The 'service' backend needs a service_url")
+        if backend in ("service", "network") and incremental:
+            raise ValueError(f"Incremental extraction is not available on the '{backend}' backend")
         self.log_filename = f'logs/extraction_glitches_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log'
         setup_logging(self.log_filename)
+        self.backend = backend
+        self.bulk_harvest = bulk_harvest
+        self.max_workers = max_workers
+        self.use_scheduler = use_scheduler
+        self.scheduler_options = scheduler_options or {}
+        self.crawl_report = None
+        self.lean = lean
+        self.blocked_urls = blocked_urls
+        self.page_metrics = [] if lean else None
+        self.service_url = service_url
+        self.incremental = incremental
+        self.output_formats = tuple(output_formats) if output_formats else default_output_formats()
+        self.resume = resume
+        self.checkpoint_dir = None
+        self.resumed_units = []
+        self.fingerprints = None
         self.driver = None
+        self.driver_pool = None
+        self.session = None
         self.all_products_data = []
 
     def _extract_products_for_country(self, country: str, country_url: str) -> list:
@@ -26,36 +97,440 @@ class DataExtraction:
         """
         country_products = []
         for collection in self.COLLECTIONS:
-            products = launch_extraction(self.driver, country, country_url, collection, self.BASE_URL)
+            products = self._extract_unit(country, country_url, collection)
             country_products.extend(products)
         return country_products
 
+    def _load_checkpoint(self, country: str, collection: str):
+        """Products of a page finished earlier in this run folder, or None."""
+        if not self.checkpoint_dir:
+            return None
+        path = self.partition_path(self.checkpoint_dir, country, collection)
+        if not os.path.exists(path):
+            return None
+        self.resumed_units.append(f"{country}/{collection}")
+        # Same dtypes as a freshly extracted page (year int...), so Parquet gets one type per column
+        return pd.read_csv(path).to_dict("records")
+
+    def _save_checkpoint(self, country: str, collection: str, products: list) -> None:
+        """Checkpoint a finished page; it is renamed into place, so a checkpoint is always complete."""
+        if not products or not self.checkpoint_dir or not os.path.isdir(self.checkpoint_dir):
+            return
+        path = self.partition_path(self.checkpoint_dir, country, collection)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pd.DataFrame(products).to_csv(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+
+    def _checkpointed_units(self, run_dir: str) -> int:
+        return len(glob.glob(os.path.join(run_dir, PARTITIONS_DIR, "*.csv")))
+
+    def _find_resume_folder(self):
+        """
+        The bronze run to continue: the given folder, or the latest run if some of its pages
+        are not checkpointed (the run stopped, or pages failed or came back empty).
+        """
+        if isinstance(self.resume, str):
+            return self.resume if os.path.isdir(self.resume) else None
+        runs = sorted(f for f in glob.glob(os.path.join("data", "bronze", "[0-9]*-*")) if os.path.isdir(f))
+        if runs and 0 < self._checkpointed_units(runs[-1]) < len(self.partition_units()):
+            return runs[-1]
+        return None
+
+    def _extract_unit(self, country: str, country_url: str, collection: str) -> list:
+        """
+        Extract one (country, collection) page with the configured backend, unless it was
+        checkpointed already; the extracted page is checkpointed.
+        """
+        products = self._load_checkpoint(country, collection)
+        if products is None:
+            products = self._extract_unit_uncached(country, country_url, collection)
+            self._save_checkpoint(country, collection, products)
+        return products
+
+    def _extract_unit_uncached(self, country: str, country_url: str, collection: str) -> list:
+        if self.fingerprints is not None:
+            return self._extract_unit_incremental(country, country_url, collection)
+        if self.backend == "http":
+            return launch_http_extraction(self.session, country, country_url, collection, self.BASE_URL)
+        if self.backend == "network":
+            if self.driver_pool:
+                with self.driver_pool.driver() as driver:
+                    return launch_network_extraction(driver, country, country_url, collection, self.BASE_URL)
+            return launch_network_extraction(self.driver, country, country_url, collection, self.BASE_URL)
+        if self.driver_pool:
+            with self.driver_pool.driver() as driver:
+                return launch_extraction(driver, country, country_url, collection, self.BASE_URL,
+                                         bulk=self.bulk_harvest, page_metrics=self.page_metrics)
+        return launch_extraction(self.driver, country, country_url, collection, self.BASE_URL,
+                                 bulk=self.bulk_harvest, page_metrics=self.page_metrics)
+
+    def _load_page(self, url: str, validators: dict) -> dict:
+        """
+        Load the raw card payloads of a page (conditional GET on the HTTP backend).
+        """
+        if self.backend == "http":
+            return fetch_collection_cards(self.session, url, **validators)
+        if self.driver_pool:
+            with self.driver_pool.driver() as driver:
+                return render_collection_cards(driver, url)
+        return render_collection_cards(self.driver, url)
+
+    def _extract_unit_incremental(self, country: str, country_url: str, collection: str) -> list:
+        """
+        Extract one page unless its fingerprint matches the previous snapshot,
+        in which case its rows are carried forward from the latest bronze folder.
+        """
+        key = f"{country}/{collection}"
+        url = self.BASE_URL.format(country_url, collection.lower())
+        try:
+            page = self._load_page(url, self.fingerprints.validators(key))
+            if self.fingerprints.is_unchanged(key, page):
+                products = self.fingerprints.carry_forward(key, country)
+                if products:
+                    print(f"Unchanged: {url} ({len(products)} products carried forward)")
+                    return products
+                if page["not_modified"]:
+                    # 304 but the previous rows are gone: fetch the page for real
+                    page = self._load_page(url, {})
+            products = tag_products(build_products_from_cards(page["cards"], page["url"]), country)
+            print(f"Found {len(products)} products for collection: {collection}")
+            metrics = get_default_metrics()
+            metrics.increment("cards_found_total", len(page["cards"]), country=country)
+            metrics.increment("products_parsed_total", len(products), backend=self.backend, country=country)
+            self.fingerprints.record(key, page, products)
+            return products
+        except Exception as e:
+            log_error(f"Error processing {collection} in {country}: {str(e)}")
+            return []
+
+    def _extract_all_countries(self) -> dict:
+        """
+        Extract every (country, collection) page, in parallel when max_workers > 1.
+
+        Returns a dict country -> products, always merged in COUNTRIES x COLLECTIONS order
+        so the bronze files do not depend on which page finished first.
+        """
+        if self.backend == "service":
+            return self._extract_from_service()
+        if self.use_scheduler:
+            return self._extract_with_scheduler()
+        if self.max_workers == 1:
+            return {country: self._extract_products_for_country(country, country_url)
+                    for country, country_url in self.COUNTRIES.items()}
+
+        units = [(country, country_url, collection)
+                 for country, country_url in self.COUNTRIES.items()
+                 for collection in self.COLLECTIONS]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._extract_unit, *unit) for unit in units]
+            results = {}
+            for (country, _, _), future in zip(units, futures):
+                try:
+                    products = future.result()
+                except Exception as e:
+                    log_error(f"Error extracting a page for {country}: {str(e)}")
+                    products = []
+                results.setdefault(country, []).extend(products)
+        return results
+
+    def _fetch_unit(self, unit) -> list:
+        """
+        Fetch callable for the CrawlScheduler; HTTP errors propagate so they can be retried.
+        """
+        if self.backend == "http" and self.fingerprints is None:
+            products = self._load_checkpoint(unit.country, unit.collection)
+            if products is None:
+                products = fetch_collection_products(self.session, unit.country, unit.country_url, unit.collection,
+                                                     self.BASE_URL)
+                self._save_checkpoint(unit.country, unit.collection, products)
+            return products
+        return self._extract_unit(unit.country, unit.country_url, unit.collection)
+
+    def _extract_with_scheduler(self) -> dict:
+        """
+        Run every (country, collection) page through the CrawlScheduler.
+        """
+        units = build_crawl_units(self.COUNTRIES, self.COLLECTIONS, self.BASE_URL)
+        scheduler = CrawlScheduler(self._fetch_unit, concurrency=self.max_workers, **self.scheduler_options)
+        unit_products = scheduler.run(units)
+        self.crawl_report = scheduler.summary()
+        print(f"Crawl finished: {self.crawl_report['ok']}/{self.crawl_report['units']} pages, "
+              f"{len(self.crawl_report['retried'])} retried, {len(self.crawl_report['failed'])} failed")
+
+        results = {}
+        for unit, products in zip(units, unit_products):
+            results.setdefault(unit.country, []).extend(products)
+        return results
+
+    def _extract_from_service(self, units: list = None) -> dict:
+        """
+        Stream every (country, collection) page (or the given units) from the warm ScrapingService.
+        """
+        units = units or [{"country": country, "collection": collection}
+                          for country in self.COUNTRIES for collection in self.COLLECTIONS]
+        pages, pending = {}, []
+        for unit in units:
+            checkpoint = self._load_checkpoint(unit["country"], unit["collection"])
+            if checkpoint is None:
+                pending.append(unit)
+            else:
+                pages[f"{unit['country']}/{unit['collection']}"] = checkpoint
+        if pending:
+            for record in stream_extraction(self.service_url, pending):
+                if record.get("type") == "product":
+                    pages.setdefault(record["unit"], []).append(record["product"])
+                elif record.get("type") == "unit":
+                    if not record.get("products"):
+                        log_error(f"Scraping service returned no products for {record.get('unit')}", exc_info=False)
+                    else:
+                        self._save_checkpoint(*record["unit"].split("/", 1), pages.get(record["unit"], []))
+
+        results = {country: [] for country in self.COUNTRIES}
+        for unit in units:
+            results.setdefault(unit["country"], []).extend(pages.get(f"{unit['country']}/{unit['collection']}", []))
+        return results
+
+    def _driver_options(self) -> dict:
+        options = {"lean": True, "blocked_urls": self.blocked_urls} if self.lean else {}
+        if self.backend == "network":
+            options["capture_network"] = True
+        return options
+
+    def _report_page_metrics(self, bronze_dir: str) -> None:
+        """
+        Print the page-load totals of a lean run and save the per-page figures.
+        """
+        total_bytes = sum(page.get("transfer_bytes") or 0 for page in self.page_metrics)
+        total_ms = sum(page.get("ready_ms") or 0 for page in self.page_metrics)
+        print(f"Loaded {len(self.page_metrics)} pages in {total_ms / 1000:.1f}s, "
+              f"{total_bytes / 1024:.0f} KiB transferred")
+        save_json(self.page_metrics, "page_metrics", bronze_dir)
+
+    def partition_units(self) -> list:
+        """Every (country, collection) page, in COUNTRIES x COLLECTIONS order."""
+        return [(country, collection) for country in self.COUNTRIES for collection in self.COLLECTIONS]
+
+    @staticmethod
+    def partition_path(run_dir: str, country: str, collection: str) -> str:
+        return os.path.join(run_dir, PARTITIONS_DIR, f"{country}_{collection}.csv")
+
+    def extract_partition(self, country: str, collection: str, run_dir: str) -> str:
+        """
+        Extract a single (country, collection) page into its own bronze partition,
+        <run_dir>/partitions/<country>_<collection>.csv, for orchestrators that run every page
+        as a separate task. Errors propagate, and a page without products is an error, so that
+        only the failing page is retried. Browsers get a free debugging port and their own
+        profile, as tasks of the same worker run side by side. The task's metrics are saved
+        next to the partition (partitions/run_metrics_<country>_<collection>.json) for
+        merge_partitions.
+
+        Returns:
+            str: The partition path.
+        """
+        if country not in self.COUNTRIES or collection not in self.COLLECTIONS:
+            raise ValueError(f"Unknown extraction unit: {country}/{collection}")
+        path = self.partition_path(run_dir, country, collection)
+        if os.path.exists(path):
+            # Finished by an earlier attempt of this task
+            return path
+        country_url = self.COUNTRIES[country]
+        metrics = get_default_metrics()
+        metrics.reset()
+        started = time.perf_counter()
+        try:
+            if self.backend == "service":
+                products = self._extract_from_service([{"country": country, "collection": collection}])[country]
+            elif self.backend == "http":
+                self.session = start_http_session(pool_size=1)
+                products = fetch_collection_products(self.session, country, country_url, collection, self.BASE_URL)
+            else:
+                self.driver_pool = WebDriverPool(size=1, base_port=free_port(), **self._driver_options())
+                products = self._extract_unit(country, country_url, collection)
+        finally:
+            self._close_backend()
+            metrics.observe("stage_seconds", time.perf_counter() - started, stage="extraction")
+            os.makedirs(os.path.join(run_dir, PARTITIONS_DIR), exist_ok=True)
+            save_run_metrics(os.path.join(run_dir, PARTITIONS_DIR), f"run_metrics_{country}_{collection}", export=False)
+        if not products:
+            raise ValueError(f"No products extracted for {country}/{collection}")
+
+        self.checkpoint_dir = run_dir
+        self._save_checkpoint(country, collection, products)
+        return path
+
+    def merge_partitions(self, partition_paths: list, run_dir: str, allow_partial: bool = False) -> str:
+        """
+        Fan-in of extract_partition: merge the partitions of a run into the usual bronze files
+        (per-country CSVs and all_watches) in run_dir, in COUNTRIES x COLLECTIONS order, and
+        record the run in the run catalog. When partitions are missing (pages that kept failing)
+        the run is recorded as 'partial', so it never becomes the latest bronze run, and a
+        ValueError is raised unless allow_partial is set. The metrics of the partition tasks
+        are added up into the run's run_metrics.json / run_metrics.prom.
+
+        Returns:
+            str: Path of the all_watches CSV (or of its Parquet dataset when CSV is not written).
+        """
+        metrics = get_default_metrics()
+        metrics.reset()
+        for metrics_path in sorted(glob.glob(os.path.join(run_dir, PARTITIONS_DIR, "run_metrics_*.json"))):
+            try:
+                with open(metrics_path, encoding="utf-8") as f:
+                    metrics.merge(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                log_error(f"merge_partitions: skipping unreadable metrics {metrics_path}: {str(e)}", exc_info=False)
+        paths = set(partition_paths)
+        results = {}
+        missing = []
+        for country, collection in self.partition_units():
+            path = self.partition_path(run_dir, country, collection)
+            if path not in paths or not os.path.exists(path):
+                log_error(f"merge_partitions: no partition for {country}/{collection}", exc_info=False)
+                missing.append(f"{country}/{collection}")
+                continue
+            results.setdefault(country, []).extend(pd.read_csv(path).to_dict("records"))
+        if not results:
+            raise ValueError(f"No partition to merge in {run_dir}")
+
+        year = datetime.now().year
+        for country, country_products in results.items():
+            if "csv" in self.output_formats:
+                save_data(pd.DataFrame(country_products), f"{country}_watches_{year}", run_dir)
+            self.all_products_data.extend(country_products)
+        save_data(pd.DataFrame(self.all_products_data), f"all_watches_{year}", run_dir, formats=self.output_formats)
+        RunCatalog().record("bronze", run_dir, rows=self._row_counts(), status="partial" if missing else "success")
+        save_run_metrics(run_dir, layer="bronze")
+        if missing and not allow_partial:
+            raise ValueError(f"{len(missing)} of {len(self.partition_units())} partitions missing in {run_dir}: "
+                             f"{', '.join(missing)}")
+        suffix = ".csv" if "csv" in self.output_formats else ""
+        return os.path.join(run_dir, f"all_watches_{year}{suffix}")
+
+    def _row_counts(self) -> dict:
+        """{file name: rows} of the tables written by run, for the run catalog."""
+        year = datetime.now().year
+        counts = {}
+        for product in self.all_products_data:
+            name = f"{product.get('country')}_watches_{year}"
+            counts[name] = counts.get(name, 0) + 1
+        counts[f"all_watches_{year}"] = len(self.all_products_data)
+        return counts
+
+    def _start_backend(self) -> None:
+        """Start the browser (a pool of them when pages run in parallel) or the HTTP session."""
+        if self.backend == "http":
+            # The scheduler owns the retries (rate limit, backoff and per-page accounting)
+            self.session = start_http_session(pool_size=max(10, self.max_workers),
+                                              retries=0 if self.use_scheduler else 3)
+        elif self.backend in ("selenium", "network"):
+            if self.max_workers > 1 or self.use_scheduler:
+                self.driver_pool = WebDriverPool(size=self.max_workers, **self._driver_options())
+            else:
+                self.driver = start_webdriver(**self._driver_options())
+
+    def _close_backend(self) -> None:
+        if self.driver:
+            close_webdriver(self.driver)
+            self.driver = None
+        if self.driver_pool:
+            self.driver_pool.close()
+            self.driver_pool = None
+        if self.session:
+            close_http_session(self.session)
+            self.session = None
+
+    def iter_products(self):
+        """
+        Yield (country, collection, products) for every page as soon as it is extracted:
+        in COUNTRIES x COLLECTIONS order with one worker, in completion order when
+        max_workers > 1 or on the 'service' backend. Nothing is accumulated on the instance.
+        Page fingerprints and the crawl scheduler are not used in this mode.
+        """
+        units = [(country, self.COUNTRIES[country], collection) for country, collection in self.partition_units()]
+        try:
+            self._start_backend()
+            if self.backend == "service":
+                pages = {}
+                for record in stream_extraction(self.service_url):
+                    if record.get("type") == "product":
+                        pages.setdefault(record["unit"], []).append(record["product"])
+                    elif record.get("type") == "unit":
+                        country, collection = record["unit"].split("/", 1)
+                        if not record.get("products"):
+                            log_error(f"Scraping service returned no products for {record['unit']}", exc_info=False)
+                        yield country, collection, pages.pop(record["unit"], [])
+            elif self.max_workers == 1:
+                for country, country_url, collection in units:
+                    yield country, collection, self._extract_unit(country, country_url, collection)
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    futures = {executor.submit(self._extract_unit, *unit): unit for unit in units}
+                    for future in as_completed(futures):
+                        country, _, collection = futures[future]
+                        try:
+                            products = future.result()
+                        except Exception as e:
+                            log_error(f"Error extracting {collection} in {country}: {str(e)}")
+                            products = []
+                        yield country, collection, products
+        finally:
+            self._close_backend()
+
     def run(self) -> None:
         """
         Main extraction process:
-          - Initializes the WebDriver.
-          - Iterates over each country to extract and save product data.
+          - Initializes the WebDriver (a pool of them when max_workers > 1), or the HTTP session for the 'http' backend.
+          - Extracts every country's collections and saves the product data per country.
           - Aggregates all data into a single CSV file.
+          - Records the run in the run catalog: 'partial' when some pages failed or came back
+            empty (fewer pages checkpointed than partition_units()), so it does not become the
+            latest bronze run and can be resumed.
+          - Saves the run's metrics (run_metrics.json / run_metrics.prom, see scraper.run_metrics).
         """
+        bronze_dir = None
+        get_default_metrics().reset()
+        started = time.perf_counter()
         try:
-            self.driver = start_webdriver()
-            bronze_dir = create_output_directory("bronze")
+            self._start_backend()
+            if self.incremental:
+                self.fingerprints = PageFingerprints(get_latest_folder("data/bronze/"))
+            bronze_dir = (self._find_resume_folder() if self.resume else None) or create_output_directory("bronze")
+            self.checkpoint_dir = bronze_dir
             
-            for country, country_url in self.COUNTRIES.items():
-                country_products = self._extract_products_for_country(country, country_url)
-                if country_products:
+            for country, country_products in self._extract_all_countries().items():
+                if country_products and "csv" in self.output_formats:
                     df_country = pd.DataFrame(country_products)
                     save_data(df_country, f"{country}_watches_{datetime.now().year}", bronze_dir)
                 self.all_products_data.extend(country_products)
             
             if self.all_products_data:
                 df_all = pd.DataFrame(self.all_products_data)
-                save_data(df_all, f"all_watches_{datetime.now().year}", bronze_dir)
+                save_data(df_all, f"all_watches_{datetime.now().year}", bronze_dir, formats=self.output_formats)
+            if self.crawl_report:
+                save_json(self.crawl_report, "crawl_report", bronze_dir)
+            if self.page_metrics:
+                self._report_page_metrics(bronze_dir)
+            if self.fingerprints is not None:
+                self.fingerprints.save(bronze_dir)
+                print(f"{len(self.fingerprints.carried)} unchanged pages carried forward")
+            if self.resumed_units:
+                print(f"Resumed {bronze_dir}: {len(self.resumed_units)} checkpointed pages reused")
+            status = "success"
+            if not self.all_products_data:
+                status = "empty"
+            elif self._checkpointed_units(bronze_dir) < len(self.partition_units()):
+                status = "partial"
+                print(f"Partial run {bronze_dir}: {self._checkpointed_units(bronze_dir)}/"
+                      f"{len(self.partition_units())} pages extracted, resume it with resume=True")
+            RunCatalog().record("bronze", bronze_dir, rows=self._row_counts(), status=status)
         except Exception as e:
             log_error(f"Unexpected error in DataExtraction.run: {str(e)}")
+            if bronze_dir:
+                RunCatalog().record("bronze", bronze_dir, status="failed")
         finally:
-            if self.driver:
-                close_webdriver(self.driver)
+            self._close_backend()
+            get_default_metrics().observe("stage_seconds", time.perf_counter() - started, stage="extraction")
+            if bronze_dir:
+                save_run_metrics(bronze_dir, layer="bronze")
 
 if __name__ == "__main__":
     extractor = DataExtraction()
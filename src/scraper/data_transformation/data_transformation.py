@@ -5,18 +5,30 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 import os
+import glob
 from datetime import datetime
 import sys
 import pandas as pd
-from scraper.utils import launch_data_preprocess, create_output_directory, save_data, get_latest_folder
+from scraper.utils import launch_data_preprocess, create_output_directory, save_data, save_json, get_latest_folder, load_data, save_run_metrics
+from scraper.fx_rates import FxRateTable, get_default_fx_provider, run_timestamp_from_folder, RUN_DATE_COLUMN
+from scraper.parquet_store import default_output_formats
+from scraper.run_catalog import RunCatalog
+from scraper.run_metrics import get_default_metrics
 from log_handler import setup_logging, log_error
 
 
 class DataTransformation:
-    def __init__(self, input_file: str = None, output_file: str = None, destinations: list = None):
+    CURRENCIES_CODE = {"USA": "USD", "France": "EUR", "UK": "GBP", "Japan": "JPY"}
+
+    def __init__(self, input_file: str = None, output_file: str = None, destinations: list = None,
+                 fx_table_path: str = None, output_formats: tuple = None):
         """
         If no input_file is provided, the default behavior is to look in the latest folder under 'data/bronze/'.
         If no destinations are provided, defaults to ['silver', 'gold'].
+        If an fx_table_path is provided, prices are converted with the rates of the FxRateTable as of
+        the run date of the bronze folder instead of today's live rates.
+        output_formats: 'csv' and/or 'parquet' (partitioned by year/country); CSV plus Parquet
+        when pyarrow is installed by default.
         """
         self.log_filename = f'logs/transformation_glitches_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log'
         setup_logging(self.log_filename)
@@ -24,24 +36,38 @@ class DataTransformation:
         self.input_file = input_file
         self.output_file = output_file
         self.destinations = destinations if destinations else ["silver"]
+        self.fx_table = FxRateTable(fx_table_path) if fx_table_path else None
+        self.output_formats = tuple(output_formats) if output_formats else default_output_formats()
 
     def get_input_file_path(self, prefix: str) -> str:
         """
-        Retrieves the path of the CSV file from the latest folder under the given prefix.
+        Retrieves the path of the all_watches file of the latest successful run under the given
+        prefix, from the run catalog; without a catalog entry, from the latest run folder.
         This is only used if an input file is not provided.
         """
+        catalog, stage = RunCatalog.for_stage_dir(prefix)
+        file_path = catalog.latest_file(stage, "all_watches_")
+        if file_path:
+            return file_path
         latest_folder = get_latest_folder(prefix)
         if not latest_folder:
             raise FileNotFoundError(f"No folder found under prefix: {prefix}")
-        return os.path.join(latest_folder, f"all_watches_{self.current_year}.csv")
+        # all_watches_<year>.csv and/or the all_watches_<year>/ Parquet dataset
+        names = sorted({os.path.splitext(f)[0] for f in glob.glob(os.path.join(latest_folder, "all_watches_*"))})
+        if not names:
+            raise FileNotFoundError(f"No all_watches file in {latest_folder}")
+        return f"{names[-1]}.csv"
 
     def run(self) -> None:
         """
         Main transformation process:
           - Reads the provided CSV file (or retrieves it from the default bronze folder).
           - Applies cleaning and currency conversion.
-          - Saves the transformed data into each of the selected output directories.
+          - Saves the transformed data into each of the selected output directories, along with
+            the per-stage timings and row deltas (preprocess_report.json) and the run metrics
+            (run_metrics.json / run_metrics.prom).
         """
+        get_default_metrics().reset()
         try:
             if self.input_file:
                 file_path = self.input_file
@@ -49,10 +75,20 @@ class DataTransformation:
                 prefix = "data/bronze/"
                 file_path = self.get_input_file_path(prefix)
             print(file_path)
-            dataframe = pd.read_csv(file_path)
-            CURRENCIES_CODE = {"USA": "USD", "France": "EUR", "UK": "GBP", "Japan": "JPY"}
+            dataframe = load_data(file_path)
+
+            rate_date = None
+            if self.fx_table is not None:
+                run_time = run_timestamp_from_folder(os.path.dirname(file_path)) or datetime.now()
+                rate_date = run_time.date()
+                if rate_date == datetime.now().date():
+                    # Keep the point-in-time table growing with today's rates
+                    self.fx_table.snapshot(get_default_fx_provider())
             
-            transformed_df = launch_data_preprocess(dataframe, CURRENCIES_CODE)
+            stage_report = []
+            transformed_df = launch_data_preprocess(dataframe, self.CURRENCIES_CODE,
+                                                    fx_table=self.fx_table, rate_date=rate_date,
+                                                    stage_report=stage_report)
             
             if self.output_file:
                 output_file_name = self.output_file
@@ -60,7 +96,11 @@ class DataTransformation:
                 output_file_name = f"PANERAI_DATA_{self.current_year}"
             for dest in self.destinations:
                 dest_dir = create_output_directory(dest)
-                save_data(transformed_df, output_file_name, dest_dir)
+                saved = save_data(transformed_df, output_file_name, dest_dir, formats=self.output_formats)
+                save_json(stage_report, "preprocess_report", dest_dir)
+                RunCatalog().record(dest, dest_dir, rows={output_file_name: len(transformed_df)},
+                                    status="success" if saved is not None else "empty")
+                save_run_metrics(dest_dir, layer=dest)
             print(output_file_name)
             print(dest_dir)
         except FileNotFoundError as fnf_error:
@@ -72,3 +112,47 @@ class DataTransformation:
         except Exception as e:
             log_error(f"An error occurred during data transformation: {str(e)}")
 
+    def backfill(self, bronze_folders: list = None, prefix: str = "data/bronze/") -> list:
+        """
+        Reprocess historical bronze folders in one pass, fully offline.
+
+        Every folder's rows are tagged with the run timestamp taken from the folder name,
+        cleaned and converted together (as-of join on the FxRateTable), then written to
+        <destination>/<folder name>/PANERAI_DATA_<year>.csv (and/or the Parquet dataset).
+
+        Returns:
+            list: Paths of the files written (the CSV, or the dataset folder when CSV is not written).
+        """
+        if self.fx_table is None:
+            raise ValueError("backfill needs an fx_table_path")
+        if bronze_folders is None:
+            bronze_folders = sorted(f for f in glob.glob(os.path.join(prefix, "[0-9]*-*")) if os.path.isdir(f))
+
+        frames = []
+        for folder in bronze_folders:
+            run_time = run_timestamp_from_folder(folder)
+            # all_watches_<year>.csv and/or the all_watches_<year>/ Parquet dataset
+            names = sorted({os.path.splitext(f)[0] for f in glob.glob(os.path.join(folder, "all_watches_*"))})
+            if run_time is None or not names:
+                log_error(f"backfill: skipping {folder} (no run timestamp or no all_watches file)", exc_info=False)
+                continue
+            frame = load_data(f"{names[-1]}.csv")
+            frame[RUN_DATE_COLUMN] = run_time
+            frames.append(frame)
+        if not frames:
+            return []
+
+        transformed_df = launch_data_preprocess(pd.concat(frames, ignore_index=True), self.CURRENCIES_CODE,
+                                                fx_table=self.fx_table)
+        written = []
+        for run_time, run_df in transformed_df.groupby(RUN_DATE_COLUMN, sort=True):
+            run_name = run_time.strftime("%Y-%m-%d_%H-%M-%S")
+            for dest in self.destinations:
+                dest_dir = os.path.join("data", dest, run_name)
+                os.makedirs(dest_dir, exist_ok=True)
+                file_name = self.output_file or f"PANERAI_DATA_{run_time.year}"
+                if save_data(run_df.reset_index(drop=True), file_name, dest_dir, formats=self.output_formats) is not None:
+                    suffix = ".csv" if "csv" in self.output_formats else ""
+                    written.append(os.path.join(dest_dir, f"{file_name}{suffix}"))
+                    RunCatalog().record(dest, dest_dir, rows={file_name: len(run_df)})
+        return written
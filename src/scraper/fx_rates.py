@@ -0,0 +1,335 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import threading
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+from scraper.run_metrics import get_default_metrics
+from log_handler import log_error
+
+EXCHANGE_API_URL = "https://v6.exchangerate-api.com/v6/{}/latest/{}"
+
+
+def fetch_conversion_rates(base: str, api_key: str, timeout: float = 10) -> dict:
+    """
+    Fetch every conversion rate for one base currency from ExchangeRate-API.
+
+    Raises:
+        requests.exceptions.RequestException: On network errors.
+        ValueError: If the response carries no 'conversion_rates'.
+    """
+    response = requests.get(EXCHANGE_API_URL.format(api_key, base), timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if "conversion_rates" not in data:
+        raise ValueError("Invalid API response: missing 'conversion_rates'")
+    return data["conversion_rates"]
+
+
+class ExchangeRateProvider:
+    """
+    Exchange rates with one API request per base currency.
+
+    A single ExchangeRate-API response for a base already holds every target rate, so rates
+    are fetched per base and kept in an in-process cache and, when cache_dir is set, in an
+    on-disk cache (one JSON file per base) that is valid for `ttl` seconds.
+
+    - pivot: derive every pair from that single base (cross rates), i.e. one request in total.
+    - offline: never call the API, replay the on-disk cache whatever its age.
+    """
+
+    def __init__(self, api_key: str = None, cache_dir: str = None, ttl: float = 12 * 3600,
+                 offline: bool = False, pivot: str = None, fetch=None):
+        self.api_key = api_key
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.offline = offline
+        self.pivot = pivot.upper() if pivot else None
+        self.fetch = fetch or fetch_conversion_rates
+        self.requests_made = 0
+        self._dotenv_loaded = False
+        self._rates = {}  # base -> (fetched_at, rates)
+        self._lock = threading.Lock()
+
+    def _resolve_api_key(self) -> str:
+        """Explicit key, else EXCHANGE_API_KEY from the environment (.env is loaded once)."""
+        if self.api_key:
+            return self.api_key
+        if not self._dotenv_loaded:
+            load_dotenv()
+            self._dotenv_loaded = True
+        return os.getenv("EXCHANGE_API_KEY")
+
+    def _cache_path(self, base: str) -> str:
+        return os.path.join(self.cache_dir, f"{base}.json")
+
+    def _fresh(self, fetched_at: float) -> bool:
+        return self.offline or time.time() - fetched_at <= self.ttl
+
+    def _read_disk(self, base: str):
+        if not self.cache_dir or not os.path.exists(self._cache_path(base)):
+            return None
+        try:
+            with open(self._cache_path(base), encoding="utf-8") as f:
+                cached = json.load(f)
+            return cached["fetched_at"], cached["conversion_rates"]
+        except (OSError, ValueError, KeyError) as e:
+            log_error(f"ExchangeRateProvider: unreadable cache for {base}: {e}")
+            return None
+
+    def _write_disk(self, base: str, fetched_at: float, rates: dict) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._cache_path(base) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"base": base, "fetched_at": fetched_at, "conversion_rates": rates}, f)
+        os.replace(tmp_path, self._cache_path(base))
+
+    def get_rates(self, base: str) -> dict:
+        """
+        All conversion rates for a base currency, or None if they cannot be obtained.
+        """
+        base = base.upper()
+        with self._lock:
+            cached = self._rates.get(base)
+            if cached and self._fresh(cached[0]):
+                return cached[1]
+
+            cached = self._read_disk(base)
+            if cached and self._fresh(cached[0]):
+                self._rates[base] = cached
+                return cached[1]
+
+            if self.offline:
+                log_error(f"ExchangeRateProvider: no cached rates for {base} in offline mode", exc_info=False)
+                return None
+            api_key = self._resolve_api_key()
+            if not api_key:
+                log_error("Missing API key")
+                return None
+
+            metrics = get_default_metrics()
+            try:
+                rates = self.fetch(base, api_key)
+                self.requests_made += 1
+                metrics.increment("fx_requests_total", status="ok")
+            except requests.exceptions.RequestException as e:
+                log_error(f"Network error: {e}")
+                metrics.increment("fx_requests_total", status="error")
+                return None
+            except ValueError as e:
+                log_error(f"Data error: {e}")
+                metrics.increment("fx_requests_total", status="error")
+                return None
+            except Exception as e:
+                log_error(f"Unexpected error: {e}")
+                metrics.increment("fx_requests_total", status="error")
+                return None
+
+            fetched_at = time.time()
+            self._rates[base] = (fetched_at, rates)
+            self._write_disk(base, fetched_at, rates)
+            return rates
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Rate from 'from_currency' to 'to_currency', or None if an error occurs.
+        """
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+
+        if self.pivot:
+            rates = self.get_rates(self.pivot)
+            if rates is None:
+                return None
+            source = 1.0 if from_currency == self.pivot else rates.get(from_currency)
+            target = 1.0 if to_currency == self.pivot else rates.get(to_currency)
+            if not source or target is None:
+                log_error(f"Data error: Exchange rate for {from_currency}->{to_currency} not derivable from {self.pivot}",
+                          exc_info=False)
+                return None
+            return target / source
+
+        rates = self.get_rates(from_currency)
+        if rates is None:
+            return None
+        rate = rates.get(to_currency)
+        if rate is None:
+            log_error(f"Data error: Exchange rate for {to_currency} not found in API response", exc_info=False)
+        return rate
+
+    def clear(self) -> None:
+        """Drop the in-process cache (the on-disk cache is kept)."""
+        with self._lock:
+            self._rates.clear()
+
+
+_default_provider = None
+_default_provider_lock = threading.Lock()
+
+
+def get_default_fx_provider() -> ExchangeRateProvider:
+    """
+    Process-wide provider configured from the environment:
+    FX_CACHE_DIR (on-disk cache), FX_CACHE_TTL (seconds), FX_OFFLINE=1 (replay only), FX_PIVOT (cross rates).
+    """
+    global _default_provider
+    with _default_provider_lock:
+        if _default_provider is None:
+            load_dotenv()
+            _default_provider = ExchangeRateProvider(
+                cache_dir=os.environ.get("FX_CACHE_DIR") or None,
+                ttl=float(os.environ.get("FX_CACHE_TTL", 12 * 3600)),
+                offline=os.environ.get("FX_OFFLINE", "").lower() in ("1", "true", "yes"),
+                pivot=os.environ.get("FX_PIVOT") or None,
+            )
+        return _default_provider
+
+
+def reset_default_fx_provider() -> None:
+    """Forget the process-wide provider (e.g. after changing the environment)."""
+    global _default_provider
+    with _default_provider_lock:
+        _default_provider = None
+
+
+RUN_DATE_COLUMN = "run_date"
+
+
+def run_timestamp_from_folder(folder: str):
+    """
+    Timestamp of a run from its folder name (e.g. 'data/bronze/2025-03-07_01-52-40'),
+    or None if the name does not carry one.
+    """
+    name = os.path.basename(os.path.normpath(folder or ""))
+    for fmt, length in (("%Y-%m-%d_%H-%M-%S", 19), ("%Y-%m-%d", 10)):
+        try:
+            return datetime.strptime(name[:length], fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class FxRateTable:
+    """
+    Local, versioned table of daily exchange rates (CSV: date, base, currency, rate, version, recorded_at).
+
+    Recording the same (date, base) again adds a new version; reads use the latest version.
+    Conversions are vectorized as-of joins: each row is converted with the latest rates
+    known on or before its date, so backfills of old bronze folders run fully offline.
+    """
+    COLUMNS = ["date", "base", "currency", "rate", "version", "recorded_at"]
+
+    def __init__(self, path: str = "data/fx/fx_rates.csv", pivot: str = "USD"):
+        self.path = path
+        self.pivot = pivot.upper()
+        self._table = None
+
+    def load(self) -> pd.DataFrame:
+        """All rates, latest version per (date, base)."""
+        if self._table is None:
+            if os.path.exists(self.path):
+                table = pd.read_csv(self.path, parse_dates=["date"])
+            else:
+                table = pd.DataFrame(columns=self.COLUMNS)
+                table["date"] = pd.to_datetime(table["date"])
+            latest = table.groupby(["date", "base"])["version"].transform("max")
+            self._table = table[table["version"] == latest].reset_index(drop=True)
+        return self._table
+
+    def dates(self) -> list:
+        return sorted(self.load()["date"].dt.date.unique())
+
+    def record(self, date, base: str, rates: dict) -> int:
+        """Append the rates of one base for one day; returns the version written."""
+        base = base.upper()
+        date = pd.Timestamp(date).normalize()
+        existing = self.load()
+        same_day = existing[(existing["date"] == date) & (existing["base"] == base)]
+        version = int(same_day["version"].max()) + 1 if not same_day.empty else 1
+
+        rows = pd.DataFrame({
+            "date": date.strftime("%Y-%m-%d"),
+            "base": base,
+            "currency": list(rates.keys()),
+            "rate": list(rates.values()),
+            "version": version,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }, columns=self.COLUMNS)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        rows.to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False)
+        self._table = None
+        return version
+
+    def snapshot(self, provider: ExchangeRateProvider, date=None) -> bool:
+        """
+        Record today's (or `date`'s) pivot rates from a provider unless the table already has them.
+        """
+        date = pd.Timestamp(date or datetime.now()).normalize()
+        table = self.load()
+        if not table[(table["date"] == date) & (table["base"] == self.pivot)].empty:
+            return False
+        rates = provider.get_rates(self.pivot)
+        if rates is None:
+            return False
+        self.record(date, self.pivot, rates)
+        return True
+
+    def units_per_pivot(self) -> pd.DataFrame:
+        """
+        Long frame (date, currency, per_pivot): units of each currency for one pivot unit,
+        derived from whichever base was recorded that day.
+        """
+        table = self.load()
+        if table.empty:
+            return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "currency": pd.Series(dtype=object),
+                                 "per_pivot": pd.Series(dtype=float)})
+        pivot_rate = table[table["currency"] == self.pivot][["date", "base", "rate"]].rename(columns={"rate": "pivot_rate"})
+        table = table.merge(pivot_rate, on=["date", "base"], how="inner")
+        table["per_pivot"] = table["rate"] / table["pivot_rate"]
+        # Prefer the pivot's own quotes when several bases were recorded the same day
+        table["is_pivot"] = table["base"] == self.pivot
+        table = table.sort_values(["date", "currency", "is_pivot"]).drop_duplicates(["date", "currency"], keep="last")
+        return table[["date", "currency", "per_pivot"]].sort_values("date").reset_index(drop=True)
+
+    def convert(self, df: pd.DataFrame, targets, price_column: str = "price", source_column: str = "currency_code",
+                date_column: str = RUN_DATE_COLUMN, date=None) -> pd.DataFrame:
+        """
+        Convert prices to every target currency with the rates as of each row's date.
+
+        Args:
+            df (pd.DataFrame): Rows with a price and a source currency code.
+            targets (iterable): Target currency codes; one 'price_<code>' column each.
+            date_column (str): Per-row date column (used when present).
+            date: Single date for all rows when df has no date column.
+
+        Returns:
+            pd.DataFrame: 'price_<code>' columns aligned on df's index (NaN where no rate is known).
+        """
+        if date_column in df.columns:
+            row_dates = pd.to_datetime(df[date_column]).dt.normalize()
+        else:
+            row_dates = pd.Series(pd.Timestamp(date or datetime.now()).normalize(), index=df.index)
+
+        left = pd.DataFrame({"date": row_dates.astype("datetime64[ns]"), "currency": df[source_column].astype(object),
+                             "row": range(len(df))}).sort_values("date")
+        rates = self.units_per_pivot()
+        rates["date"] = rates["date"].astype("datetime64[ns]")
+        rates["currency"] = rates["currency"].astype(object)
+        source = pd.merge_asof(left, rates, on="date", by="currency", direction="backward")
+        source = source.sort_values("row")["per_pivot"].to_numpy()
+
+        prices = df[price_column].to_numpy(dtype=float)
+        converted = pd.DataFrame(index=df.index)
+        for target in targets:
+            target_rates = rates[rates["currency"] == target][["date", "per_pivot"]]
+            joined = pd.merge_asof(left[["date", "row"]], target_rates, on="date", direction="backward")
+            converted[f"price_{target}"] = prices * joined.sort_values("row")["per_pivot"].to_numpy() / source
+        return converted
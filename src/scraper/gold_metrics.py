@@ -0,0 +1,242 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pandas as pd
+
+GROWTH_COLUMNS = ["Growth Rate (%)", "CAGR (%)"]
+COMPARATIVE_COLUMNS = ["collection", "reference", "price", "currency", "country", "year", "price_USD"]
+
+
+def prepare_silver(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Align silver exports of different vintages: the 2021 file has 'url' and ISO codes in
+    'currency', later ones 'product_url', a symbol in 'currency' and 'currency_code'.
+    Categoricals are turned back into plain values so frames of different years join cleanly.
+    """
+    df = df.rename(columns={"url": "product_url"})
+    df = df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+    if "currency_code" not in df.columns:
+        df = df.assign(currency_code=df["currency"])
+    return df.drop_duplicates(subset=["reference", "country"], keep="first")
+
+
+def data_year(df: pd.DataFrame) -> int:
+    return int(df["year"].max())
+
+
+def available_everywhere(df: pd.DataFrame, countries: int = None) -> pd.Series:
+    """Mask of the rows whose reference is sold in every country (of the frame, unless a count is given)."""
+    countries = countries or df["country"].nunique()
+    return df.groupby("reference")["country"].transform("nunique").eq(countries)
+
+
+def comparative_metrics(df: pd.DataFrame, countries: int = None) -> pd.DataFrame:
+    """
+    Products available in every country, each row compared with the cross-country USD
+    median of its reference: 'price_USD_median', 'Price Difference', 'Difference Rate (%)'.
+    """
+    common = df.loc[available_everywhere(df, countries), COMPARATIVE_COLUMNS]
+    common = common.assign(currency=df.loc[common.index, "currency_code"])
+    median = common.groupby("reference")["price_USD"].transform("median")
+    difference = common["price_USD"] - median
+    common = common.assign(**{"price_USD_median": median, "Price Difference": difference,
+                              "Difference Rate (%)": difference / median * 100})
+    return common.sort_values(["reference", "country"]).reset_index(drop=True)
+
+
+def difference_extremes(comparative: pd.DataFrame) -> tuple:
+    """Rows with the highest and the lowest difference rate."""
+    rate = comparative["Difference Rate (%)"]
+    return (comparative.loc[[rate.idxmax()]].reset_index(drop=True),
+            comparative.loc[[rate.idxmin()]].reset_index(drop=True))
+
+
+def gray_market_margin(comparative: pd.DataFrame) -> pd.DataFrame:
+    """Margin lost where a product sells under its USD median, per country and collection."""
+    below_median = comparative[comparative["Difference Rate (%)"] < 0]
+    margin = below_median.groupby(["country", "collection"], sort=True)["Price Difference"].sum() * -1
+    return margin.reset_index()
+
+
+def join_years(base: pd.DataFrame, current: pd.DataFrame, countries: int = None) -> pd.DataFrame:
+    """
+    Products sold in both years in every country, one row per (reference, country) with
+    the price and USD price of each year (price_<year>, price_USD_<year>).
+    """
+    base_year, current_year = data_year(base), data_year(current)
+    joined = current[["brand", "collection", "reference", "country", "currency_code", "price", "price_USD"]].merge(
+        base[["reference", "country", "price", "price_USD"]], on=["reference", "country"], how="inner",
+        suffixes=(f"_{current_year}", f"_{base_year}"),
+    )
+    joined = joined[available_everywhere(joined, countries)].rename(columns={"currency_code": "currency"})
+    return joined[["brand", "collection", "reference", "country", "currency",
+                   f"price_{base_year}", f"price_USD_{base_year}",
+                   f"price_{current_year}", f"price_USD_{current_year}"]].sort_values(
+        ["reference", "country"]).reset_index(drop=True)
+
+
+def growth_metrics(joined: pd.DataFrame, base_year: int, current_year: int) -> pd.DataFrame:
+    """Local-currency price difference, growth rate and CAGR between the two years."""
+    base_price, current_price = joined[f"price_{base_year}"], joined[f"price_{current_year}"]
+    difference = current_price - base_price
+    return joined.assign(**{
+        "Price Difference": difference,
+        "Growth Rate (%)": difference / base_price * 100,
+        "CAGR (%)": ((current_price / base_price) ** (1 / (current_year - base_year)) - 1) * 100,
+    })
+
+
+def growth_extremes(growth: pd.DataFrame) -> dict:
+    """{country: (highest, lowest)} growth-rate rows; ties are all kept."""
+    rate = growth["Growth Rate (%)"]
+    by_country = rate.groupby(growth["country"])
+    is_max, is_min = rate.eq(by_country.transform("max")), rate.eq(by_country.transform("min"))
+    return {
+        country: (growth[is_max & (growth["country"] == country)].reset_index(drop=True),
+                  growth[is_min & (growth["country"] == country)].reset_index(drop=True))
+        for country in growth["country"].unique()
+    }
+
+
+def growth_medians(growth: pd.DataFrame, by: str) -> pd.DataFrame:
+    return growth.groupby(by, sort=True)[GROWTH_COLUMNS].median().reset_index()
+
+
+def exclusive_products(df: pd.DataFrame, other: pd.DataFrame) -> pd.DataFrame:
+    """Rows of df whose reference is not sold at all in other, by (reference, country) like the other gold tables."""
+    exclusive = df[~df["reference"].isin(other["reference"])]
+    return exclusive.sort_values(["reference", "country"]).reset_index(drop=True)
+
+
+def compute_gold(base: pd.DataFrame, current: pd.DataFrame) -> dict:
+    """
+    Every gold table of the base-year vs current-year analysis, keyed by output file name.
+
+    The per-year comparative frames (USD medians) and the growth join are computed once
+    and reused by the tables derived from them.
+    """
+    base, current = prepare_silver(base), prepare_silver(current)
+    base_year, current_year = data_year(base), data_year(current)
+    period = f"between_{base_year}_{current_year}"
+    tables = {}
+
+    for year, df in ((base_year, base), (current_year, current)):
+        comparative = comparative_metrics(df)
+        highest, lowest = difference_extremes(comparative) if not comparative.empty else (comparative, comparative)
+        tables[f"Products_available_4countries_with_comparative_metrics_{year}"] = comparative
+        tables[f"Product_with_Highest_Difference_Rate_{year}"] = highest
+        tables[f"Product_with_Lowest_Difference_Rate_{year}"] = lowest
+        tables[f"Margin_lost_to_the_gray_market_{year}"] = gray_market_margin(comparative)
+
+    growth = growth_metrics(join_years(base, current, current["country"].nunique()), base_year, current_year)
+    tables[f"Watches_on_sale_from_{base_year}_until_{current_year}_with_comparative_metrics"] = growth
+    for country, (highest, lowest) in growth_extremes(growth).items():
+        tables[f"Product_with_Highest_Growth_Rate_{period}_{country}"] = highest
+        tables[f"Product_with_Lowest_Growth_Rate_{period}_{country}"] = lowest
+    for by, name in (("reference", "product"), ("collection", "collection"), ("country", "country")):
+        tables[f"Global_Growth_Rate_{period}_by_{name}"] = growth_medians(growth, by)
+
+    tables[f"Watches_on_sale_only_in_{base_year}"] = exclusive_products(base, current)
+    tables[f"Watches_on_sale_{current_year}_Edition"] = exclusive_products(current, base)
+    return tables
+
+
+def row_fingerprints(df: pd.DataFrame) -> pd.DataFrame:
+    """One hash per (reference, country) row of a prepared silver frame, over all its values."""
+    values = df.astype({col: "float64" if pd.api.types.is_numeric_dtype(df[col]) else str for col in df.columns})
+    values = values[sorted(values.columns)]
+    return pd.DataFrame({"reference": df["reference"].astype(str).to_numpy(),
+                         "country": df["country"].astype(str).to_numpy(),
+                         "row_hash": pd.util.hash_pandas_object(values, index=False).astype(str).to_numpy()})
+
+
+def changed_references(previous: pd.DataFrame, current: pd.DataFrame) -> set:
+    """References with a (reference, country) row added, removed or modified between two fingerprint sets."""
+    merged = previous.merge(current, on=["reference", "country"], how="outer", suffixes=("_previous", "_current"))
+    changed = merged["row_hash_previous"].astype(str) != merged["row_hash_current"].astype(str)
+    return set(merged.loc[changed, "reference"])
+
+
+def _replace(table: pd.DataFrame, rows: pd.DataFrame, mask: pd.Series, sort_by: list) -> pd.DataFrame:
+    merged = pd.concat([table[~mask], rows], ignore_index=True)
+    return merged.sort_values(sort_by).reset_index(drop=True) if not merged.empty else merged
+
+
+def _groups(*frames, by):
+    return set().union(*(frame[by].astype(str) for frame in frames))
+
+
+def update_gold(tables: dict, base: pd.DataFrame, current: pd.DataFrame, references: set) -> dict:
+    """
+    Recompute the gold tables affected by `references` and merge them into `tables`
+    (the previous gold, as written by compute_gold for the same base year and current year).
+
+    Per-reference metrics (USD-median difference rates, growth, exclusive products) are
+    recomputed for the changed references only; roll-ups that are not additive (medians,
+    extremes, gray-market sums) are recomputed for the collections and countries those
+    references touch, from the merged per-reference tables.
+
+    Returns:
+        dict: The tables that changed, keyed by name.
+    """
+    base, current = prepare_silver(base), prepare_silver(current)
+    base_year, current_year = data_year(base), data_year(current)
+    period = f"between_{base_year}_{current_year}"
+    countries = current["country"].nunique()
+    base_rows = base[base["reference"].isin(references)]
+    current_rows = current[current["reference"].isin(references)]
+    updated = {}
+
+    # Difference rates against the per-reference USD median (the baseline year is unchanged)
+    name = f"Products_available_4countries_with_comparative_metrics_{current_year}"
+    previous = tables[name]
+    comparative = _replace(previous, comparative_metrics(current_rows, countries),
+                           previous["reference"].isin(references), ["reference", "country"])
+    updated[name] = comparative
+    if not comparative.empty:
+        highest, lowest = difference_extremes(comparative)
+        updated[f"Product_with_Highest_Difference_Rate_{current_year}"] = highest
+        updated[f"Product_with_Lowest_Difference_Rate_{current_year}"] = lowest
+
+    name = f"Margin_lost_to_the_gray_market_{current_year}"
+    touched = previous[previous["reference"].isin(references)]
+    affected = _groups(touched, comparative[comparative["reference"].isin(references)], by="collection")
+    margin = tables[name]
+    updated[name] = _replace(margin, gray_market_margin(comparative[comparative["collection"].astype(str).isin(affected)]),
+                             margin["collection"].astype(str).isin(affected), ["country", "collection"])
+
+    # Growth between the two years, then the roll-ups of the collections and countries touched
+    name = f"Watches_on_sale_from_{base_year}_until_{current_year}_with_comparative_metrics"
+    previous = tables[name]
+    growth = _replace(previous, growth_metrics(join_years(base_rows, current_rows, countries), base_year, current_year),
+                      previous["reference"].isin(references), ["reference", "country"])
+    updated[name] = growth
+    touched = [previous[previous["reference"].isin(references)], growth[growth["reference"].isin(references)]]
+
+    affected_countries = _groups(*touched, by="country")
+    extremes = growth_extremes(growth[growth["country"].astype(str).isin(affected_countries)])
+    for country in affected_countries:
+        highest, lowest = extremes.get(country, (growth.iloc[0:0], growth.iloc[0:0]))
+        updated[f"Product_with_Highest_Growth_Rate_{period}_{country}"] = highest
+        updated[f"Product_with_Lowest_Growth_Rate_{period}_{country}"] = lowest
+
+    for by, label in (("reference", "product"), ("collection", "collection"), ("country", "country")):
+        name = f"Global_Growth_Rate_{period}_by_{label}"
+        affected = set(map(str, references)) if by == "reference" else _groups(*touched, by=by)
+        medians = tables[name]
+        updated[name] = _replace(medians, growth_medians(growth[growth[by].astype(str).isin(affected)], by),
+                                 medians[by].astype(str).isin(affected), [by])
+
+    # Exclusive products
+    name = f"Watches_on_sale_only_in_{base_year}"
+    previous = tables[name]
+    updated[name] = _replace(previous, exclusive_products(base_rows, current),
+                             previous["reference"].isin(references), ["reference", "country"])
+    name = f"Watches_on_sale_{current_year}_Edition"
+    previous = tables[name]
+    updated[name] = _replace(previous, exclusive_products(current_rows, base),
+                             previous["reference"].isin(references), ["reference", "country"])
+    return updated
@@ -0,0 +1,124 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import glob
+import hashlib
+import json
+import threading
+import pandas as pd
+from scraper.utils import save_json, read_partitioned
+from log_handler import log_error
+
+
+def fingerprint_cards(cards):
+    """Stable hash of a page's card payload (tracking data, links and images, in page order)."""
+    payload = json.dumps(
+        [[card.get("tracking"), card.get("href"), card.get("image")] for card in cards],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PageFingerprints:
+    """
+    Per-(country, collection) page fingerprints stored next to a bronze snapshot.
+
+    Each entry records the server validators (ETag / Last-Modified) when there are some,
+    the hash of the card payload and the references found on the page. A page that is
+    unchanged since the previous snapshot has its rows carried forward from that folder
+    instead of being re-extracted.
+    """
+    FILENAME = "page_fingerprints"
+
+    def __init__(self, previous_folder: str = None):
+        self.previous_folder = previous_folder
+        self.previous = self._load(previous_folder)
+        self.current = {}
+        self.carried = []
+        self._previous_rows = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _load(cls, folder):
+        if not folder:
+            return {}
+        path = os.path.join(folder, f"{cls.FILENAME}.json")
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log_error(f"PageFingerprints: unreadable fingerprints in {folder}: {str(e)}")
+            return {}
+
+    def validators(self, key: str) -> dict:
+        """ETag / Last-Modified of the previous snapshot, for a conditional request."""
+        entry = self.previous.get(key) or {}
+        return {"etag": entry.get("etag"), "last_modified": entry.get("last_modified")}
+
+    def is_unchanged(self, key: str, page: dict) -> bool:
+        """True if the server said 304 or the card payload hashes to the previous fingerprint."""
+        entry = self.previous.get(key)
+        if not entry:
+            return False
+        if page.get("not_modified"):
+            return True
+        return page.get("cards") is not None and fingerprint_cards(page["cards"]) == entry.get("fingerprint")
+
+    def _load_previous_rows(self):
+        with self._lock:
+            if self._previous_rows is None:
+                files = sorted(glob.glob(os.path.join(self.previous_folder, "all_watches_*.csv")))
+                datasets = sorted(d for d in glob.glob(os.path.join(self.previous_folder, "all_watches_*"))
+                                  if os.path.isdir(d))
+                if files:
+                    self._previous_rows = pd.read_csv(files[-1], dtype={"price": str})
+                elif datasets:
+                    self._previous_rows = read_partitioned(datasets[-1])
+                else:
+                    self._previous_rows = pd.DataFrame()
+            return self._previous_rows
+
+    def carry_forward(self, key: str, country: str) -> list:
+        """
+        Rows of an unchanged page, taken from the previous snapshot and stamped with the current year.
+        Returns [] when they cannot be found, in which case the page must be extracted again.
+        """
+        entry = self.previous.get(key) or {}
+        references = entry.get("references")
+        if not references or not self.previous_folder:
+            return []
+        try:
+            previous_rows = self._load_previous_rows()
+            if previous_rows.empty:
+                return []
+            rows = previous_rows[(previous_rows["country"] == country) & previous_rows["reference"].isin(references)]
+            if rows["reference"].nunique() != len(set(references)):
+                return []
+            products = rows.drop_duplicates(subset=["reference"]).to_dict("records")
+        except Exception as e:
+            log_error(f"PageFingerprints: could not carry {key} forward: {str(e)}")
+            return []
+
+        year = datetime.now().year
+        for product in products:
+            product["year"] = year
+        self.current[key] = dict(entry)
+        self.carried.append(key)
+        return products
+
+    def record(self, key: str, page: dict, products: list) -> None:
+        """Remember the fingerprint of a freshly extracted page."""
+        self.current[key] = {
+            "fingerprint": fingerprint_cards(page["cards"]),
+            "etag": page.get("etag"),
+            "last_modified": page.get("last_modified"),
+            "references": [product["reference"] for product in products],
+        }
+
+    def save(self, output_dir: str) -> str:
+        return save_json(self.current, self.FILENAME, output_dir)
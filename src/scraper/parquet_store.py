@@ -0,0 +1,147 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import glob
+import pandas as pd
+from log_handler import log_error
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: CSV output keeps working without it
+    pa = ds = pq = None
+
+PARTITION_COLUMNS = ("year", "country")
+# Arrow schema of the whole dataset (partition columns included), next to the partitions
+SCHEMA_FILE = "_common_metadata"
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def default_output_formats() -> tuple:
+    """CSV plus Parquet when pyarrow is installed, CSV only otherwise."""
+    return ("csv", "parquet") if parquet_available() else ("csv",)
+
+
+def _require_pyarrow():
+    if not parquet_available():
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+
+
+def write_partitioned(df: pd.DataFrame, path: str, partition_cols=PARTITION_COLUMNS,
+                      compression: str = "zstd", chunk: int = None) -> str:
+    """
+    Write a DataFrame as a Hive-partitioned Parquet dataset:
+    <path>/year=2025/country=Japan/part-0.parquet
+
+    Partition columns missing from the frame are skipped. Rewriting the same path replaces
+    the partitions it writes, so re-running a stage is idempotent. The Arrow schema (with
+    the pandas dtypes) is stored in <path>/_common_metadata for the readers.
+
+    With a chunk number the frame is added to the dataset as part-<chunk>-*.parquet files
+    instead, keeping the chunks already written (streaming writes).
+
+    Returns:
+        str: The dataset path.
+    """
+    _require_pyarrow()
+    partition_cols = [col for col in partition_cols if col in df.columns]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    os.makedirs(path, exist_ok=True)
+    basename = "part-{i}.parquet" if chunk is None else f"part-{chunk}-{{i}}.parquet"
+    if partition_cols:
+        pq.write_to_dataset(table, path, partition_cols=partition_cols, compression=compression,
+                            basename_template=basename,
+                            existing_data_behavior="delete_matching" if chunk is None else "overwrite_or_ignore")
+    else:
+        pq.write_table(table, os.path.join(path, basename.format(i=0)), compression=compression)
+    pq.write_metadata(table.schema, os.path.join(path, SCHEMA_FILE))
+    return path
+
+
+def read_schema(path: str):
+    """Stored Arrow schema of a dataset, or None if it was written without one."""
+    _require_pyarrow()
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    return pq.read_schema(schema_path) if os.path.exists(schema_path) else None
+
+
+def _plain_type(arrow_type):
+    return arrow_type.value_type if pa.types.is_dictionary(arrow_type) else arrow_type
+
+
+def _filter_expression(filters: dict):
+    expression = None
+    for col, values in (filters or {}).items():
+        values = list(values) if isinstance(values, (list, tuple, set)) else [values]
+        condition = ds.field(col).isin(values)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_partitioned(path: str, columns: list = None, filters: dict = None) -> pd.DataFrame:
+    """
+    Read a dataset written by write_partitioned.
+
+    Args:
+        path (str): Dataset path.
+        columns (list): Columns to load (projection); all columns when omitted.
+        filters (dict): {column: value or list of values}. Filters on partition columns
+            prune whole directories without opening their files, e.g. {"country": "Japan"}.
+
+    Returns:
+        pd.DataFrame: Rows in partition order; empty if the dataset does not exist.
+    """
+    _require_pyarrow()
+    if not os.path.isdir(path):
+        return pd.DataFrame()
+    schema = read_schema(path)
+    partitioning = "hive"
+    if schema is not None:
+        partition_fields = [pa.field(field.name, _plain_type(field.type)) for field in schema
+                            if field.name in PARTITION_COLUMNS]
+        partitioning = ds.partitioning(pa.schema(partition_fields), flavor="hive")
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    table = dataset.to_table(columns=columns, filter=_filter_expression(filters))
+
+    df = table.to_pandas()
+    if schema is not None:
+        # Partition values come back as plain values: restore the stored dtypes
+        for field in schema:
+            if field.name in df.columns and field.name in PARTITION_COLUMNS:
+                stored = "category" if pa.types.is_dictionary(field.type) else field.type.to_pandas_dtype()
+                df[field.name] = df[field.name].astype(stored)
+    return df
+
+
+def read_runs(stage_dir: str, dataset: str, columns: list = None, filters: dict = None) -> pd.DataFrame:
+    """
+    Read a dataset across every run folder of a stage, e.g. one country's prices over the years:
+
+        read_runs("data/silver", "PANERAI_DATA_*", columns=["reference", "price"], filters={"country": "Japan"})
+
+    Args:
+        stage_dir (str): Stage folder holding the timestamped runs ('data/silver').
+        dataset (str): Dataset name inside each run (glob patterns allowed).
+
+    Returns:
+        pd.DataFrame: The rows of every run, oldest first, with the run folder name in a 'run' column.
+    """
+    frames = []
+    for dataset_path in sorted(glob.glob(os.path.join(stage_dir, "*", dataset))):
+        if not os.path.isdir(dataset_path):
+            continue
+        try:
+            frame = read_partitioned(dataset_path, columns=columns, filters=filters)
+        except Exception as e:
+            log_error(f"read_runs: cannot read {dataset_path} - {str(e)}")
+            continue
+        if not frame.empty:
+            frames.append(frame.assign(run=os.path.basename(os.path.dirname(dataset_path))))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
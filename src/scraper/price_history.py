@@ -0,0 +1,213 @@
+import os
+import time
+from datetime import datetime, timedelta
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import glob
+import json
+import shutil
+import pandas as pd
+from scraper.utils import load_data, save_json
+from scraper.fx_rates import run_timestamp_from_folder
+from scraper.run_catalog import RunCatalog, SUCCESS
+from log_handler import setup_logging, log_error
+
+KEY_COLUMNS = ["reference", "country"]
+# A new interval starts only when one of these changes
+TRACKED_COLUMNS = ["price", "currency", "availability"]
+VALID_FROM, VALID_TO = "valid_from", "valid_to"
+
+
+class PriceHistory:
+    """
+    Change-only history of the bronze catalog, keyed by (reference, country).
+
+    Every row is a validity interval [valid_from, valid_to) of one product in one market,
+    holding the bronze values seen when the interval opened; valid_to is empty while the
+    interval is still current. A new interval is only opened when the price, currency or
+    availability changes (or the product comes back), and an interval is closed when the
+    product disappears from a snapshot, so identical daily snapshots cost nothing.
+
+    The intervals live in one CSV (path) and the folded runs in a manifest next to it
+    (<path without extension>.json). Snapshots must be folded in chronological order.
+    """
+
+    def __init__(self, path: str = "data/history/price_history.csv"):
+        self.path = path
+        self.manifest_path = f"{os.path.splitext(path)[0]}.json"
+        self._intervals = None
+        self._manifest = None
+
+    def load(self) -> pd.DataFrame:
+        """Every interval, sorted by (reference, country, valid_from)."""
+        if self._intervals is None:
+            if os.path.exists(self.path):
+                intervals = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+                intervals[VALID_FROM] = pd.to_datetime(intervals[VALID_FROM])
+                intervals[VALID_TO] = pd.to_datetime(intervals[VALID_TO].replace("", None))
+            else:
+                intervals = pd.DataFrame(columns=KEY_COLUMNS + TRACKED_COLUMNS + [VALID_FROM, VALID_TO])
+                intervals[VALID_FROM] = pd.to_datetime(intervals[VALID_FROM])
+                intervals[VALID_TO] = pd.to_datetime(intervals[VALID_TO])
+            self._intervals = intervals
+        return self._intervals
+
+    @property
+    def manifest(self) -> dict:
+        if self._manifest is None:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {"folded_runs": [], "last_folded": None}
+        return self._manifest
+
+    @property
+    def last_folded(self):
+        last = self.manifest.get("last_folded")
+        return pd.Timestamp(last) if last else None
+
+    def fold(self, snapshot: pd.DataFrame, as_of, run: str = None) -> dict:
+        """
+        Fold one catalog snapshot taken at `as_of` into the history (in memory; see save).
+
+        Returns:
+            dict: Number of intervals opened and closed, and of rows left unchanged.
+        """
+        as_of = pd.Timestamp(as_of)
+        if self.last_folded is not None and as_of <= self.last_folded:
+            raise ValueError(f"Snapshot {as_of} is not newer than the last folded run {self.last_folded}")
+
+        snapshot = snapshot.drop(columns=["year"], errors="ignore").drop_duplicates(subset=KEY_COLUMNS, keep="first")
+        snapshot = snapshot.reindex(columns=list(dict.fromkeys(list(snapshot.columns) + TRACKED_COLUMNS)))
+        snapshot = snapshot.fillna("").astype(str)
+
+        intervals = self.load()
+        is_open = intervals[VALID_TO].isna()
+        current = intervals.loc[is_open, KEY_COLUMNS + TRACKED_COLUMNS].assign(_row=intervals.index[is_open])
+        merged = snapshot[KEY_COLUMNS + TRACKED_COLUMNS].merge(current, on=KEY_COLUMNS, how="outer",
+                                                                suffixes=("", "_open"), indicator=True)
+        both = merged["_merge"] == "both"
+        changed = both & pd.concat([merged[col] != merged[f"{col}_open"] for col in TRACKED_COLUMNS], axis=1).any(axis=1)
+        gone = merged["_merge"] == "right_only"
+        new = merged["_merge"] == "left_only"
+
+        closing = merged.loc[changed | gone, "_row"].astype(int)
+        intervals.loc[closing, VALID_TO] = as_of
+
+        opening = merged.loc[changed | new, KEY_COLUMNS]
+        opened = snapshot.merge(opening, on=KEY_COLUMNS, how="inner").assign(**{VALID_FROM: as_of, VALID_TO: pd.NaT})
+        columns = list(dict.fromkeys(list(intervals.columns) + list(opened.columns)))
+        self._intervals = pd.concat(
+            [intervals.reindex(columns=columns), opened.reindex(columns=columns)], ignore_index=True
+        ).sort_values(KEY_COLUMNS + [VALID_FROM], kind="stable").reset_index(drop=True)
+
+        self.manifest["folded_runs"].append(run or as_of.isoformat())
+        self.manifest["last_folded"] = as_of.isoformat()
+        return {"opened": len(opened), "closed": len(closing), "unchanged": int(both.sum() - changed.sum())}
+
+    def save(self) -> str:
+        """Write the intervals and the manifest (atomically replacing the previous files)."""
+        intervals = self.load()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        intervals.to_csv(temporary, index=False, date_format="%Y-%m-%dT%H:%M:%S")
+        os.replace(temporary, self.path)
+        save_json(self.manifest, os.path.basename(os.path.splitext(self.path)[0]), os.path.dirname(self.path) or ".")
+        return self.path
+
+    def as_of(self, when) -> pd.DataFrame:
+        """Catalog as of a point in time: the state after the last run at or before `when`."""
+        when = pd.Timestamp(when)
+        intervals = self.load()
+        valid = (intervals[VALID_FROM] <= when) & (intervals[VALID_TO].isna() | (intervals[VALID_TO] > when))
+        catalog = intervals[valid].drop(columns=[VALID_FROM, VALID_TO])
+        return catalog.assign(year=when.year).reset_index(drop=True)
+
+    def catalog_on(self, day) -> pd.DataFrame:
+        """Catalog at the end of a day (runs of that day included)."""
+        return self.as_of(pd.Timestamp(day).normalize() + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1))
+
+    def history(self, reference: str, country: str = None) -> pd.DataFrame:
+        """Every interval of one reference (in one country, or all of them)."""
+        intervals = self.load()
+        mask = intervals["reference"] == reference
+        if country:
+            mask &= intervals["country"] == country
+        return intervals[mask].reset_index(drop=True)
+
+    def compact(self, bronze_prefix: str = "data/bronze/", retention_days: float = None, now=None) -> dict:
+        """
+        Fold every bronze run not folded yet, oldest first, save, then prune the raw bronze
+        folders older than retention_days that are already folded (the latest folded run is
+        always kept).
+
+        Only complete snapshots are folded: runs the run catalog records as partial, failed or
+        empty are skipped (and never pruned), as products missing from them would have their
+        intervals closed and reopened. Folders the catalog does not know (runs older than the
+        catalog) are folded.
+
+        Returns:
+            dict: Runs folded, runs skipped, intervals opened/closed and folders pruned.
+        """
+        catalog, stage = RunCatalog.for_stage_dir(bronze_prefix)
+        # The last record of a run wins (a resumed run is recorded again when it finishes)
+        statuses = {entry.get("run_id"): entry.get("status") for entry in catalog.entries(stage)}
+        runs, skipped = [], []
+        for folder in glob.glob(os.path.join(bronze_prefix, "[0-9]*-*")):
+            run_time = run_timestamp_from_folder(folder)
+            if not os.path.isdir(folder) or run_time is None:
+                continue
+            if statuses.get(os.path.basename(os.path.normpath(folder)), SUCCESS) != SUCCESS:
+                skipped.append((run_time, folder))
+                continue
+            runs.append((run_time, folder))
+        runs.sort()
+
+        summary = {"folded": [], "skipped": [os.path.basename(os.path.normpath(folder)) for _, folder in sorted(skipped)],
+                   "opened": 0, "closed": 0, "pruned": []}
+        folded_runs = set(self.manifest["folded_runs"])
+        for run_time, folder in runs:
+            run = os.path.basename(os.path.normpath(folder))
+            if run in folded_runs or (self.last_folded is not None and pd.Timestamp(run_time) <= self.last_folded):
+                continue
+            names = sorted({os.path.splitext(f)[0] for f in glob.glob(os.path.join(folder, "all_watches_*"))})
+            if not names:
+                log_error(f"PriceHistory: no all_watches file in {folder}", exc_info=False)
+                continue
+            counts = self.fold(load_data(f"{names[-1]}.csv"), run_time, run=run)
+            summary["folded"].append(run)
+            summary["opened"] += counts["opened"]
+            summary["closed"] += counts["closed"]
+        if summary["folded"]:
+            self.save()
+
+        folded_runs = set(self.manifest["folded_runs"])
+        folded = [(run_time, folder) for run_time, folder in runs
+                  if os.path.basename(os.path.normpath(folder)) in folded_runs]
+        if retention_days is not None and folded:
+            cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+            for run_time, folder in folded[:-1]:
+                if run_time < cutoff:
+                    shutil.rmtree(folder)
+                    summary["pruned"].append(folder)
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold bronze snapshots into the compacted price history")
+    parser.add_argument("--bronze", default="data/bronze/")
+    parser.add_argument("--history", default="data/history/price_history.csv")
+    parser.add_argument("--retention-days", type=float, default=None,
+                        help="Delete folded bronze folders older than this many days")
+    args = parser.parse_args(argv)
+
+    setup_logging(f'logs/price_history_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log')
+    summary = PriceHistory(args.history).compact(args.bronze, retention_days=args.retention_days)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
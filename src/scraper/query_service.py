@@ -0,0 +1,264 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import glob
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+import pandas as pd
+from scraper.utils import get_latest_folder, load_data
+from scraper.schema import read_silver
+from log_handler import setup_logging, log_error
+
+
+def _records(df: pd.DataFrame) -> list:
+    """JSON-ready rows: plain Python values, None for missing ones."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _index(values) -> dict:
+    """{normalized value: [row positions]} for one column."""
+    index = {}
+    for position, value in enumerate(values):
+        index.setdefault(str(value).casefold(), []).append(position)
+    return index
+
+
+class CatalogIndex:
+    """
+    In-memory snapshot of the latest silver catalog and gold tables, with the silver rows
+    indexed by reference, collection and country (case-insensitive) for direct lookups.
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self.silver_folder = get_latest_folder(os.path.join(data_dir, "silver", ""))
+        self.gold_folder = get_latest_folder(os.path.join(data_dir, "gold", ""))
+        self.rows = []
+        self.by_reference, self.by_collection, self.by_country = {}, {}, {}
+        self.gold = {}
+        if self.silver_folder:
+            self._load_silver(self.silver_folder)
+        if self.gold_folder:
+            self._load_gold(self.gold_folder)
+
+    def _load_silver(self, folder: str) -> None:
+        files = sorted(glob.glob(os.path.join(folder, "PANERAI_DATA_*")))
+        if not files:
+            return
+        csv_files = [path for path in files if path.endswith(".csv")]
+        catalog = read_silver(csv_files[-1] if csv_files else files[-1])
+        self.rows = _records(catalog)
+        self.by_reference = _index(catalog["reference"])
+        self.by_collection = _index(catalog["collection"])
+        self.by_country = _index(catalog["country"])
+
+    def _load_gold(self, folder: str) -> None:
+        for path in sorted(glob.glob(os.path.join(folder, "*.csv"))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name != "gold_state":
+                self.gold[name] = _records(load_data(path))
+
+    def select(self, reference: str = None, collection: str = None, country: str = None) -> list:
+        """Rows matching every given criterion, intersecting the smallest index lists first."""
+        criteria = [(self.by_reference, reference), (self.by_collection, collection), (self.by_country, country)]
+        postings = [index.get(value.casefold(), []) for index, value in criteria if value]
+        if not postings:
+            return list(self.rows)
+        postings.sort(key=len)
+        positions = set(postings[0]).intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        return [self.rows[position] for position in sorted(positions)]
+
+
+class QueryService:
+    """
+    Read-only queries over the latest silver and gold data.
+
+    Results are kept in an LRU cache of `cache_size` entries. Before answering, the service
+    checks (at most every `check_interval` seconds) whether a new silver or gold run has
+    landed; if so the indexes are rebuilt and the cache is cleared.
+    """
+
+    def __init__(self, data_dir: str = "data", cache_size: int = 1024, check_interval: float = 1.0):
+        self.data_dir = data_dir
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._checked_at = 0.0
+        self.hits = self.misses = self.reloads = 0
+        self.index = None
+        self._reload()
+
+    def _latest_runs(self) -> tuple:
+        return (get_latest_folder(os.path.join(self.data_dir, "silver", "")),
+                get_latest_folder(os.path.join(self.data_dir, "gold", "")))
+
+    def _reload(self) -> None:
+        self.index = CatalogIndex(self.data_dir)
+        self._cache.clear()
+        self.reloads += 1
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the indexes if a new run landed; returns True when they were rebuilt."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = now
+            if force or self._latest_runs() != (self.index.silver_folder, self.index.gold_folder):
+                self._reload()
+                return True
+            return False
+
+    def _cached(self, key: tuple, compute):
+        self.refresh()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+        result = compute()
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def product(self, reference: str, country: str = None) -> list:
+        """Rows of one reference, in every market or in one country."""
+        return self._cached(("product", reference.casefold(), (country or "").casefold()),
+                            lambda: self.index.select(reference=reference, country=country))
+
+    def collection(self, collection: str, country: str = None) -> list:
+        return self._cached(("collection", collection.casefold(), (country or "").casefold()),
+                            lambda: self.index.select(collection=collection, country=country))
+
+    def cheapest(self, collection: str = None, country: str = None, n: int = 1, price_column: str = "price_USD") -> list:
+        """The n cheapest rows (by price_USD unless another price column is given)."""
+        def compute():
+            rows = [row for row in self.index.select(collection=collection, country=country)
+                    if row.get(price_column) is not None]
+            return sorted(rows, key=lambda row: row[price_column])[:n]
+        return self._cached(("cheapest", (collection or "").casefold(), (country or "").casefold(), n, price_column),
+                            compute)
+
+    def gold_table(self, name: str) -> list:
+        self.refresh()
+        if name not in self.index.gold:
+            raise KeyError(f"Unknown gold table: {name}")
+        return self.index.gold[name]
+
+    def status(self) -> dict:
+        return {"silver": self.index.silver_folder, "gold": self.index.gold_folder, "rows": len(self.index.rows),
+                "gold_tables": sorted(self.index.gold), "cache_entries": len(self._cache),
+                "hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /product/<reference>?country=, /collection/<name>?country=,
+    /cheapest?collection=&country=&n=, /gold/<table>, /gold and /health; JSON responses.
+    """
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if parts == ["health"]:
+                self._send_json(200, service.status())
+            elif len(parts) == 2 and parts[0] == "product":
+                self._send_json(200, service.product(parts[1], country=params.get("country")))
+            elif len(parts) == 2 and parts[0] == "collection":
+                self._send_json(200, service.collection(parts[1], country=params.get("country")))
+            elif parts == ["cheapest"]:
+                self._send_json(200, service.cheapest(collection=params.get("collection"),
+                                                      country=params.get("country"), n=int(params.get("n", 1))))
+            elif parts == ["gold"]:
+                self._send_json(200, sorted(service.index.gold))
+            elif len(parts) == 2 and parts[0] == "gold":
+                self._send_json(200, service.gold_table(parts[1]))
+            else:
+                self._send_json(404, {"error": "not found"})
+        except KeyError as e:
+            self._send_json(404, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(service: QueryService, host: str = "127.0.0.1", port: int = 8766) -> ThreadingHTTPServer:
+    """Build the HTTP server of a QueryService (call serve_forever on it)."""
+    server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the latest Panerai silver and gold data")
+    parser.add_argument("--data-dir", default="data")
+    commands = parser.add_subparsers(dest="command", required=True)
+    product = commands.add_parser("product", help="Rows of one reference")
+    product.add_argument("reference")
+    product.add_argument("--country")
+    collection = commands.add_parser("collection", help="Rows of one collection")
+    collection.add_argument("name")
+    collection.add_argument("--country")
+    cheapest = commands.add_parser("cheapest", help="Cheapest products (by USD price)")
+    cheapest.add_argument("--collection")
+    cheapest.add_argument("--country")
+    cheapest.add_argument("-n", type=int, default=1)
+    gold = commands.add_parser("gold", help="A gold table (or the list of tables)")
+    gold.add_argument("table", nargs="?")
+    server = commands.add_parser("serve", help="Serve the queries over HTTP")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args(argv)
+
+    setup_logging(f'logs/query_service_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log')
+    service = QueryService(args.data_dir)
+    if args.command == "serve":
+        http_server = serve(service, args.host, args.port)
+        print(f"Query service listening on http://{args.host}:{args.port}")
+        try:
+            http_server.serve_forever()
+        finally:
+            http_server.server_close()
+        return
+    if args.command == "product":
+        result = service.product(args.reference, country=args.country)
+    elif args.command == "collection":
+        result = service.collection(args.name, country=args.country)
+    elif args.command == "cheapest":
+        result = service.cheapest(collection=args.collection, country=args.country, n=args.n)
+    else:
+        try:
+            result = service.gold_table(args.table) if args.table else sorted(service.index.gold)
+        except KeyError as e:
+            log_error(str(e), exc_info=False)
+            parser.exit(1, f"{e}\n")
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
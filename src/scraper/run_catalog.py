@@ -0,0 +1,192 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import contextlib
+import glob
+import hashlib
+import json
+from scraper.fx_rates import run_timestamp_from_folder
+from log_handler import log_error
+
+CATALOG_DIR = "runs"
+MANIFEST_FILE = "manifest.jsonl"
+SUCCESS = "success"
+
+
+def _run_time(entry: dict):
+    """Timestamp of a manifest record's run ID, or None when the ID is not a run timestamp."""
+    return run_timestamp_from_folder(entry.get("run_id")) if entry else None
+
+
+def _checksum(path: str) -> str:
+    """sha256 of a file, or of the files of a directory (a Parquet dataset) in name order."""
+    digest = hashlib.sha256()
+    files = sorted(glob.glob(os.path.join(path, "**", "*"), recursive=True)) if os.path.isdir(path) else [path]
+    for file_path in files:
+        if os.path.isfile(file_path):
+            if os.path.isdir(path):
+                digest.update(os.path.relpath(file_path, path).replace("\\", "/").encode("utf-8"))
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class RunCatalog:
+    """
+    Catalog of the pipeline runs under a data root (data/runs/).
+
+    Every run of a stage (bronze, silver, gold) is appended to manifest.jsonl, one JSON
+    record per line, with its ID (the run folder name), stage, path, status, and the row
+    count and checksum of each file it wrote. The manifest is never rewritten; on top of it
+    latest_<stage>.json points at the most recent successful run of each stage, so finding
+    it is a single small read instead of a scan of the run folders.
+
+    Writers take a lock file around the append and the pointer update, and the pointer only
+    moves forward in run time (run IDs are '%Y-%m-%d_%H-%M-%S' timestamps), so concurrent or
+    late (backfilled) runs never make it point at an older run. Runs whose ID is not a
+    timestamp (ad hoc or temporary folders) are recorded but never become latest.
+    """
+
+    def __init__(self, root: str = "data", lock_timeout: float = 30.0):
+        self.root = root
+        self.directory = os.path.join(root, CATALOG_DIR)
+        self.manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        self.lock_path = os.path.join(self.directory, ".lock")
+        self.lock_timeout = lock_timeout
+
+    @classmethod
+    def for_stage_dir(cls, stage_dir: str):
+        """(catalog, stage) of a stage folder such as 'data/bronze/'."""
+        stage_dir = os.path.normpath(stage_dir)
+        return cls(os.path.dirname(stage_dir) or "."), os.path.basename(stage_dir)
+
+    def _pointer_path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"latest_{stage}.json")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive lock between writers (O_EXCL lock file; a lock older than lock_timeout is stale)."""
+        os.makedirs(self.directory, exist_ok=True)
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                descriptor = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > self.lock_timeout:
+                        os.remove(self.lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Run catalog is locked: {self.lock_path}")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(descriptor)
+            os.remove(self.lock_path)
+
+    def record(self, stage: str, path: str, rows: dict = None, status: str = SUCCESS, run_id: str = None) -> dict:
+        """
+        Append a run of `stage` written to the folder `path`.
+
+        Args:
+            rows (dict): {file name without extension: row count} of the tables the run wrote.
+            status (str): 'success', or e.g. 'failed' / 'empty'; only successful, timestamped runs
+                become latest.
+            run_id (str): Defaults to the folder name.
+
+        Returns:
+            dict: The manifest record.
+        """
+        rows = rows or {}
+        files = {}
+        for file_path in sorted(glob.glob(os.path.join(path, "*"))):
+            name = os.path.basename(file_path)
+            files[name] = {"rows": rows.get(os.path.splitext(name)[0]), "sha256": _checksum(file_path)}
+        entry = {
+            "run_id": run_id or os.path.basename(os.path.normpath(path)),
+            "stage": stage,
+            "path": path,
+            "status": status,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "files": files,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._locked():
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            run_time = _run_time(entry)
+            if status == SUCCESS and run_time is not None:
+                current = _run_time(self.latest(stage))
+                # A pointer left on an untimestamped run by an older version is replaced
+                if current is None or run_time >= current:
+                    self._write_pointer(stage, entry)
+        return entry
+
+    def _write_pointer(self, stage: str, entry: dict) -> None:
+        temporary = f"{self._pointer_path(stage)}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2, default=str)
+        os.replace(temporary, self._pointer_path(stage))
+
+    def entries(self, stage: str = None) -> list:
+        """Every manifest record (of one stage), in append order."""
+        if not os.path.exists(self.manifest_path):
+            return []
+        entries = []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    log_error(f"RunCatalog: skipping an unreadable manifest line in {self.manifest_path}", exc_info=False)
+                    continue
+                if stage is None or entry.get("stage") == stage:
+                    entries.append(entry)
+        return entries
+
+    def latest(self, stage: str):
+        """Latest successful run of a stage (its manifest record), or None."""
+        try:
+            with open(self._pointer_path(stage), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            return self.rebuild_pointer(stage)
+
+    def rebuild_pointer(self, stage: str):
+        """Recompute latest_<stage>.json from the manifest (e.g. after a manual edit)."""
+        successful = [entry for entry in self.entries(stage)
+                      if entry.get("status") == SUCCESS and _run_time(entry) is not None]
+        if not successful:
+            return None
+        entry = max(successful, key=_run_time)
+        self._write_pointer(stage, entry)
+        return entry
+
+    def latest_path(self, stage: str):
+        """Folder of the latest successful run of a stage, if it still exists."""
+        entry = self.latest(stage)
+        if entry and os.path.isdir(entry["path"]):
+            return entry["path"]
+        return None
+
+    def latest_file(self, stage: str, prefix: str):
+        """Path of the file of the latest successful run whose name starts with prefix (e.g. 'all_watches_')."""
+        entry = self.latest(stage)
+        if not entry or not os.path.isdir(entry["path"]):
+            return None
+        names = sorted(name for name in entry["files"] if name.startswith(prefix))
+        csv_names = [name for name in names if name.endswith(".csv")]
+        if not names:
+            return None
+        name = csv_names[-1] if csv_names else f"{names[-1]}.csv"
+        return os.path.join(entry["path"], name)
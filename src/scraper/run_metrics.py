@@ -0,0 +1,185 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import threading
+from contextlib import contextmanager
+
+PREFIX = "panerai_"
+# Prometheus textfile collector folder (node_exporter --collector.textfile.directory); optional
+TEXTFILE_DIR_ENV = "METRICS_TEXTFILE_DIR"
+
+METRIC_HELP = {
+    "stage_seconds": "Wall time of a pipeline stage",
+    "page_seconds": "Wall time of one collection page, by extraction backend",
+    "webdriver_wait_seconds": "Time spent waiting in WebDriverWait, by backend and what was awaited",
+    "pages_fetched_total": "Collection pages requested, by backend and outcome",
+    "cards_found_total": "Product cards found on the collection pages",
+    "products_parsed_total": "Products parsed from the collection pages",
+    "fx_calls_total": "get_exchange_rate calls",
+    "fx_requests_total": "Requests sent to the exchange rate API, by outcome",
+    "preprocess_stage_seconds": "Wall time of a preprocessing stage",
+    "rows_dropped_total": "Rows dropped while cleaning, by step",
+    "rows_saved_total": "Rows written by save_data, by format",
+    "save_seconds": "Wall time of save_data, by format",
+}
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and timers of a pipeline run.
+
+    Counters only go up (pages fetched, cards found, rows dropped...); timers accumulate the
+    count, sum and max of their observations (stage durations, WebDriverWait time...). Every
+    metric can carry labels. write() saves the run summary as JSON and in the Prometheus text
+    format, so a slow run can be broken down and runs compared over time.
+
+        metrics = get_default_metrics()
+        metrics.increment("pages_fetched_total", backend="http", status="ok")
+        with metrics.timer("stage_seconds", stage="extraction"):
+            ...
+    """
+
+    def __init__(self):
+        self._counters = {}  # name -> {label key: value}
+        self._timers = {}  # name -> {label key: [count, sum, max]}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        with self._lock:
+            observed = self._timers.setdefault(name, {}).setdefault(_key(labels), [0, 0.0, 0.0])
+            observed[0] += 1
+            observed[1] += seconds
+            observed[2] = max(observed[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the duration of the block, whether it raises or not."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def value(self, name: str, **labels) -> float:
+        """Counter value (or timer count) of one label set; 0 when never recorded."""
+        key = _key(labels)
+        with self._lock:
+            if name in self._timers:
+                return self._timers[name].get(key, [0])[0]
+            return self._counters.get(name, {}).get(key, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+            self.started_at = datetime.now()
+
+    def merge(self, summary: dict) -> None:
+        """Add a run summary written by another process (snapshot() / run_metrics.json) to this registry."""
+        with self._lock:
+            for name, series in summary.get("counters", {}).items():
+                counters = self._counters.setdefault(name, {})
+                for item in series:
+                    key = _key(item["labels"])
+                    counters[key] = counters.get(key, 0) + item["value"]
+            for name, series in summary.get("timers", {}).items():
+                timers = self._timers.setdefault(name, {})
+                for item in series:
+                    observed = timers.setdefault(_key(item["labels"]), [0, 0.0, 0.0])
+                    observed[0] += item["count"]
+                    observed[1] += item["seconds"]
+                    observed[2] = max(observed[2], item["max"])
+
+    def snapshot(self) -> dict:
+        """The run summary: every counter and timer series with its labels."""
+        with self._lock:
+            counters = {name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                        for name, series in sorted(self._counters.items())}
+            timers = {name: [{"labels": dict(key), "count": count, "seconds": round(total, 4), "max": round(peak, 4)}
+                             for key, (count, total, peak) in sorted(series.items())]
+                      for name, series in sorted(self._timers.items())}
+        return {"started_at": self.started_at.isoformat(timespec="seconds"),
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "counters": counters, "timers": timers}
+
+    def to_prometheus(self, **labels) -> str:
+        """
+        Prometheus text exposition format; timers are exported as summaries (_count, _sum).
+        Extra labels (e.g. layer="bronze") are added to every series.
+        """
+        lines = []
+        label = lambda key: _format_labels(_key({**dict(key), **labels}))
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {PREFIX}{name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                lines.extend(f"{PREFIX}{name}{label(key)} {value}" for key, value in sorted(series.items()))
+            for name, series in sorted(self._timers.items()):
+                lines.append(f"# HELP {PREFIX}{name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {PREFIX}{name} summary")
+                for key, (count, total, _) in sorted(series.items()):
+                    lines.append(f"{PREFIX}{name}_count{label(key)} {count}")
+                    lines.append(f"{PREFIX}{name}_sum{label(key)} {total:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir: str, name: str = "run_metrics", textfile_dir: str = None,
+              layer: str = None, export: bool = True) -> dict:
+        """
+        Save <name>.json and <name>.prom in output_dir, and the .prom file in the textfile
+        collector folder too (textfile_dir, else $METRICS_TEXTFILE_DIR) when there is one
+        and export is set. Files are renamed into place, so a collector never reads half a file.
+
+        layer names the pipeline layer of the run ('bronze', 'silver'...): it is added to every
+        series as a label and to the textfile name (<prefix><name>_<layer>.prom), so the runs
+        of the different layers do not overwrite each other in the collector.
+
+        Returns:
+            dict: The run summary written.
+        """
+        summary = self.snapshot()
+        text = self.to_prometheus(**({"layer": layer} if layer else {}))
+        _write_atomic(os.path.join(output_dir, f"{name}.json"), json.dumps(summary, indent=2))
+        _write_atomic(os.path.join(output_dir, f"{name}.prom"), text)
+        textfile_dir = textfile_dir or os.getenv(TEXTFILE_DIR_ENV)
+        if textfile_dir and export:
+            os.makedirs(textfile_dir, exist_ok=True)
+            textfile_name = f"{PREFIX}{name}_{layer}.prom" if layer else f"{PREFIX}{name}.prom"
+            _write_atomic(os.path.join(textfile_dir, textfile_name), text)
+        return summary
+
+
+def _write_atomic(path: str, content: str) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+_default_metrics = MetricsRegistry()
+
+
+def get_default_metrics() -> MetricsRegistry:
+    """The registry shared by the pipeline modules of this process."""
+    return _default_metrics
@@ -0,0 +1,87 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pandas as pd
+from scraper.parquet_store import read_partitioned
+from log_handler import log_error
+
+COUNTRIES = ["USA", "France", "UK", "Japan"]
+CURRENCY_CODES = ["USD", "EUR", "GBP", "JPY"]
+
+# Canonical silver columns, in output order. Low-cardinality text is categorical (image_url
+# is shared by the four country rows of a reference), prices are float64 and year int16.
+SILVER_SCHEMA = {
+    "brand": "category",
+    "collection": "category",
+    "reference": "string",
+    "name": "string",
+    "country": pd.CategoricalDtype(COUNTRIES),
+    "currency": "category",
+    "currency_code": pd.CategoricalDtype(CURRENCY_CODES),
+    "price": "float64",
+    "price_USD": "float64",
+    "price_EUR": "float64",
+    "price_GBP": "float64",
+    "price_JPY": "float64",
+    "availability": "category",
+    "year": "int16",
+    "product_url": "string",
+    "image_url": "category",
+}
+
+
+def silver_column_order(columns) -> list:
+    """Schema columns that are present, in canonical order, followed by any extra columns."""
+    columns = list(columns)
+    return [col for col in SILVER_SCHEMA if col in columns] + [col for col in columns if col not in SILVER_SCHEMA]
+
+
+def enforce_silver_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order the columns canonically and cast them to the silver dtypes.
+
+    Columns missing from the frame are skipped (older exports do not have every column);
+    a column that cannot be cast keeps its dtype and the failure is logged.
+    """
+    df = df[silver_column_order(df.columns)]
+    casts = {}
+    for col, dtype in SILVER_SCHEMA.items():
+        if col not in df.columns:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            unknown = set(df[col].dropna().unique()) - set(dtype.categories)
+            if unknown:
+                # Keep unexpected values (new markets) rather than turning them into NaN
+                dtype = pd.CategoricalDtype(list(dtype.categories) + sorted(map(str, unknown)))
+        casts[col] = dtype
+    try:
+        return df.astype(casts)
+    except (TypeError, ValueError):
+        pass
+    for col, dtype in casts.items():
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError) as e:
+            log_error(f"enforce_silver_schema: cannot cast {col} to {dtype} - {str(e)}", exc_info=False)
+    return df
+
+
+def read_silver(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Read a silver file with the schema dtypes applied at parse time.
+
+    Args:
+        path (str): Silver CSV file, or Parquet dataset folder (see scraper.parquet_store).
+        columns (list): Optional subset of columns to load.
+    """
+    if os.path.isdir(path):
+        return enforce_silver_schema(read_partitioned(path, columns=columns))
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in header if columns is None or col in columns]
+    dtypes = {col: dtype for col, dtype in SILVER_SCHEMA.items()
+              if col in usecols and not isinstance(dtype, pd.CategoricalDtype) and dtype != "int16"}
+    df = pd.read_csv(path, usecols=usecols, dtype=dtypes)
+    return enforce_silver_schema(df)
@@ -0,0 +1,188 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from scraper.utils import launch_extraction
+from scraper.webdriver_pool import WebDriverPool
+from log_handler import setup_logging, log_error
+
+
+class ScrapingService:
+    """
+    Long-running local scraping service that keeps a pool of warm browsers.
+
+    Jobs are posted to /extract as JSON ({"units": [{"country": ..., "collection": ...}]},
+    an empty list meaning every country x collection) and the results are streamed back
+    as newline-delimited JSON records:
+      - {"type": "product", "unit": "USA/RADIOMIR", "product": {...}}
+      - {"type": "unit", "unit": "USA/RADIOMIR", "products": 12}
+      - {"type": "done", "units": 16, "products": 180, "elapsed": 21.4}
+    GET /health returns the pool status. Browsers are recycled by age, use count and health.
+    """
+
+    def __init__(self, countries: dict, collections: list, base_url: str, host: str = "127.0.0.1",
+                 port: int = 8765, pool_size: int = 2, max_age: float = 3600, max_uses: int = 200,
+                 lean: bool = True, bulk_harvest: bool = True):
+        self.countries = countries
+        self.collections = collections
+        self.base_url = base_url
+        self.bulk_harvest = bulk_harvest
+        self.pool = WebDriverPool(size=pool_size, max_age=max_age, max_uses=max_uses,
+                                  **({"lean": True} if lean else {}))
+        self.jobs_served = 0
+        self._jobs_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), ScrapingRequestHandler)
+        self.server.daemon_threads = True
+        self.server.service = self
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def resolve_units(self, units: list) -> list:
+        """Validate requested units; an empty request means every country x collection."""
+        if not units:
+            return [(country, collection) for country in self.countries for collection in self.collections]
+        resolved = []
+        for unit in units:
+            country, collection = unit.get("country"), unit.get("collection")
+            if country not in self.countries or collection not in self.collections:
+                raise ValueError(f"Unknown extraction unit: {country}/{collection}")
+            resolved.append((country, collection))
+        return resolved
+
+    def _extract_unit(self, country: str, collection: str) -> list:
+        with self.pool.driver() as driver:
+            return launch_extraction(driver, country, self.countries[country], collection, self.base_url,
+                                     bulk=self.bulk_harvest)
+
+    def extract(self, units: list):
+        """Run a job and yield its records; units are reported in request order."""
+        started = time.perf_counter()
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = [executor.submit(self._extract_unit, country, collection) for country, collection in units]
+            for (country, collection), future in zip(units, futures):
+                key = f"{country}/{collection}"
+                try:
+                    products = future.result()
+                except Exception as e:
+                    log_error(f"ScrapingService: {key} failed: {str(e)}")
+                    products = []
+                for product in products:
+                    yield {"type": "product", "unit": key, "product": product}
+                total += len(products)
+                yield {"type": "unit", "unit": key, "products": len(products)}
+        with self._jobs_lock:
+            self.jobs_served += 1
+        yield {"type": "done", "units": len(units), "products": total,
+               "elapsed": round(time.perf_counter() - started, 3)}
+
+    def serve_forever(self, warm: bool = True) -> None:
+        if warm:
+            self.pool.warm()
+        print(f"Scraping service listening on {self.address}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.server.server_close()
+        self.pool.close()
+
+
+class ScrapingRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of the ScrapingService."""
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        service = self.server.service
+        self._send_json(200, {"status": "ok", "jobs_served": service.jobs_served, "pool": service.pool.status()})
+
+    def do_POST(self):
+        if self.path != "/extract":
+            self._send_json(404, {"error": "not found"})
+            return
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            job = json.loads(self.rfile.read(length) or b"{}")
+            units = service.resolve_units(job.get("units") or [])
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        # No Content-Length: records are flushed as they are produced and the stream ends on close
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for record in service.extract(units):
+            self.wfile.write(json.dumps(record, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def stream_extraction(service_url: str, units: list = None, timeout: float = 900):
+    """
+    Client side: post a job to a running ScrapingService and yield its records.
+
+    Args:
+        service_url (str): Base URL of the service, e.g. 'http://127.0.0.1:8765'.
+        units (list): Optional [{"country": ..., "collection": ...}]; all units when omitted.
+        timeout (float): Read timeout in seconds.
+    """
+    response = requests.post(f"{service_url.rstrip('/')}/extract", json={"units": units or []},
+                             stream=True, timeout=timeout)
+    response.raise_for_status()
+    try:
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+    finally:
+        response.close()
+
+
+def main(argv=None):
+    from scraper.data_extraction.data_extraction import DataExtraction
+
+    parser = argparse.ArgumentParser(description="Warm Chromium scraping service for Panerai collection pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--max-age", type=float, default=3600, help="Recycle browsers older than this (seconds)")
+    parser.add_argument("--max-uses", type=int, default=200, help="Recycle browsers after this many pages")
+    parser.add_argument("--no-lean", action="store_true", help="Load images, fonts and trackers")
+    args = parser.parse_args(argv)
+
+    setup_logging(f'logs/scraping_service_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log')
+    service = ScrapingService(DataExtraction.COUNTRIES, DataExtraction.COLLECTIONS, DataExtraction.BASE_URL,
+                              host=args.host, port=args.port, pool_size=args.pool_size,
+                              max_age=args.max_age, max_uses=args.max_uses, lean=not args.no_lean)
+    service.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import fnmatch
+import glob
+import re
+import pandas as pd
+from scraper.utils import get_latest_folder
+from log_handler import setup_logging, log_error
+
+try:
+    import duckdb
+except ImportError:  # optional dependency: only the SQL layer needs it
+    duckdb = None
+
+STAGES = ("bronze", "silver", "gold")
+# Files of every run folder exposed together as <stage>_<name>_history, with a 'run' column
+HISTORY_PATTERNS = {"bronze": "all_watches_*", "silver": "PANERAI_DATA_*"}
+# Short aliases of the latest run's main table
+ALIASES = {"bronze": "all_watches_*", "silver": "PANERAI_DATA_*"}
+
+
+def sql_available() -> bool:
+    return duckdb is not None
+
+
+def table_name(stage: str, name: str) -> str:
+    """View name of a file: 'gold', 'Margin_lost_to_the_gray_market_2025' -> 'gold_margin_lost_to_the_gray_market_2025'."""
+    return f"{stage}_{re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_')}"
+
+
+def _sources(folder: str) -> dict:
+    """
+    {file name: (kind, path)} of the tables directly in a folder. A Parquet dataset
+    (a directory of .parquet files) wins over the CSV of the same name, and a CSV over an XLSX.
+    """
+    sources = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        name, extension = os.path.splitext(os.path.basename(path))
+        if os.path.isdir(path) and glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True):
+            sources[os.path.basename(path)] = ("parquet", path)
+        elif extension == ".parquet":
+            sources.setdefault(name, ("parquet", path))
+        elif extension == ".csv":
+            if sources.get(name, ("xlsx",))[0] == "xlsx":
+                sources[name] = ("csv", path)
+        elif extension == ".xlsx":
+            sources.setdefault(name, ("xlsx", path))
+    return sources
+
+
+def discover_tables(data_dir: str = "data") -> dict:
+    """
+    Every table of the medallion directories, {view name: (kind, path)}:
+      - <stage>_<file>: the files at the root of data/<stage>/ (e.g. the 2021 exports),
+        overridden by the files of the latest run folder of the stage;
+      - bronze / silver: the latest run's all_watches / PANERAI_DATA table;
+      - <stage>_<file>_history: all_watches / PANERAI_DATA of every run folder (CSV glob).
+    """
+    tables = {}
+    for stage in STAGES:
+        stage_dir = os.path.join(data_dir, stage)
+        if not os.path.isdir(stage_dir):
+            continue
+        latest = get_latest_folder(os.path.join(stage_dir, ""))
+        for folder in [stage_dir] + ([latest] if latest else []):
+            for name, source in _sources(folder).items():
+                tables[table_name(stage, name)] = source
+                if folder == latest and stage in ALIASES and fnmatch.fnmatch(name, ALIASES[stage]):
+                    tables[stage] = source
+        if stage in HISTORY_PATTERNS:
+            pattern = os.path.join(stage_dir, "*-*", f"{HISTORY_PATTERNS[stage]}.csv")
+            if glob.glob(pattern):
+                tables[table_name(stage, HISTORY_PATTERNS[stage].rstrip("*_")) + "_history"] = ("history", pattern)
+    return tables
+
+
+def _quote(path: str) -> str:
+    return "'" + path.replace("\\", "/").replace("'", "''") + "'"
+
+
+def source_sql(kind: str, path: str) -> str:
+    """Table function reading one source lazily, so DuckDB pushes projections and filters into the scan."""
+    if kind == "parquet":
+        files = os.path.join(path, "**", "*.parquet") if os.path.isdir(path) else path
+        return f"read_parquet({_quote(files)}, hive_partitioning = true, union_by_name = true)"
+    if kind == "history":
+        return (f"(SELECT * EXCLUDE (filename), regexp_extract(replace(filename, '\\', '/'), '([^/]+)/[^/]+$', 1) AS run "
+                f"FROM read_csv_auto({_quote(path)}, header = true, union_by_name = true, filename = true))")
+    return f"read_csv_auto({_quote(path)}, header = true)"
+
+
+class SqlEngine:
+    """
+    In-process SQL over data/bronze, data/silver and data/gold (DuckDB).
+
+    Every CSV / Parquet table is registered as a view over its files (see discover_tables),
+    so a query only reads the columns and row groups it needs and scans run on all cores;
+    XLSX files (the 2021 export) are loaded through pandas once, when first registered.
+
+        with SqlEngine() as sql:
+            sql.query("SELECT country, median(price_USD) FROM silver GROUP BY country")
+    """
+
+    def __init__(self, data_dir: str = "data", threads: int = None, database: str = ":memory:"):
+        if not sql_available():
+            raise ImportError("The SQL engine needs duckdb (pip install duckdb)")
+        self.data_dir = data_dir
+        self.connection = duckdb.connect(database)
+        self.connection.execute(f"SET threads TO {int(threads or os.cpu_count() or 1)}")
+        self.sources = {}
+        self.refresh()
+
+    def refresh(self) -> list:
+        """(Re)register the views, picking up new runs. Returns the table names."""
+        self.sources = discover_tables(self.data_dir)
+        for name, (kind, path) in self.sources.items():
+            try:
+                if kind == "xlsx":
+                    self.connection.register(f"{name}_frame", pd.read_excel(path))
+                    self.connection.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM "{name}_frame"')
+                else:
+                    self.connection.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM {source_sql(kind, path)}')
+            except Exception as e:
+                log_error(f"SqlEngine: could not register {name} ({path}) - {str(e)}", exc_info=False)
+        return self.tables()
+
+    def tables(self) -> list:
+        rows = self.connection.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main' "
+            "AND table_type = 'VIEW' ORDER BY table_name").fetchall()
+        return [row[0] for row in rows]
+
+    def query(self, sql: str, params: list = None) -> pd.DataFrame:
+        return self.connection.execute(sql, params or []).df()
+
+    def explain(self, sql: str) -> str:
+        return "\n".join(row[1] for row in self.connection.execute(f"EXPLAIN {sql}").fetchall())
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run SQL over the bronze, silver and gold data")
+    parser.add_argument("sql", nargs="?", help="Query to run (omit to list the tables)")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", help="Write the result to this CSV instead of printing it")
+    args = parser.parse_args(argv)
+
+    setup_logging(f'logs/sql_engine_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log')
+    with SqlEngine(args.data_dir, threads=args.threads) as engine:
+        if not args.sql:
+            print("\n".join(engine.tables()))
+            return
+        result = engine.query(args.sql)
+        if args.output:
+            result.to_csv(args.output, index=False)
+        else:
+            with pd.option_context("display.max_rows", 200, "display.width", 200):
+                print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import json
+import pandas as pd
+from scraper.utils import create_output_directory, build_preprocess_pipeline, save_json, save_run_metrics
+from scraper.parquet_store import write_partitioned, default_output_formats
+from scraper.run_catalog import RunCatalog
+from scraper.run_metrics import get_default_metrics
+from scraper.data_extraction.data_extraction import DataExtraction
+from scraper.data_transformation.data_transformation import DataTransformation
+from log_handler import setup_logging, log_error
+
+
+def append_csv(df: pd.DataFrame, path: str) -> None:
+    """Append rows to a CSV, writing the header when the file is new; columns follow the existing header."""
+    if os.path.exists(path):
+        header = pd.read_csv(path, nrows=0).columns
+        df.reindex(columns=header).to_csv(path, mode="a", header=False, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+class StreamingPipeline:
+    """
+    Extraction straight to silver, without holding the catalog in memory or reading bronze back.
+
+    Pages come from DataExtraction.iter_products as they finish. Every page is appended to the
+    bronze CSVs of its country and to all_watches right away, and buffered until chunk_size
+    rows are waiting; each chunk then goes through the preprocessing pipeline (clean, currency,
+    conversion, schema) and is appended to the silver PANERAI_DATA file. Memory is bounded by
+    one chunk plus one page, and silver is complete as soon as the last page is in.
+
+    Rows of a (reference, country) already seen in an earlier chunk are dropped before
+    cleaning, so the output matches the batch run's deduplication.
+    """
+
+    def __init__(self, extractor: DataExtraction, currencies_code: dict = None, chunk_size: int = 500,
+                 fx_provider=None, output_formats: tuple = None):
+        if extractor.incremental or extractor.use_scheduler:
+            raise ValueError("Streaming does not support incremental or scheduled extraction")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.extractor = extractor
+        self.currencies_code = currencies_code or DataTransformation.CURRENCIES_CODE
+        self.chunk_size = chunk_size
+        self.fx_provider = fx_provider
+        self.output_formats = tuple(output_formats) if output_formats else default_output_formats()
+        self.seen = set()
+        self.stage_report = {}
+        self.summary = {}
+
+    def _write_bronze(self, bronze_dir: str, country: str, products: list, year: int) -> pd.DataFrame:
+        page = pd.DataFrame(products)
+        append_csv(page, os.path.join(bronze_dir, f"{country}_watches_{year}.csv"))
+        append_csv(page, os.path.join(bronze_dir, f"all_watches_{year}.csv"))
+        return page
+
+    def _process_chunk(self, chunk: pd.DataFrame, silver_dir: str, file_name: str, number: int) -> int:
+        """Clean and convert one chunk and append it to silver; returns the rows written."""
+        # Like clean_stage, only rows with a reference and a price take part in deduplication
+        candidates = (chunk["reference"].notna() & chunk["price"].notna()).to_numpy()
+        keys = list(zip(chunk["reference"], chunk["country"]))
+        fresh = [not (candidate and key in self.seen) for candidate, key in zip(candidates, keys)]
+        self.seen.update(key for candidate, key in zip(candidates, keys) if candidate)
+        chunk = chunk[fresh]
+
+        pipeline = build_preprocess_pipeline(self.currencies_code, fx_provider=self.fx_provider)
+        silver = pipeline.run(chunk)
+        for report in pipeline.summary():
+            total = self.stage_report.setdefault(report["stage"], {"stage": report["stage"], "status": "ok",
+                                                                   "rows_in": 0, "rows_out": 0, "seconds": 0.0})
+            total["rows_in"] += report["rows_in"]
+            total["rows_out"] += report["rows_out"]
+            total["seconds"] = round(total["seconds"] + report["seconds"], 4)
+            if report["status"] != "ok":
+                total["status"] = report["status"]
+        if not pipeline.ok or silver.empty:
+            if not pipeline.ok:
+                log_error(f"StreamingPipeline: chunk {number} could not be preprocessed", exc_info=False)
+            return 0
+
+        if "csv" in self.output_formats:
+            append_csv(silver, os.path.join(silver_dir, f"{file_name}.csv"))
+        if "parquet" in self.output_formats:
+            write_partitioned(silver, os.path.join(silver_dir, file_name), chunk=number)
+        return len(silver)
+
+    def run(self) -> dict:
+        """
+        Extract every page and write bronze and silver as it goes, then the run metrics
+        (run_metrics.json / run_metrics.prom) in both folders.
+
+        Returns:
+            dict: Bronze and silver folders, pages, chunks and rows written, elapsed seconds.
+                Empty on failure.
+        """
+        get_default_metrics().reset()
+        started = time.perf_counter()
+        year = datetime.now().year
+        file_name = f"PANERAI_DATA_{year}"
+        bronze_dir = silver_dir = None
+        try:
+            bronze_dir, silver_dir = create_output_directory("bronze"), create_output_directory("silver")
+            pages = chunks = bronze_rows = silver_rows = 0
+            country_rows = {}
+            buffer = []
+            for country, collection, products in self.extractor.iter_products():
+                pages += 1
+                if not products:
+                    continue
+                buffer.append(self._write_bronze(bronze_dir, country, products, year))
+                bronze_rows += len(products)
+                country_rows[f"{country}_watches_{year}"] = country_rows.get(f"{country}_watches_{year}", 0) + len(products)
+                if sum(len(page) for page in buffer) >= self.chunk_size:
+                    silver_rows += self._process_chunk(pd.concat(buffer, ignore_index=True), silver_dir, file_name, chunks)
+                    chunks += 1
+                    buffer = []
+            if buffer:
+                silver_rows += self._process_chunk(pd.concat(buffer, ignore_index=True), silver_dir, file_name, chunks)
+                chunks += 1
+
+            status = "success" if silver_rows else "empty"
+            RunCatalog().record("bronze", bronze_dir, rows={**country_rows, f"all_watches_{year}": bronze_rows},
+                                status="success" if bronze_rows else "empty")
+            save_json(list(self.stage_report.values()), "preprocess_report", silver_dir)
+            RunCatalog().record("silver", silver_dir, rows={file_name: silver_rows}, status=status)
+            self.summary = {"bronze": bronze_dir, "silver": silver_dir, "pages": pages, "chunks": chunks,
+                            "bronze_rows": bronze_rows, "silver_rows": silver_rows,
+                            "seconds": round(time.perf_counter() - started, 3)}
+            return self.summary
+        except Exception as e:
+            log_error(f"An error occurred during streaming extraction: {str(e)}")
+            for stage, folder in (("bronze", bronze_dir), ("silver", silver_dir)):
+                if folder:
+                    RunCatalog().record(stage, folder, status="failed")
+        finally:
+            get_default_metrics().observe("stage_seconds", time.perf_counter() - started, stage="streaming")
+            for layer, folder in (("bronze", bronze_dir), ("silver", silver_dir)):
+                if folder:
+                    save_run_metrics(folder, layer=layer)
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the catalog and write bronze and silver in one streaming pass")
+    parser.add_argument("--backend", choices=DataExtraction.BACKENDS, default="selenium")
+    parser.add_argument("--service-url", default=None)
+    parser.add_argument("--max-workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    setup_logging(f'logs/streaming_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log')
+    extractor = DataExtraction(backend=args.backend, service_url=args.service_url, max_workers=args.max_workers)
+    summary = StreamingPipeline(extractor, chunk_size=args.chunk_size).run()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import hashlib
+import io
+import json
+import platform
+import unittest
+from importlib import metadata
+
+DEFAULT_CACHE = os.path.join("data", "test_gate", "passed_suites.json")
+# Installed versions that can change a test outcome without any source change
+TRACKED_PACKAGES = ("pandas", "numpy", "pyarrow", "duckdb", "selenium", "requests")
+
+
+def tree_fingerprint(project_root: str, source_dirs=("src",), extra_files=("requirements.txt",)) -> str:
+    """
+    sha256 over every file of the source folders (tests and fixtures included, bytecode
+    caches excluded), the extra files, the Python version and the tracked package versions.
+    """
+    digest = hashlib.sha256()
+    for source_dir in source_dirs:
+        for folder, subfolders, files in os.walk(os.path.join(project_root, source_dir)):
+            # Run outputs written by the tests (logs/, data/) are not sources
+            subfolders[:] = sorted(name for name in subfolders if name not in ("__pycache__", "logs", "data"))
+            for name in sorted(files):
+                if name.endswith((".pyc", ".log")):
+                    continue
+                path = os.path.join(folder, name)
+                digest.update(os.path.relpath(path, project_root).replace("\\", "/").encode("utf-8"))
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    for name in extra_files:
+        path = os.path.join(project_root, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    digest.update(platform.python_version().encode("utf-8"))
+    for package in TRACKED_PACKAGES:
+        try:
+            digest.update(f"{package}=={metadata.version(package)}".encode("utf-8"))
+        except metadata.PackageNotFoundError:
+            digest.update(f"{package} missing".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SuiteGate:
+    """
+    Test gate that only runs the unittest suites whose inputs changed.
+
+    A suite (a test module name) passes the gate when the fingerprint of the source tree it
+    last passed against (see tree_fingerprint) is the current one; the other suites are
+    run together in the current process and recorded in the cache when they pass, so an
+    unchanged tree costs one hashing pass instead of one interpreter per suite.
+    """
+
+    def __init__(self, project_root: str, cache_path: str = None):
+        self.project_root = project_root
+        self.cache_path = cache_path or os.path.join(project_root, DEFAULT_CACHE)
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = tree_fingerprint(self.project_root)
+        return self._fingerprint
+
+    def _load(self) -> dict:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, cache: dict) -> None:
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        temporary = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temporary, self.cache_path)
+
+    def pending(self, modules: list) -> list:
+        """The suites that did not pass against the current tree yet."""
+        cache = self._load()
+        return [module for module in modules if cache.get(module, {}).get("fingerprint") != self.fingerprint]
+
+    def run(self, modules: list, force: bool = False) -> dict:
+        """
+        Run the pending suites (all of them with force) in this process.
+
+        Returns:
+            dict: Suites skipped, passed and failed, the failure output and the elapsed time.
+        """
+        started = time.perf_counter()
+        to_run = list(modules) if force else self.pending(modules)
+        summary = {"skipped": [module for module in modules if module not in to_run],
+                   "passed": [], "failed": [], "output": "", "fingerprint": self.fingerprint}
+        for module in to_run:
+            stream = io.StringIO()
+            try:
+                suite = unittest.defaultTestLoader.loadTestsFromName(module)
+                result = unittest.TextTestRunner(stream=stream, verbosity=1).run(suite)
+                passed = result.wasSuccessful() and result.testsRun > 0
+            except Exception as e:
+                stream.write(f"Could not load {module}: {e}\n")
+                passed = False
+            if passed:
+                summary["passed"].append(module)
+                cache = self._load()
+                cache[module] = {"fingerprint": self.fingerprint, "passed_at": datetime.now().isoformat(timespec="seconds")}
+                self._save(cache)
+            else:
+                summary["failed"].append(module)
+                summary["output"] += stream.getvalue()
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the test suites whose sources changed since they last passed")
+    parser.add_argument("modules", nargs="+", help="Test modules, e.g. src.scraper.tests.test_utils")
+    parser.add_argument("--root", default=os.getcwd(), help="Project root (default: current directory)")
+    parser.add_argument("--cache", default=None)
+    parser.add_argument("--force", action="store_true", help="Run every suite even if it passed already")
+    args = parser.parse_args(argv)
+
+    if args.root not in sys.path:
+        sys.path.insert(0, args.root)
+    summary = SuiteGate(args.root, args.cache).run(args.modules, force=args.force)
+    print(summary["output"], end="")
+    print(json.dumps({key: value for key, value in summary.items() if key != "output"}, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
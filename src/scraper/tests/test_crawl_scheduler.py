@@ -0,0 +1,158 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import asyncio
+import logging
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logging.disable(logging.ERROR)
+
+from scraper.crawl_scheduler import CrawlScheduler, TokenBucket, build_crawl_units
+from scraper.data_extraction.data_extraction import DataExtraction
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "collection_page.html")
+
+COUNTRIES = {"USA": "us/en", "Japan": "jp/ja"}
+COLLECTIONS = ["RADIOMIR", "LUMINOR-DUE"]
+BASE_URL = "https://www.panerai.com/{}/collections/watch-collection/{}.html"
+
+
+class TestCrawlScheduler(unittest.TestCase):
+    def test_build_crawl_units(self):
+        units = build_crawl_units(COUNTRIES, COLLECTIONS, BASE_URL)
+        self.assertEqual([unit.key for unit in units],
+                         ["USA/RADIOMIR", "USA/LUMINOR-DUE", "Japan/RADIOMIR", "Japan/LUMINOR-DUE"])
+        self.assertEqual(units[1].url, "https://www.panerai.com/us/en/collections/watch-collection/luminor-due.html")
+        self.assertEqual(units[0].host, "www.panerai.com")
+
+    def test_retries_are_accounted_per_unit(self):
+        units = build_crawl_units(COUNTRIES, COLLECTIONS, BASE_URL)
+        calls = {}
+
+        def fetch(unit):
+            calls[unit.key] = calls.get(unit.key, 0) + 1
+            if unit.key == "USA/LUMINOR-DUE" and calls[unit.key] < 3:
+                raise ConnectionError("503 Service Unavailable")
+            if unit.key == "Japan/RADIOMIR":
+                return []
+            return [{"reference": unit.key}]
+
+        scheduler = CrawlScheduler(fetch, concurrency=2, rate_per_host=1000, burst=10,
+                                   max_retries=2, backoff_base=0.001)
+        results = scheduler.run(units)
+
+        # Results come back in unit order whatever the completion order
+        self.assertEqual(results[0], [{"reference": "USA/RADIOMIR"}])
+        self.assertEqual(results[1], [{"reference": "USA/LUMINOR-DUE"}])
+        self.assertEqual(results[2], [])
+
+        summary = scheduler.summary()
+        self.assertEqual(summary["units"], 4)
+        self.assertEqual(summary["ok"], 3)
+        self.assertEqual([report["unit"] for report in summary["retried"]], ["USA/LUMINOR-DUE"])
+        self.assertEqual(summary["retried"][0]["attempts"], 3)
+        self.assertEqual([report["unit"] for report in summary["failed"]], ["Japan/RADIOMIR"])
+        self.assertEqual(summary["failed"][0]["attempts"], 3)
+        self.assertEqual(summary["failed"][0]["errors"][-1], "no products found")
+
+    def test_concurrency_cap(self):
+        units = build_crawl_units(COUNTRIES, COLLECTIONS, BASE_URL) * 2
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def fetch(unit):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            return [unit.key]
+
+        CrawlScheduler(fetch, concurrency=2, rate_per_host=1000, burst=10).run(units)
+        self.assertLessEqual(state["peak"], 2)
+
+    def test_token_bucket_rate(self):
+        async def take(n):
+            bucket = TokenBucket(rate=50, capacity=1)
+            start = time.monotonic()
+            for _ in range(n):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        # 1 token available immediately, the next 5 arrive at 50/s
+        self.assertGreaterEqual(asyncio.run(take(6)), 0.09)
+
+    def test_backoff_delay_is_bounded(self):
+        scheduler = CrawlScheduler(lambda unit: [], backoff_base=1.0, backoff_max=4.0)
+        for attempt in range(1, 8):
+            delay = scheduler.backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(4.0, 2 ** (attempt - 1)))
+
+
+class StubCollectionHandler(BaseHTTPRequestHandler):
+    """Serves the fixture collection page; the statuses queued for a path are answered first."""
+    failures = {}
+    hits = {}
+
+    def do_GET(self):
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        queued = self.failures.get(self.path)
+        if queued:
+            self.send_response(queued.pop(0))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with open(FIXTURE, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSchedulerAgainstStubServer(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubCollectionHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        StubCollectionHandler.hits = {}
+        StubCollectionHandler.failures = {"/us/en/collections/watch-collection/luminor-due.html": [429, 503]}
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_http_extraction_retries_throttled_pages(self):
+        extractor = DataExtraction(backend="http", max_workers=2, use_scheduler=True, output_formats=("csv",),
+                                   scheduler_options={"rate_per_host": 1000, "burst": 4, "backoff_base": 0.001})
+        extractor.COUNTRIES = COUNTRIES
+        extractor.COLLECTIONS = COLLECTIONS
+        extractor.BASE_URL = f"http://127.0.0.1:{self.server.server_port}/{{}}/collections/watch-collection/{{}}.html"
+        extractor.run()
+
+        report = extractor.crawl_report
+        self.assertEqual((report["units"], report["ok"], report["failed"]), (4, 4, []))
+        self.assertEqual([unit["unit"] for unit in report["retried"]], ["USA/LUMINOR-DUE"])
+        # Every request the server saw is an attempt of the scheduler: no hidden adapter retries
+        self.assertEqual(report["retried"][0]["attempts"], 3)
+        self.assertEqual(StubCollectionHandler.hits["/us/en/collections/watch-collection/luminor-due.html"], 3)
+        self.assertEqual(sum(StubCollectionHandler.hits.values()), 6)
+        self.assertEqual(len({product["country"] for product in extractor.all_products_data}), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import glob
+import json
+import logging
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.data_analysis.data_analysis import DataAnalysis
+from scraper.gold_metrics import compute_gold
+from scraper.schema import read_silver
+
+COUNTRIES = {"USA": "USD", "France": "EUR", "UK": "GBP", "Japan": "JPY"}
+
+
+def silver(year, prices_usd, exclusive):
+    """Two references sold in the 4 countries plus one exclusive reference sold in the USA only."""
+    rows = []
+    for reference, base_price in prices_usd.items():
+        for offset, (country, code) in enumerate(COUNTRIES.items()):
+            rows.append({"brand": "PANERAI", "collection": "Radiomir", "reference": reference,
+                         "country": country, "currency": code, "price": base_price + 100 * offset,
+                         "year": year, "price_USD": base_price + 100 * offset})
+    rows.append({"brand": "PANERAI", "collection": "Luminor", "reference": exclusive, "country": "USA",
+                 "currency": "USD", "price": 9000, "year": year, "price_USD": 9000})
+    return pd.DataFrame(rows)
+
+
+class TestGoldMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tables = compute_gold(silver(2021, {"PAM1": 1000, "PAM2": 2000}, "OLD1"),
+                                   silver(2025, {"PAM1": 1600, "PAM2": 2000}, "NEW1"))
+
+    def test_growth_and_cagr(self):
+        growth = self.tables["Watches_on_sale_from_2021_until_2025_with_comparative_metrics"]
+        usa = growth[(growth["reference"] == "PAM1") & (growth["country"] == "USA")].iloc[0]
+        self.assertEqual(usa["Price Difference"], 600)
+        self.assertAlmostEqual(usa["Growth Rate (%)"], 60.0)
+        self.assertAlmostEqual(usa["CAGR (%)"], (1.6 ** 0.25 - 1) * 100)
+        by_country = self.tables["Global_Growth_Rate_between_2021_2025_by_country"]
+        self.assertEqual(sorted(by_country["country"]), sorted(COUNTRIES))
+        highest = self.tables["Product_with_Highest_Growth_Rate_between_2021_2025_USA"]
+        self.assertEqual(highest["reference"].tolist(), ["PAM1"])
+
+    def test_difference_rate_and_gray_market(self):
+        comparative = self.tables["Products_available_4countries_with_comparative_metrics_2025"]
+        # The exclusive reference is not sold in the 4 countries
+        self.assertEqual(sorted(comparative["reference"].unique()), ["PAM1", "PAM2"])
+        pam2 = comparative[comparative["reference"] == "PAM2"].set_index("country")
+        self.assertEqual(pam2.loc["USA", "price_USD_median"], 2150)
+        self.assertAlmostEqual(pam2.loc["USA", "Difference Rate (%)"], -150 / 2150 * 100)
+        margin = self.tables["Margin_lost_to_the_gray_market_2025"].set_index(["country", "collection"])
+        # USA and France sell below the median: 150 + 50 per reference
+        self.assertEqual(margin.loc[("USA", "Radiomir"), "Price Difference"], 300)
+        self.assertEqual(self.tables["Product_with_Lowest_Difference_Rate_2025"]["country"].tolist(), ["USA"])
+
+    def test_exclusive_products(self):
+        self.assertEqual(self.tables["Watches_on_sale_only_in_2021"]["reference"].tolist(), ["OLD1"])
+        self.assertEqual(self.tables["Watches_on_sale_2025_Edition"]["reference"].tolist(), ["NEW1"])
+
+
+class TestDataAnalysis(unittest.TestCase):
+    def test_run_writes_gold_tables(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            cwd = os.getcwd()
+            os.chdir(tmpdirname)
+            self.addCleanup(os.chdir, cwd)
+            os.makedirs(os.path.join("data", "silver"))
+            silver(2021, {"PAM1": 1000, "PAM2": 2000}, "OLD1").to_csv(DataAnalysis.BASELINE_FILE, index=False)
+            current_file = os.path.join(tmpdirname, "PANERAI_DATA_2025.csv")
+            silver(2025, {"PAM1": 1600, "PAM2": 2000}, "NEW1").to_csv(current_file, index=False)
+
+            report = DataAnalysis(input_file=current_file).run()
+
+            self.assertEqual(report["Watches_on_sale_2025_Edition"], 1)
+            gold_dir = os.path.join("data", "gold", os.listdir(os.path.join("data", "gold"))[0])
+            self.assertTrue(os.path.exists(os.path.join(gold_dir, "Global_Growth_Rate_between_2021_2025_by_product.csv")))
+            self.assertTrue(os.path.exists(os.path.join(gold_dir, "gold_report.json")))
+
+    def test_incremental_run_matches_full_recomputation(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            cwd = os.getcwd()
+            os.chdir(tmpdirname)
+            self.addCleanup(os.chdir, cwd)
+            os.makedirs(os.path.join("data", "silver"))
+            base = silver(2021, {"PAM1": 1000, "PAM2": 2000, "PAM3": 3000}, "OLD1")
+            base = pd.concat([base, base[base["reference"] == "OLD1"].assign(reference="OLD0", country="Japan")])
+            base.iloc[::-1].to_csv(DataAnalysis.BASELINE_FILE, index=False)
+            current_file = "PANERAI_DATA_2025.csv"
+            current = silver(2025, {"PAM1": 1600, "PAM2": 2000, "PAM3": 3000}, "NEW1")
+            # Exclusive references in several countries, in an order unrelated to (reference, country)
+            current = pd.concat([current[current["reference"] == "NEW1"].assign(reference="NEW2", country="UK"),
+                                 current.iloc[::-1],
+                                 current[current["reference"] == "NEW1"].assign(reference="NEW0", country="France")],
+                                ignore_index=True)
+            current.to_csv(current_file, index=False)
+            DataAnalysis(input_file=current_file).run()
+
+            # One price changes in the USA, and one exclusive product changes price
+            current.loc[(current["reference"] == "PAM2") & (current["country"] == "USA"), ["price", "price_USD"]] = 2500
+            current.loc[current["reference"] == "NEW1", ["price", "price_USD"]] = 9500
+            current.to_csv(current_file, index=False)
+            with patch("scraper.data_analysis.data_analysis.compute_gold") as mock_compute_gold:
+                DataAnalysis(input_file=current_file).run()
+                mock_compute_gold.assert_not_called()
+            gold_dir = max(glob.glob(os.path.join("data", "gold", "*")), key=os.path.getmtime)
+            with open(os.path.join(gold_dir, "gold_report.json"), encoding="utf-8") as f:
+                report = json.load(f)
+            self.assertEqual(report["mode"], "incremental")
+            self.assertEqual(sorted(report["changed_references"]), ["NEW1", "PAM2"])
+
+            # Same rows in the same order as a full recomputation
+            full_tables = compute_gold(read_silver(DataAnalysis.BASELINE_FILE), read_silver(current_file))
+            for name, table in full_tables.items():
+                written = pd.read_csv(os.path.join(gold_dir, f"{name}.csv"))
+                pd.testing.assert_frame_equal(written, table.astype(written.dtypes.to_dict()), check_dtype=False,
+                                              obj=name)
+            self.assertEqual(full_tables["Watches_on_sale_2025_Edition"]["reference"].tolist(), ["NEW0", "NEW1", "NEW2"])
+
+    def test_run_without_silver_data(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            cwd = os.getcwd()
+            os.chdir(tmpdirname)
+            self.addCleanup(os.chdir, cwd)
+            self.assertEqual(DataAnalysis().run(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,14 +4,26 @@ from datetime import datetime
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+import json
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
 from datetime import datetime
 
 from scraper.data_extraction.data_extraction import DataExtraction
+from scraper.run_catalog import RunCatalog
+from scraper.parquet_store import read_partitioned
 
 class TestDataExtraction(unittest.TestCase):
+    def setUp(self):
+        # Runs write to the run catalog and logs under the working directory
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
     @patch("scraper.data_extraction.data_extraction.close_webdriver")
     @patch("scraper.data_extraction.data_extraction.save_data")
     @patch("scraper.data_extraction.data_extraction.launch_extraction")
@@ -83,5 +95,327 @@ class TestDataExtraction(unittest.TestCase):
         # Verify that the WebDriver is closed even after an exception.
         mock_close_webdriver.assert_called_once_with(dummy_driver)
 
+    @patch("scraper.data_extraction.data_extraction.close_http_session")
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.launch_http_extraction")
+    @patch("scraper.data_extraction.data_extraction.launch_extraction")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory")
+    @patch("scraper.data_extraction.data_extraction.start_webdriver")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_run_extraction_http_backend(self, mock_start_http_session, mock_start_webdriver, mock_create_output_directory,
+                                         mock_launch_extraction, mock_launch_http_extraction, mock_save_data, mock_close_http_session):
+        dummy_session = MagicMock()
+        mock_start_http_session.return_value = dummy_session
+        mock_create_output_directory.return_value = "dummy_bronze_dir"
+        mock_launch_http_extraction.return_value = [{"name": "Fake Watch", "country": "USA", "year": datetime.now().year}]
+
+        extractor = DataExtraction(backend="http")
+        extractor.run()
+
+        # The browser is never started on the HTTP backend.
+        mock_start_webdriver.assert_not_called()
+        mock_launch_extraction.assert_not_called()
+        expected_calls = len(DataExtraction.COUNTRIES) * len(DataExtraction.COLLECTIONS)
+        self.assertEqual(mock_launch_http_extraction.call_count, expected_calls)
+        self.assertEqual(mock_save_data.call_count, len(DataExtraction.COUNTRIES) + 1)
+        mock_close_http_session.assert_called_once_with(dummy_session)
+
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.launch_extraction")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory")
+    @patch("scraper.data_extraction.data_extraction.start_webdriver")
+    @patch("scraper.data_extraction.data_extraction.WebDriverPool")
+    def test_run_extraction_parallel_is_deterministic(self, mock_pool_class, mock_start_webdriver,
+                                                      mock_create_output_directory, mock_launch_extraction, mock_save_data):
+        mock_create_output_directory.return_value = "dummy_bronze_dir"
+
+        def fake_launch(driver, country, country_url, collection, base_url, **kwargs):
+            # Finish pages out of order
+            time.sleep(0.001 * (len(collection) % 3))
+            return [{"country": country, "collection": collection}]
+        mock_launch_extraction.side_effect = fake_launch
+
+        extractor = DataExtraction(max_workers=4)
+        extractor.run()
+
+        mock_start_webdriver.assert_not_called()
+        mock_pool_class.assert_called_once_with(size=4)
+        mock_pool_class.return_value.close.assert_called_once()
+        expected = [{"country": country, "collection": collection}
+                    for country in DataExtraction.COUNTRIES for collection in DataExtraction.COLLECTIONS]
+        self.assertEqual(extractor.all_products_data, expected)
+        self.assertEqual(mock_save_data.call_count, len(DataExtraction.COUNTRIES) + 1)
+
+    @patch("scraper.data_extraction.data_extraction.save_json")
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.fetch_collection_products")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_run_extraction_with_scheduler(self, mock_start_http_session, mock_create_output_directory,
+                                           mock_fetch, mock_save_data, mock_save_json):
+        mock_create_output_directory.return_value = "dummy_bronze_dir"
+        attempts = {}
+
+        def flaky_fetch(session, country, country_url, collection, base_url):
+            attempts[(country, collection)] = attempts.get((country, collection), 0) + 1
+            if (country, collection) == ("UK", "LUMINOR") and attempts[(country, collection)] == 1:
+                raise ConnectionError("429 Too Many Requests")
+            return [{"country": country, "collection": collection}]
+        mock_fetch.side_effect = flaky_fetch
+
+        extractor = DataExtraction(backend="http", max_workers=4, use_scheduler=True,
+                                   scheduler_options={"rate_per_host": 1000, "burst": 16, "backoff_base": 0.001})
+        extractor.run()
+
+        # Retries are left to the scheduler, not to the HTTP adapter
+        self.assertEqual(mock_start_http_session.call_args.kwargs["retries"], 0)
+        self.assertEqual(len(extractor.all_products_data), 16)
+        self.assertEqual(extractor.crawl_report["ok"], 16)
+        self.assertEqual([report["unit"] for report in extractor.crawl_report["retried"]], ["UK/LUMINOR"])
+        mock_save_json.assert_called_once_with(extractor.crawl_report, "crawl_report", "dummy_bronze_dir")
+
+    @patch("scraper.data_extraction.data_extraction.save_json")
+    @patch("scraper.data_extraction.data_extraction.close_webdriver")
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.launch_extraction")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory")
+    @patch("scraper.data_extraction.data_extraction.start_webdriver")
+    def test_run_extraction_lean(self, mock_start_webdriver, mock_create_output_directory, mock_launch_extraction,
+                                 mock_save_data, mock_close_webdriver, mock_save_json):
+        mock_create_output_directory.return_value = "dummy_bronze_dir"
+
+        def fake_launch(driver, country, country_url, collection, base_url, bulk=False, page_metrics=None):
+            page_metrics.append({"country": country, "collection": collection, "ready_ms": 500.0, "transfer_bytes": 2048})
+            return [{"country": country}]
+        mock_launch_extraction.side_effect = fake_launch
+
+        extractor = DataExtraction(lean=True, blocked_urls=["*.png"])
+        extractor.run()
+
+        mock_start_webdriver.assert_called_once_with(lean=True, blocked_urls=["*.png"])
+        self.assertEqual(len(extractor.page_metrics), 16)
+        mock_save_json.assert_called_once_with(extractor.page_metrics, "page_metrics", "dummy_bronze_dir")
+
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.stream_extraction")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory")
+    @patch("scraper.data_extraction.data_extraction.start_webdriver")
+    def test_run_extraction_service_backend(self, mock_start_webdriver, mock_create_output_directory,
+                                            mock_stream_extraction, mock_save_data):
+        mock_create_output_directory.return_value = "dummy_bronze_dir"
+        mock_stream_extraction.return_value = iter([
+            {"type": "product", "unit": "USA/RADIOMIR", "product": {"name": "Watch1", "country": "USA"}},
+            {"type": "unit", "unit": "USA/RADIOMIR", "products": 1},
+            {"type": "product", "unit": "Japan/LUMINOR", "product": {"name": "Watch2", "country": "Japan"}},
+            {"type": "unit", "unit": "Japan/LUMINOR", "products": 1},
+            {"type": "done", "units": 16, "products": 2},
+        ])
+
+        extractor = DataExtraction(backend="service", service_url="http://127.0.0.1:8765")
+        extractor.run()
+
+        mock_start_webdriver.assert_not_called()
+        units = mock_stream_extraction.call_args.args[1]
+        self.assertEqual(len(units), 16)
+        self.assertEqual([p["name"] for p in extractor.all_products_data], ["Watch1", "Watch2"])
+        # USA and Japan files plus the aggregated file
+        self.assertEqual(mock_save_data.call_count, 3)
+
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.fetch_collection_cards")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory")
+    @patch("scraper.data_extraction.data_extraction.get_latest_folder")
+    @patch("scraper.data_extraction.data_extraction.PageFingerprints")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_run_extraction_incremental(self, mock_start_http_session, mock_fingerprints_class, mock_get_latest_folder,
+                                        mock_create_output_directory, mock_fetch_cards, mock_save_data):
+        mock_get_latest_folder.return_value = "previous_bronze_dir"
+        mock_create_output_directory.return_value = "dummy_bronze_dir"
+        fingerprints = mock_fingerprints_class.return_value
+        fingerprints.validators.return_value = {"etag": None, "last_modified": None}
+        fingerprints.carried = []
+        # Only USA/RADIOMIR is unchanged since the previous snapshot
+        fingerprints.is_unchanged.side_effect = lambda key, page: key == "USA/RADIOMIR"
+        fingerprints.carry_forward.return_value = [{"reference": "PAM01570", "country": "USA", "year": datetime.now().year}]
+        cards = [{"tracking": '{"reference": "PAM01329"}', "href": "/pam01329.html", "image": None}] * 2
+        mock_fetch_cards.side_effect = lambda session, url, **validators: {
+            "cards": cards, "etag": None, "last_modified": None, "not_modified": False, "url": url}
+
+        extractor = DataExtraction(backend="http", incremental=True)
+        extractor.run()
+
+        mock_fingerprints_class.assert_called_once_with("previous_bronze_dir")
+        fingerprints.carry_forward.assert_called_once_with("USA/RADIOMIR", "USA")
+        self.assertEqual(fingerprints.record.call_count, 15)
+        fingerprints.save.assert_called_once_with("dummy_bronze_dir")
+        self.assertEqual(len(extractor.all_products_data), 16)
+        self.assertEqual(extractor.all_products_data[0]["reference"], "PAM01570")
+
+    @patch("scraper.data_extraction.data_extraction.close_http_session")
+    @patch("scraper.data_extraction.data_extraction.fetch_collection_products")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_extract_and_merge_partitions(self, mock_start_http_session, mock_fetch, mock_close_http_session):
+        def fake_fetch(session, country, country_url, collection, base_url):
+            return [{"reference": f"{country}-{collection}", "country": country, "year": datetime.now().year}]
+        mock_fetch.side_effect = fake_fetch
+
+        run_dir = os.path.join("data", "bronze", "2025-03-07_01-52-40")
+        os.makedirs(run_dir)
+        extractor = DataExtraction(backend="http", output_formats=("csv",))
+        # Partitions finish in any order; the merge follows COUNTRIES x COLLECTIONS
+        paths = [extractor.extract_partition(country, collection, run_dir)
+                 for country, collection in reversed(extractor.partition_units())]
+        self.assertEqual(paths[0], os.path.join(run_dir, "partitions", "Japan_LUMINOR-DUE.csv"))
+        self.assertEqual(mock_close_http_session.call_count, len(paths))
+
+        merged = DataExtraction(backend="http", output_formats=("csv",)).merge_partitions(paths, run_dir)
+        all_watches = pd.read_csv(merged)
+        self.assertEqual(len(all_watches), len(paths))
+        self.assertEqual(all_watches["reference"].iloc[0], "USA-RADIOMIR")
+        self.assertTrue(os.path.exists(os.path.join(run_dir, f"USA_watches_{datetime.now().year}.csv")))
+        self.assertEqual(RunCatalog().latest_path("bronze"), run_dir)
+        # Every partition task saved its metrics; the merge adds them up for the run
+        with open(os.path.join(run_dir, "run_metrics.json")) as f:
+            timers = json.load(f)["timers"]["stage_seconds"]
+        self.assertEqual([(t["labels"], t["count"]) for t in timers], [({"stage": "extraction"}, len(paths))])
+
+    @patch("scraper.data_extraction.data_extraction.close_http_session")
+    @patch("scraper.data_extraction.data_extraction.fetch_collection_products")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_merge_with_missing_partitions_is_partial(self, mock_start_http_session, mock_fetch, mock_close_http_session):
+        mock_fetch.side_effect = lambda session, country, country_url, collection, base_url: [
+            {"reference": f"{country}-{collection}", "country": country, "year": datetime.now().year}]
+        run_dir = os.path.join("data", "bronze", "2025-03-07_01-52-40")
+        os.makedirs(run_dir)
+        extractor = DataExtraction(backend="http", output_formats=("csv",))
+        paths = [extractor.extract_partition(country, collection, run_dir)
+                 for country, collection in extractor.partition_units()[1:]]
+
+        with self.assertRaises(ValueError):
+            DataExtraction(backend="http", output_formats=("csv",)).merge_partitions(paths, run_dir)
+        self.assertEqual(RunCatalog().entries("bronze")[-1]["status"], "partial")
+        self.assertIsNone(RunCatalog().latest("bronze"))
+
+        merged = DataExtraction(backend="http", output_formats=("csv",)).merge_partitions(paths, run_dir,
+                                                                                         allow_partial=True)
+        self.assertEqual(len(pd.read_csv(merged)), len(paths))
+        self.assertIsNone(RunCatalog().latest("bronze"))
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.data_extraction.data_extraction.launch_extraction")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_extract_partition_browser_has_its_own_port_and_profile(self, mock_start_webdriver,
+                                                                    mock_launch_extraction, mock_close_webdriver):
+        mock_launch_extraction.return_value = [{"reference": "PAM01570", "country": "USA"}]
+        with tempfile.TemporaryDirectory() as run_dir:
+            for collection in ("RADIOMIR", "LUMINOR"):
+                DataExtraction(lean=True).extract_partition("USA", collection, run_dir)
+        ports = [call.kwargs["debugging_port"] for call in mock_start_webdriver.call_args_list]
+        self.assertEqual(len(ports), 2)
+        self.assertNotIn(9222, ports)
+        self.assertTrue(all(call.kwargs["profile_dir"] for call in mock_start_webdriver.call_args_list))
+        self.assertTrue(mock_start_webdriver.call_args.kwargs["lean"])
+        self.assertEqual(mock_close_webdriver.call_count, 2)
+
+    @patch("scraper.data_extraction.data_extraction.close_http_session")
+    @patch("scraper.data_extraction.data_extraction.fetch_collection_products")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_extract_partition_errors_propagate(self, mock_start_http_session, mock_fetch, mock_close_http_session):
+        extractor = DataExtraction(backend="http")
+        with tempfile.TemporaryDirectory() as run_dir:
+            mock_fetch.side_effect = ConnectionError("reset")
+            with self.assertRaises(ConnectionError):
+                extractor.extract_partition("USA", "RADIOMIR", run_dir)
+            mock_fetch.side_effect = None
+            mock_fetch.return_value = []
+            with self.assertRaises(ValueError):
+                extractor.extract_partition("USA", "RADIOMIR", run_dir)
+            self.assertFalse(os.path.exists(os.path.join(run_dir, "partitions", "USA_RADIOMIR.csv")))
+        self.assertEqual(mock_close_http_session.call_count, 2)
+        with self.assertRaises(ValueError):
+            extractor.extract_partition("Italy", "RADIOMIR", "unused")
+
+    @patch("scraper.data_extraction.data_extraction.close_http_session")
+    @patch("scraper.data_extraction.data_extraction.launch_http_extraction")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_resume_reuses_checkpoints(self, mock_start_http_session, mock_launch_http_extraction, mock_close_http_session):
+        def fake_extraction(session, country, country_url, collection, base_url):
+            # Japan is down during the first run
+            if country == "Japan" and mock_launch_http_extraction.call_count <= 16:
+                return []
+            return [{"reference": f"{country}-{collection}", "country": country, "year": datetime.now().year}]
+        mock_launch_http_extraction.side_effect = fake_extraction
+
+        DataExtraction(backend="http", output_formats=("csv",)).run()
+        # The unfinished run is recorded as partial and does not become the latest bronze run
+        self.assertEqual(RunCatalog().entries("bronze")[-1]["status"], "partial")
+        self.assertIsNone(RunCatalog().latest("bronze"))
+        bronze_dir = RunCatalog().entries("bronze")[-1]["path"]
+        self.assertEqual(len(os.listdir(os.path.join(bronze_dir, "partitions"))), 12)
+
+        extractor = DataExtraction(backend="http", output_formats=("csv",), resume=True)
+        extractor.run()
+        # Only the four Japan pages are fetched again, into the same run
+        self.assertEqual(mock_launch_http_extraction.call_count, 20)
+        self.assertEqual(len(extractor.resumed_units), 12)
+        self.assertEqual(RunCatalog().latest_path("bronze"), bronze_dir)
+        all_watches = pd.read_csv(os.path.join(bronze_dir, f"all_watches_{datetime.now().year}.csv"))
+        self.assertEqual(len(all_watches), 16)
+        self.assertEqual(all_watches["reference"].iloc[-1], "Japan-LUMINOR-DUE")
+        self.assertEqual(len(os.listdir(os.path.join(bronze_dir, "partitions"))), 16)
+
+        # A finished run is not resumed
+        self.assertIsNone(DataExtraction(backend="http", resume=True)._find_resume_folder())
+
+    @patch("scraper.data_extraction.data_extraction.close_http_session")
+    @patch("scraper.data_extraction.data_extraction.launch_http_extraction")
+    @patch("scraper.data_extraction.data_extraction.start_http_session")
+    def test_resume_writes_parquet(self, mock_start_http_session, mock_launch_http_extraction, mock_close_http_session):
+        def fake_extraction(session, country, country_url, collection, base_url):
+            if collection == "LUMINOR" and mock_launch_http_extraction.call_count <= 16:
+                return []
+            return [{"reference": f"{country}-{collection}", "price": "$6,000", "country": country,
+                     "year": datetime.now().year}]
+        mock_launch_http_extraction.side_effect = fake_extraction
+
+        DataExtraction(backend="http", output_formats=("csv", "parquet")).run()
+        extractor = DataExtraction(backend="http", output_formats=("csv", "parquet"), resume=True)
+        extractor.run()
+        # Checkpointed and fresh pages share the column types, so the Parquet dataset is rewritten too
+        bronze_dir = RunCatalog().latest_path("bronze")
+        self.assertEqual(len(extractor.resumed_units), 12)
+        all_watches = pd.read_csv(os.path.join(bronze_dir, f"all_watches_{datetime.now().year}.csv"))
+        dataset = read_partitioned(os.path.join(bronze_dir, f"all_watches_{datetime.now().year}"))
+        self.assertEqual(len(all_watches), 16)
+        self.assertEqual(sorted(dataset["reference"]), sorted(all_watches["reference"]))
+
+    @patch("scraper.data_extraction.data_extraction.close_webdriver")
+    @patch("scraper.data_extraction.data_extraction.save_data")
+    @patch("scraper.data_extraction.data_extraction.launch_network_extraction")
+    @patch("scraper.data_extraction.data_extraction.launch_extraction")
+    @patch("scraper.data_extraction.data_extraction.create_output_directory", return_value="dummy_bronze_dir")
+    @patch("scraper.data_extraction.data_extraction.start_webdriver")
+    def test_run_extraction_network_backend(self, mock_start_webdriver, mock_create_output_directory,
+                                            mock_launch_extraction, mock_launch_network_extraction,
+                                            mock_save_data, mock_close_webdriver):
+        mock_launch_network_extraction.return_value = [{"name": "Watch", "reference": "PAM01570", "country": "USA",
+                                                        "year": datetime.now().year}]
+        extractor = DataExtraction(backend="network", output_formats=("csv",))
+        extractor.run()
+        mock_start_webdriver.assert_called_once_with(capture_network=True)
+        self.assertEqual(mock_launch_network_extraction.call_count, 16)
+        mock_launch_extraction.assert_not_called()
+        self.assertEqual(len(extractor.all_products_data), 16)
+        with self.assertRaises(ValueError):
+            DataExtraction(backend="network", incremental=True)
+
+    def test_service_backend_needs_url(self):
+        with self.assertRaises(ValueError):
+            DataExtraction(backend="service")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            DataExtraction(backend="curl")
+
 if __name__ == "__main__":
     unittest.main()
@@ -10,8 +10,17 @@ import unittest
 from unittest.mock import patch
 import pandas as pd
 from scraper.data_transformation.data_transformation import DataTransformation
+from scraper.fx_rates import FxRateTable
+from scraper.run_catalog import RunCatalog
 
 class TestDataTransformation(unittest.TestCase):
+    def setUp(self):
+        # Runs write to the run catalog under the working directory
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
 
     @patch("scraper.data_transformation.data_transformation.get_latest_folder")
     @patch("scraper.data_transformation.data_transformation.save_data")
@@ -42,7 +51,7 @@ class TestDataTransformation(unittest.TestCase):
             processed_df = df_sample.copy()
             processed_df["currency_code"] = "USD"
             processed_df["price"] = processed_df["price"].astype(str).str.replace(r'[^\d.,]', '', regex=True)
-            processed_df['price'] = processed_df['price'].str.replace(r'[￥$£€, \u00A0]', '', regex=True).astype(int)
+            processed_df['price'] = processed_df['price'].str.replace('[￥$£€, \u00A0]', '', regex=True).astype(int)
             
             mock_launch_preprocess.return_value = processed_df
 
@@ -95,7 +104,7 @@ class TestDataTransformation(unittest.TestCase):
 
             processed_df = df_sample.copy()
             processed_df["currency_code"] = "USD"
-            processed_df['price'] = processed_df['price'].str.replace(r'[￥$£€, \u00A0]', '', regex=True).astype(int)
+            processed_df['price'] = processed_df['price'].str.replace('[￥$£€, \u00A0]', '', regex=True).astype(int)
             
             mock_launch_preprocess.return_value = processed_df
 
@@ -116,5 +125,68 @@ class TestDataTransformation(unittest.TestCase):
             # Verify that save_data was called for each destination.
             self.assertEqual(mock_save_data.call_count, len(destinations), "save_data should be called for each destination")
 
+    def test_input_file_from_run_catalog(self):
+        for run in ("2025-12-31_23-00-00", "2026-01-01_01-00-00"):
+            os.makedirs(os.path.join("data", "bronze", run))
+            pd.DataFrame({"reference": ["PAM01329"]}).to_csv(
+                os.path.join("data", "bronze", run, f"all_watches_{run[:4]}.csv"), index=False)
+        transformer = DataTransformation()
+        # Without a catalog: the latest run folder, whatever the current year
+        self.assertEqual(transformer.get_input_file_path("data/bronze/"),
+                         os.path.join("data", "bronze", "2026-01-01_01-00-00", "all_watches_2026.csv"))
+        RunCatalog().record("bronze", os.path.join("data", "bronze", "2025-12-31_23-00-00"))
+        self.assertEqual(transformer.get_input_file_path("data/bronze/"),
+                         os.path.join("data", "bronze", "2025-12-31_23-00-00", "all_watches_2025.csv"))
+
+    def test_backfill_uses_rates_as_of_each_run(self):
+        fx_path = os.path.join("data", "fx", "fx_rates.csv")
+        table = FxRateTable(fx_path)
+        table.record("2024-01-01", "USD", {"USD": 1.0, "EUR": 0.9, "GBP": 0.8, "JPY": 140.0})
+        table.record("2025-03-01", "USD", {"USD": 1.0, "EUR": 0.95, "GBP": 0.8, "JPY": 150.0})
+
+        sample = {
+            "brand": ["PANERAI", "PANERAI"], "product_url": ["u1", "u2"], "image_url": ["i1", "i2"],
+            "collection": ["Radiomir", "Radiomir"], "reference": ["PAM01570", "PAM01570"],
+            "price": [6000, 5700], "currency": ["$", "€"], "country": ["USA", "France"], "year": [2024, 2024],
+        }
+        for run in ("2024-06-01_08-00-00", "2025-03-07_01-52-40"):
+            os.makedirs(os.path.join("data", "bronze", run))
+            pd.DataFrame(sample).to_csv(os.path.join("data", "bronze", run, "all_watches_2024.csv"), index=False)
+
+        transformer = DataTransformation(destinations=["silver"], fx_table_path=fx_path)
+        with patch("scraper.utils.get_exchange_rate") as mock_get_exchange_rate:
+            written = transformer.backfill()
+            # Fully offline: no live rate lookups
+            mock_get_exchange_rate.assert_not_called()
+
+        self.assertEqual(written, [os.path.join("data", "silver", "2024-06-01_08-00-00", "PANERAI_DATA_2024.csv"),
+                                   os.path.join("data", "silver", "2025-03-07_01-52-40", "PANERAI_DATA_2025.csv")])
+        silver_2024 = pd.read_csv(written[0])
+        silver_2025 = pd.read_csv(written[1])
+        self.assertEqual(len(silver_2024), 2)
+        france_2024 = silver_2024[silver_2024["country"] == "France"].iloc[0]
+        france_2025 = silver_2025[silver_2025["country"] == "France"].iloc[0]
+        self.assertAlmostEqual(france_2024["price_USD"], 5700 / 0.9)
+        self.assertAlmostEqual(france_2025["price_USD"], 5700 / 0.95)
+
+    def test_backfill_reports_the_parquet_dataset(self):
+        fx_path = os.path.join("data", "fx", "fx_rates.csv")
+        FxRateTable(fx_path).record("2024-01-01", "USD", {"USD": 1.0, "EUR": 0.9, "GBP": 0.8, "JPY": 140.0})
+        run = "2024-06-01_08-00-00"
+        os.makedirs(os.path.join("data", "bronze", run))
+        pd.DataFrame({"brand": ["PANERAI"], "product_url": ["u1"], "image_url": ["i1"], "collection": ["Radiomir"],
+                      "reference": ["PAM01570"], "price": [6000], "currency": ["$"], "country": ["USA"],
+                      "year": [2024]}).to_csv(os.path.join("data", "bronze", run, "all_watches_2024.csv"), index=False)
+
+        transformer = DataTransformation(destinations=["silver"], fx_table_path=fx_path, output_formats=("parquet",))
+        written = transformer.backfill()
+        self.assertEqual(written, [os.path.join("data", "silver", run, "PANERAI_DATA_2024")])
+        self.assertTrue(os.path.isdir(written[0]))
+        self.assertFalse(os.path.exists(f"{written[0]}.csv"))
+
+    def test_backfill_needs_fx_table(self):
+        with self.assertRaises(ValueError):
+            DataTransformation().backfill([])
+
 if __name__ == "__main__":
     unittest.main()
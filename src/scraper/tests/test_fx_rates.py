@@ -0,0 +1,140 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import logging
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.fx_rates import ExchangeRateProvider, FxRateTable, run_timestamp_from_folder
+from scraper.utils import transform_data
+
+USD_RATES = {"USD": 1.0, "EUR": 0.9, "GBP": 0.8, "JPY": 150.0}
+
+
+def fake_fetch(base, api_key):
+    return {currency: rate / USD_RATES[base] for currency, rate in USD_RATES.items()}
+
+
+class TestExchangeRateProvider(unittest.TestCase):
+    def test_one_request_per_base(self):
+        fetch = MagicMock(side_effect=fake_fetch)
+        provider = ExchangeRateProvider(api_key="KEY", fetch=fetch)
+        for source in USD_RATES:
+            for target in USD_RATES:
+                provider.get_rate(source, target)
+        # Same-currency pairs never hit the API and every base is fetched once
+        self.assertEqual(fetch.call_count, 4)
+        self.assertAlmostEqual(provider.get_rate("eur", "jpy"), 150.0 / 0.9)
+
+    def test_pivot_derives_cross_rates_from_one_request(self):
+        fetch = MagicMock(side_effect=fake_fetch)
+        provider = ExchangeRateProvider(api_key="KEY", fetch=fetch, pivot="USD")
+        self.assertAlmostEqual(provider.get_rate("GBP", "EUR"), 0.9 / 0.8)
+        self.assertAlmostEqual(provider.get_rate("JPY", "USD"), 1 / 150.0)
+        self.assertEqual(fetch.call_count, 1)
+        fetch.assert_called_once_with("USD", "KEY")
+
+    def test_disk_cache_and_ttl(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetch = MagicMock(side_effect=fake_fetch)
+            ExchangeRateProvider(api_key="KEY", cache_dir=cache_dir, fetch=fetch).get_rate("USD", "EUR")
+            with open(os.path.join(cache_dir, "USD.json")) as f:
+                self.assertEqual(json.load(f)["conversion_rates"], USD_RATES)
+
+            # A new process reuses the on-disk rates while they are fresh...
+            ExchangeRateProvider(api_key="KEY", cache_dir=cache_dir, fetch=fetch).get_rate("USD", "GBP")
+            self.assertEqual(fetch.call_count, 1)
+            # ...and refetches once they are older than the TTL
+            ExchangeRateProvider(api_key="KEY", cache_dir=cache_dir, ttl=0, fetch=fetch).get_rate("USD", "GBP")
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_offline_replay(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with open(os.path.join(cache_dir, "USD.json"), "w") as f:
+                json.dump({"base": "USD", "fetched_at": 0, "conversion_rates": USD_RATES}, f)
+            fetch = MagicMock(side_effect=fake_fetch)
+            provider = ExchangeRateProvider(cache_dir=cache_dir, offline=True, fetch=fetch)
+            # Stale cache is still replayed offline, missing bases are not fetched
+            self.assertEqual(provider.get_rate("USD", "JPY"), 150.0)
+            self.assertIsNone(provider.get_rate("EUR", "USD"))
+            fetch.assert_not_called()
+
+    def test_failures_return_none(self):
+        provider = ExchangeRateProvider(api_key="KEY", fetch=MagicMock(side_effect=ValueError("bad payload")))
+        self.assertIsNone(provider.get_rate("USD", "EUR"))
+        provider = ExchangeRateProvider(api_key="KEY", fetch=MagicMock(return_value={"USD": 1.0}))
+        self.assertIsNone(provider.get_rate("USD", "CHF"))
+
+    def test_transform_data_with_provider(self):
+        fetch = MagicMock(side_effect=fake_fetch)
+        provider = ExchangeRateProvider(api_key="KEY", fetch=fetch)
+        df = pd.DataFrame({
+            "brand": ["PANERAI"] * 4, "product_url": ["u"] * 4, "image_url": ["i"] * 4,
+            "collection": ["Radiomir"] * 4, "reference": ["PAM01570"] * 4,
+            "price": [6000, 5400, 4800, 900000], "currency": ["$", "€", "£", "¥"],
+            "country": ["USA", "France", "UK", "Japan"], "year": [2025] * 4,
+        })
+        currencies_code = {"USA": "USD", "France": "EUR", "UK": "GBP", "Japan": "JPY"}
+        transformed_df = transform_data(df, currencies_code, fx_provider=provider)
+        self.assertEqual(fetch.call_count, 4)
+        self.assertTrue((transformed_df["price_USD"].round(6) == 6000).all())
+
+
+class TestFxRateTable(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.table = FxRateTable(os.path.join(self.tmp.name, "fx", "fx_rates.csv"))
+        self.table.record("2021-12-01", "USD", {"USD": 1.0, "EUR": 0.88, "GBP": 0.75, "JPY": 113.0})
+        # Rates recorded from another base are normalised through the pivot
+        self.table.record("2025-03-07", "EUR", {"EUR": 1.0, "USD": 1.08, "GBP": 0.84, "JPY": 160.0})
+
+    def test_record_versions(self):
+        self.assertEqual(self.table.record("2021-12-01", "USD", {"USD": 1.0, "EUR": 0.9, "GBP": 0.75, "JPY": 113.0}), 2)
+        latest = self.table.load()
+        eur_2021 = latest[(latest["date"] == "2021-12-01") & (latest["currency"] == "EUR")]
+        self.assertEqual(eur_2021["rate"].tolist(), [0.9])
+        self.assertEqual([str(d) for d in self.table.dates()], ["2021-12-01", "2025-03-07"])
+
+    def test_convert_as_of_row_dates(self):
+        df = pd.DataFrame({
+            "price": [9700, 9700, 100],
+            "currency_code": ["EUR", "EUR", "USD"],
+            "run_date": pd.to_datetime(["2022-06-30 10:00:00", "2025-03-07 01:52:40", "2020-01-01 00:00:00"]),
+        })
+        converted = self.table.convert(df, ["USD", "EUR"])
+        # 2022 uses the latest rates known at the time (2021-12-01), 2025 the same-day ones
+        self.assertAlmostEqual(converted["price_USD"].iloc[0], 9700 / 0.88)
+        self.assertAlmostEqual(converted["price_USD"].iloc[1], 9700 * 1.08)
+        self.assertAlmostEqual(converted["price_EUR"].iloc[1], 9700)
+        # No rate known before 2021-12-01
+        self.assertTrue(pd.isna(converted["price_EUR"].iloc[2]))
+
+    def test_convert_single_date(self):
+        df = pd.DataFrame({"price": [1000], "currency_code": ["GBP"]})
+        converted = self.table.convert(df, ["JPY"], date="2025-03-10")
+        self.assertAlmostEqual(converted["price_JPY"].iloc[0], 1000 * 160.0 / 0.84)
+
+    def test_snapshot_records_pivot_once(self):
+        fetch = MagicMock(side_effect=fake_fetch)
+        provider = ExchangeRateProvider(api_key="KEY", fetch=fetch)
+        self.assertTrue(self.table.snapshot(provider, date="2025-03-08"))
+        self.assertFalse(self.table.snapshot(provider, date="2025-03-08"))
+        fetch.assert_called_once_with("USD", "KEY")
+
+    def test_run_timestamp_from_folder(self):
+        self.assertEqual(run_timestamp_from_folder("data/bronze/2025-03-07_01-52-40/"), datetime(2025, 3, 7, 1, 52, 40))
+        self.assertIsNone(run_timestamp_from_folder("data/bronze/latest"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import logging
+import tempfile
+import unittest
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.page_fingerprints import PageFingerprints, fingerprint_cards
+
+CARDS = [
+    {"tracking": '{"reference": "PAM01570", "price": "$6,000"}', "href": "https://www.panerai.com/us/en/pam01570.html", "image": "/a.png"},
+    {"tracking": '{"reference": "PAM01571", "price": "$6,000"}', "href": "https://www.panerai.com/us/en/pam01571.html", "image": "/b.png"},
+]
+
+
+class TestPageFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.previous_folder = os.path.join(self.tmp.name, "2025-03-07_01-52-40")
+        os.makedirs(self.previous_folder)
+        pd.DataFrame({
+            "name": ["Radiomir Quaranta", "Radiomir Quaranta", "Luminor"],
+            "reference": ["PAM01570", "PAM01571", "PAM01570"],
+            "price": ["$6,000", "$6,000", "¥1,000,000"],
+            "country": ["USA", "USA", "Japan"],
+            "year": [2025, 2025, 2025],
+        }).to_csv(os.path.join(self.previous_folder, "all_watches_2025.csv"), index=False)
+        with open(os.path.join(self.previous_folder, "page_fingerprints.json"), "w") as f:
+            json.dump({"USA/RADIOMIR": {"fingerprint": fingerprint_cards(CARDS), "etag": '"abc"',
+                                        "last_modified": None, "references": ["PAM01570", "PAM01571"]}}, f)
+
+    def test_fingerprint_changes_with_price(self):
+        changed = [dict(CARDS[0], tracking=CARDS[0]["tracking"].replace("6,000", "6,200")), CARDS[1]]
+        self.assertEqual(fingerprint_cards(CARDS), fingerprint_cards([dict(card) for card in CARDS]))
+        self.assertNotEqual(fingerprint_cards(CARDS), fingerprint_cards(changed))
+
+    def test_unchanged_page_is_carried_forward(self):
+        fingerprints = PageFingerprints(self.previous_folder)
+        self.assertEqual(fingerprints.validators("USA/RADIOMIR"), {"etag": '"abc"', "last_modified": None})
+        self.assertTrue(fingerprints.is_unchanged("USA/RADIOMIR", {"cards": CARDS, "not_modified": False}))
+        self.assertTrue(fingerprints.is_unchanged("USA/RADIOMIR", {"cards": None, "not_modified": True}))
+        self.assertFalse(fingerprints.is_unchanged("USA/LUMINOR", {"cards": CARDS, "not_modified": False}))
+
+        products = fingerprints.carry_forward("USA/RADIOMIR", "USA")
+        self.assertEqual([product["reference"] for product in products], ["PAM01570", "PAM01571"])
+        self.assertEqual(products[0]["price"], "$6,000")
+        self.assertEqual(products[0]["year"], datetime.now().year)
+        self.assertEqual(fingerprints.carried, ["USA/RADIOMIR"])
+
+    def test_carry_forward_needs_every_reference(self):
+        os.remove(os.path.join(self.previous_folder, "all_watches_2025.csv"))
+        fingerprints = PageFingerprints(self.previous_folder)
+        self.assertEqual(fingerprints.carry_forward("USA/RADIOMIR", "USA"), [])
+
+    def test_record_and_save(self):
+        fingerprints = PageFingerprints(None)
+        fingerprints.record("USA/RADIOMIR", {"cards": CARDS, "etag": None, "last_modified": "Fri, 07 Mar 2025 01:52:40 GMT"},
+                            [{"reference": "PAM01570"}, {"reference": "PAM01571"}])
+        path = fingerprints.save(self.tmp.name)
+        reloaded = PageFingerprints(self.tmp.name)
+        self.assertEqual(path, os.path.join(self.tmp.name, "page_fingerprints.json"))
+        self.assertEqual(reloaded.previous["USA/RADIOMIR"]["references"], ["PAM01570", "PAM01571"])
+        self.assertEqual(reloaded.validators("USA/RADIOMIR")["last_modified"], "Fri, 07 Mar 2025 01:52:40 GMT")
+
+
+if __name__ == "__main__":
+    unittest.main()
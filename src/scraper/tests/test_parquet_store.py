@@ -0,0 +1,86 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import logging
+import tempfile
+import unittest
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.parquet_store import parquet_available, write_partitioned, read_partitioned, read_runs, read_schema
+from scraper.schema import enforce_silver_schema, read_silver
+from scraper.utils import save_data, load_data
+
+
+def silver_rows(year):
+    return enforce_silver_schema(pd.DataFrame({
+        "brand": ["PANERAI"] * 4,
+        "collection": ["RADIOMIR"] * 4,
+        "reference": ["PAM01570"] * 4,
+        "country": ["USA", "France", "UK", "Japan"],
+        "currency": ["$", "€", "£", "￥"],
+        "price": [6000.0, 5700.0, 5200.0, 913000.0],
+        "year": [year] * 4,
+    }))
+
+
+@unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+class TestParquetStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def test_partition_layout_and_stored_schema(self):
+        path = write_partitioned(silver_rows(2025), os.path.join(self.tmp, "PANERAI_DATA_2025"))
+        self.assertTrue(os.path.isdir(os.path.join(path, "year=2025", "country=Japan")))
+        self.assertIn("year", read_schema(path).names)
+
+        df = read_partitioned(path)
+        self.assertEqual(len(df), 4)
+        self.assertEqual(df["year"].dtype, "int16")
+        self.assertIsInstance(df["country"].dtype, pd.CategoricalDtype)
+
+    def test_projection_and_pruning(self):
+        path = write_partitioned(silver_rows(2025), os.path.join(self.tmp, "PANERAI_DATA_2025"))
+        df = read_partitioned(path, columns=["reference", "price"], filters={"country": "Japan"})
+        self.assertEqual(list(df.columns), ["reference", "price"])
+        self.assertEqual(df["price"].tolist(), [913000.0])
+
+    def test_rewrite_is_idempotent(self):
+        path = os.path.join(self.tmp, "PANERAI_DATA_2025")
+        write_partitioned(silver_rows(2025), path)
+        write_partitioned(silver_rows(2025), path)
+        self.assertEqual(len(read_partitioned(path)), 4)
+
+    def test_chunks_are_appended(self):
+        path = os.path.join(self.tmp, "PANERAI_DATA_2025")
+        write_partitioned(silver_rows(2025), path, chunk=0)
+        write_partitioned(silver_rows(2025).assign(reference="PAM01312"), path, chunk=1)
+        df = read_partitioned(path)
+        self.assertEqual(len(df), 8)
+        self.assertEqual(sorted(df["reference"].unique()), ["PAM01312", "PAM01570"])
+
+    def test_read_runs_across_years(self):
+        for run, year in (("2024-06-01_08-00-00", 2024), ("2025-03-07_01-52-40", 2025)):
+            save_data(silver_rows(year), f"PANERAI_DATA_{year}", os.path.join(self.tmp, run), formats=("parquet",))
+        df = read_runs(self.tmp, "PANERAI_DATA_*", columns=["year", "price"], filters={"country": ["Japan"]})
+        self.assertEqual(df["year"].tolist(), [2024, 2025])
+        self.assertEqual(df["run"].tolist(), ["2024-06-01_08-00-00", "2025-03-07_01-52-40"])
+
+    def test_parquet_only_output_is_loadable(self):
+        run_dir = os.path.join(self.tmp, "run")
+        save_data(silver_rows(2025), "PANERAI_DATA_2025", run_dir, formats=("parquet",))
+        self.assertFalse(os.path.exists(os.path.join(run_dir, "PANERAI_DATA_2025.csv")))
+        self.assertEqual(len(load_data(os.path.join(run_dir, "PANERAI_DATA_2025.csv"))), 4)
+        df = read_silver(os.path.join(run_dir, "PANERAI_DATA_2025"))
+        self.assertEqual(list(df.columns)[:3], ["brand", "collection", "reference"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import logging
+import tempfile
+import unittest
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.price_history import PriceHistory
+from scraper.run_catalog import RunCatalog
+
+
+def snapshot(prices, availability=None):
+    """Bronze rows for {(reference, country): price}."""
+    availability = availability or {}
+    return pd.DataFrame([
+        {"name": "Radiomir", "reference": reference, "collection": "Radiomir", "brand": "PANERAI",
+         "price": price, "currency": "$", "availability": availability.get((reference, country), "Available"),
+         "country": country, "year": 2025}
+        for (reference, country), price in prices.items()
+    ])
+
+
+DAY1 = {("PAM1", "USA"): "$6,000", ("PAM2", "USA"): "$7,000", ("PAM3", "USA"): "$8,000"}
+DAY2 = {("PAM1", "USA"): "$6,000", ("PAM2", "USA"): "$7,500"}  # PAM2 repriced, PAM3 delisted
+DAY3 = {("PAM1", "USA"): "$6,000", ("PAM2", "USA"): "$7,500", ("PAM4", "USA"): "$9,000"}
+
+
+def normalize(df):
+    return df.drop(columns=["year"]).sort_values(["reference", "country"]).reset_index(drop=True)[
+        ["reference", "country", "price", "availability"]]
+
+
+class TestPriceHistory(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.path = os.path.join(self.tmp, "history", "price_history.csv")
+
+    def test_change_only_intervals_and_point_in_time(self):
+        history = PriceHistory(self.path)
+        history.fold(snapshot(DAY1), "2025-03-01 01:00:00")
+        counts = history.fold(snapshot(DAY2, {("PAM1", "USA"): "Available"}), "2025-03-02 01:00:00")
+        self.assertEqual(counts, {"opened": 1, "closed": 2, "unchanged": 1})
+        history.fold(snapshot(DAY3), "2025-03-03 01:00:00")
+        history.save()
+
+        # 3 + 1 repricing + 1 new product; PAM1 never changed and keeps a single interval
+        reloaded = PriceHistory(self.path)
+        self.assertEqual(len(reloaded.load()), 5)
+        self.assertEqual(len(reloaded.history("PAM1")), 1)
+        for day, prices in (("2025-03-01", DAY1), ("2025-03-02", DAY2), ("2025-03-03", DAY3)):
+            pd.testing.assert_frame_equal(normalize(reloaded.catalog_on(day)), normalize(snapshot(prices).astype(str)))
+        self.assertTrue(reloaded.as_of("2025-02-28").empty)
+
+    def test_availability_change_opens_an_interval(self):
+        history = PriceHistory(self.path)
+        history.fold(snapshot(DAY1), "2025-03-01")
+        history.fold(snapshot(DAY1, {("PAM1", "USA"): "Out of Stock"}), "2025-03-02")
+        self.assertEqual(history.history("PAM1", "USA")["availability"].tolist(), ["Available", "Out of Stock"])
+
+    def test_snapshots_must_be_folded_in_order(self):
+        history = PriceHistory(self.path)
+        history.fold(snapshot(DAY2), "2025-03-02")
+        with self.assertRaises(ValueError):
+            history.fold(snapshot(DAY1), "2025-03-01")
+
+    def test_compact_folds_bronze_runs_and_prunes_past_retention(self):
+        bronze = os.path.join(self.tmp, "bronze")
+        runs = {"2025-03-01_01-00-00": DAY1, "2025-03-02_01-00-00": DAY2, "2025-03-03_01-00-00": DAY3}
+        for run, prices in runs.items():
+            os.makedirs(os.path.join(bronze, run))
+            snapshot(prices).to_csv(os.path.join(bronze, run, "all_watches_2025.csv"), index=False)
+
+        summary = PriceHistory(self.path).compact(bronze, retention_days=1.5, now=datetime(2025, 3, 3, 12))
+        self.assertEqual(summary["folded"], list(runs))
+        self.assertEqual([os.path.basename(folder) for folder in summary["pruned"]], ["2025-03-01_01-00-00"])
+        self.assertEqual(sorted(os.listdir(bronze)), ["2025-03-02_01-00-00", "2025-03-03_01-00-00"])
+
+        # Compaction is idempotent and the pruned day can still be reconstructed
+        history = PriceHistory(self.path)
+        self.assertEqual(history.compact(bronze)["folded"], [])
+        pd.testing.assert_frame_equal(normalize(history.catalog_on("2025-03-01")), normalize(snapshot(DAY1).astype(str)))
+
+    def test_compact_skips_runs_that_did_not_succeed(self):
+        bronze = os.path.join(self.tmp, "bronze")
+        # The second run lost its PAM1 pages and the fourth failed
+        runs = {"2025-03-01_01-00-00": (DAY1, "success"), "2025-03-02_01-00-00": ({("PAM2", "USA"): "$7,500"}, "partial"),
+                "2025-03-03_01-00-00": (DAY3, "success"), "2025-03-04_01-00-00": (DAY3, "failed")}
+        catalog = RunCatalog(self.tmp)
+        for run, (prices, status) in runs.items():
+            os.makedirs(os.path.join(bronze, run))
+            snapshot(prices).to_csv(os.path.join(bronze, run, "all_watches_2025.csv"), index=False)
+            catalog.record("bronze", os.path.join(bronze, run), status=status)
+
+        summary = PriceHistory(self.path).compact(bronze, retention_days=0.5, now=datetime(2025, 3, 5))
+        self.assertEqual(summary["folded"], ["2025-03-01_01-00-00", "2025-03-03_01-00-00"])
+        self.assertEqual(summary["skipped"], ["2025-03-02_01-00-00", "2025-03-04_01-00-00"])
+        # PAM1 was never delisted; only folded runs are pruned, and the latest folded one is kept
+        self.assertEqual(len(PriceHistory(self.path).history("PAM1")), 1)
+        self.assertEqual([os.path.basename(folder) for folder in summary["pruned"]], ["2025-03-01_01-00-00"])
+        self.assertEqual(sorted(os.listdir(bronze)),
+                         ["2025-03-02_01-00-00", "2025-03-03_01-00-00", "2025-03-04_01-00-00"])
+
+
+if __name__ == "__main__":
+    unittest.main()
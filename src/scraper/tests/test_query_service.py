@@ -0,0 +1,115 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import logging
+import tempfile
+import threading
+import unittest
+from urllib.request import urlopen
+from urllib.error import HTTPError
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.query_service import QueryService, serve
+
+
+def silver_rows(price_shift: float = 0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "brand": ["PANERAI"] * 5,
+        "collection": ["Luminor", "Luminor", "Luminor", "Radiomir", "Luminor"],
+        "reference": ["PAM01405", "PAM01405", "PAM01312", "PAM01570", "PAM01312"],
+        "name": ["Luminor Marina", "Luminor Marina", "Luminor Base", "Radiomir", "Luminor Base"],
+        "price": [1_100_000, 8_000, 900_000, 700_000, 6_000],
+        "currency": ["¥", "$", "¥", "¥", "$"],
+        "currency_code": ["JPY", "USD", "JPY", "JPY", "USD"],
+        "country": ["Japan", "USA", "Japan", "Japan", "USA"],
+        "year": [2025] * 5,
+        "price_USD": [7_300 + price_shift, 8_000, 6_000, 4_700, 6_000],
+    })
+
+
+class TestQueryService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = self.tmp.name
+        self.write_run("01-01_00-00-00", silver_rows())
+
+    def write_run(self, stamp: str, silver: pd.DataFrame) -> None:
+        run = f"{datetime.now().year}-{stamp}"
+        silver_dir = os.path.join(self.data_dir, "silver", run)
+        gold_dir = os.path.join(self.data_dir, "gold", run)
+        os.makedirs(silver_dir)
+        os.makedirs(gold_dir)
+        silver.to_csv(os.path.join(silver_dir, "PANERAI_DATA_2025.csv"), index=False)
+        growth = pd.DataFrame({"country": ["Japan", "USA"], "Growth Rate (%)": [12.5, None]})
+        growth.to_csv(os.path.join(gold_dir, "Global_Growth_Rate_by_country.csv"), index=False)
+        pd.DataFrame({"reference": ["PAM01405"], "country": ["USA"], "row_hash": ["1"]}).to_csv(
+            os.path.join(gold_dir, "gold_state.csv"), index=False)
+
+    def test_lookups_by_reference_collection_and_country(self):
+        service = QueryService(self.data_dir)
+        self.assertEqual({row["country"] for row in service.product("PAM01405")}, {"Japan", "USA"})
+        self.assertEqual(len(service.product("pam01405", country="japan")), 1)
+        self.assertEqual(len(service.collection("Luminor", country="USA")), 2)
+        self.assertEqual(service.product("PAM00000"), [])
+
+        cheapest = service.cheapest(collection="Luminor", country="Japan")
+        self.assertEqual([row["reference"] for row in cheapest], ["PAM01312"])
+        self.assertEqual(len(service.cheapest(n=10)), 5)
+
+    def test_gold_tables_without_state_and_with_nulls(self):
+        service = QueryService(self.data_dir)
+        self.assertEqual(sorted(service.index.gold), ["Global_Growth_Rate_by_country"])
+        rows = service.gold_table("Global_Growth_Rate_by_country")
+        self.assertIsNone(rows[1]["Growth Rate (%)"])
+        with self.assertRaises(KeyError):
+            service.gold_table("missing")
+
+    def test_results_are_cached_until_a_new_run_lands(self):
+        service = QueryService(self.data_dir, check_interval=0)
+        first = service.product("PAM01405", country="Japan")
+        self.assertIs(service.product("PAM01405", country="Japan"), first)
+        self.assertEqual((service.hits, service.misses), (1, 1))
+
+        self.write_run("02-01_00-00-00", silver_rows(price_shift=100))
+        new_run = os.path.join(self.data_dir, "silver", f"{datetime.now().year}-02-01_00-00-00")
+        os.utime(new_run, (time.time() + 10, time.time() + 10))
+        refreshed = service.product("PAM01405", country="Japan")
+        self.assertEqual(refreshed[0]["price_USD"], 7_400)
+        self.assertEqual(service.reloads, 2)
+
+    def test_lru_evicts_least_recently_used(self):
+        service = QueryService(self.data_dir, cache_size=2)
+        service.product("PAM01405")
+        service.product("PAM01312")
+        service.product("PAM01405")
+        service.product("PAM01570")
+        self.assertEqual([key[1] for key in service._cache], ["pam01405", "pam01570"])
+
+    def test_http_endpoint(self):
+        server = serve(QueryService(self.data_dir), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        address = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with urlopen(f"{address}/product/PAM01405?country=USA") as response:
+            self.assertEqual(json.loads(response.read())[0]["price"], 8_000)
+        with urlopen(f"{address}/cheapest?collection=Luminor&n=2") as response:
+            self.assertEqual([row["price_USD"] for row in json.loads(response.read())], [6_000, 6_000])
+        with urlopen(f"{address}/health") as response:
+            self.assertEqual(json.loads(response.read())["rows"], 5)
+        with self.assertRaises(HTTPError) as error:
+            urlopen(f"{address}/gold/missing")
+        self.assertEqual(error.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
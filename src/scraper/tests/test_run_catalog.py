@@ -0,0 +1,100 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import logging
+import tempfile
+import threading
+import unittest
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.run_catalog import RunCatalog
+from scraper.utils import get_latest_folder
+
+
+class TestRunCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.catalog = RunCatalog(self.root)
+
+    def make_run(self, stage: str, run_id: str, rows: int = 2) -> str:
+        folder = os.path.join(self.root, stage, run_id)
+        os.makedirs(folder)
+        pd.DataFrame({"reference": [f"PAM{i:05d}" for i in range(rows)]}).to_csv(
+            os.path.join(folder, "all_watches_2025.csv"), index=False)
+        return folder
+
+    def test_record_and_latest(self):
+        folder = self.make_run("bronze", "2025-03-07_01-52-40")
+        entry = self.catalog.record("bronze", folder, rows={"all_watches_2025": 2})
+        self.assertEqual(entry["run_id"], "2025-03-07_01-52-40")
+        self.assertEqual(entry["files"]["all_watches_2025.csv"]["rows"], 2)
+        self.assertEqual(len(entry["files"]["all_watches_2025.csv"]["sha256"]), 64)
+        self.assertEqual(self.catalog.latest("bronze"), entry)
+        self.assertEqual(self.catalog.latest_file("bronze", "all_watches_"), os.path.join(folder, "all_watches_2025.csv"))
+        self.assertIsNone(self.catalog.latest("silver"))
+
+    def test_latest_only_moves_forward_and_skips_failures(self):
+        new_year = self.make_run("bronze", "2026-01-01_00-05-00")
+        self.catalog.record("bronze", new_year)
+        # A backfilled run from last year and a failed run do not replace the latest one
+        self.catalog.record("bronze", self.make_run("bronze", "2025-12-31_23-55-00"))
+        self.catalog.record("bronze", self.make_run("bronze", "2026-01-02_00-00-00"), status="failed")
+        self.assertEqual(self.catalog.latest_path("bronze"), new_year)
+        self.assertEqual([entry["status"] for entry in self.catalog.entries("bronze")], ["success", "success", "failed"])
+
+    def test_concurrent_writers(self):
+        folders = [self.make_run("silver", f"2025-03-07_01-00-{second:02d}") for second in range(12)]
+        threads = [threading.Thread(target=RunCatalog(self.root).record, args=("silver", folder)) for folder in folders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.catalog.entries("silver")), 12)
+        self.assertEqual(self.catalog.latest_path("silver"), folders[-1])
+        self.assertFalse(os.path.exists(self.catalog.lock_path))
+
+    def test_untimestamped_runs_never_become_latest(self):
+        folder = self.make_run("bronze", "2025-03-07_01-52-40")
+        self.catalog.record("bronze", folder)
+        self.catalog.record("bronze", self.make_run("bronze", "dummy_bronze_dir"))
+        self.catalog.record("bronze", self.make_run("bronze", "tmpab12cd"))
+        self.assertEqual(self.catalog.latest_path("bronze"), folder)
+        self.assertEqual(len(self.catalog.entries("bronze")), 3)
+
+        # A pointer already stuck on such a run moves again with the next real run
+        self.catalog._write_pointer("bronze", self.catalog.entries("bronze")[1])
+        newer = self.make_run("bronze", "2025-03-08_01-52-40")
+        self.catalog.record("bronze", newer)
+        self.assertEqual(self.catalog.latest_path("bronze"), newer)
+        with open(os.path.join(self.catalog.directory, "latest_bronze.json"), "w") as f:
+            f.write("{")
+        self.assertEqual(self.catalog.latest_path("bronze"), newer)
+
+    def test_corrupted_pointer_is_rebuilt_from_manifest(self):
+        folder = self.make_run("gold", "2025-03-07_01-56-07")
+        self.catalog.record("gold", folder)
+        with open(os.path.join(self.catalog.directory, "latest_gold.json"), "w") as f:
+            f.write("{")
+        self.assertEqual(self.catalog.latest_path("gold"), folder)
+
+    def test_get_latest_folder_uses_catalog_then_run_names(self):
+        stage_dir = os.path.join(self.root, "bronze", "")
+        old = self.make_run("bronze", "2025-12-31_23-00-00")
+        new = self.make_run("bronze", "2026-01-01_01-00-00")
+        # Touching an older folder does not make it the latest one, across years
+        os.utime(old, (time.time() + 60, time.time() + 60))
+        self.assertEqual(get_latest_folder(stage_dir), new)
+
+        self.catalog.record("bronze", old)
+        self.assertEqual(get_latest_folder(stage_dir), old)
+
+
+if __name__ == "__main__":
+    unittest.main()
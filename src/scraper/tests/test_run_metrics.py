@@ -0,0 +1,189 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import logging
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.run_metrics import MetricsRegistry, get_default_metrics
+from scraper.utils import clean_data, save_data, launch_extraction, get_exchange_rate
+from scraper.utils import extract_image_url, render_collection_cards, fetch_collection_cards
+from scraper.fx_rates import ExchangeRateProvider
+from scraper.data_transformation.data_transformation import DataTransformation
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.metrics = MetricsRegistry()
+
+    def test_counters_and_timers(self):
+        self.metrics.increment("pages_fetched_total", backend="http", status="ok")
+        self.metrics.increment("pages_fetched_total", 2, status="ok", backend="http")
+        self.metrics.observe("stage_seconds", 1.5, stage="extraction")
+        with self.metrics.timer("stage_seconds", stage="extraction"):
+            pass
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="http", status="ok"), 3)
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="http", status="error"), 0)
+
+        summary = self.metrics.snapshot()
+        timer = summary["timers"]["stage_seconds"][0]
+        self.assertEqual(timer["labels"], {"stage": "extraction"})
+        self.assertEqual(timer["count"], 2)
+        self.assertEqual(timer["max"], 1.5)
+
+    def test_concurrent_increments(self):
+        threads = [threading.Thread(target=lambda: [self.metrics.increment("cards_found_total") for _ in range(500)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.metrics.value("cards_found_total"), 4000)
+
+    def test_prometheus_textfile(self):
+        self.metrics.increment("rows_dropped_total", 4, step="duplicates")
+        self.metrics.observe("save_seconds", 0.25, format="csv")
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE panerai_rows_dropped_total counter", text)
+        self.assertIn('panerai_rows_dropped_total{step="duplicates"} 4', text)
+        self.assertIn("# TYPE panerai_save_seconds summary", text)
+        self.assertIn('panerai_save_seconds_count{format="csv"} 1', text)
+        self.assertIn('panerai_save_seconds_sum{format="csv"} 0.250000', text)
+
+        textfile_dir = os.path.join(self.tmp.name, "textfile")
+        self.metrics.write(self.tmp.name, textfile_dir=textfile_dir)
+        with open(os.path.join(self.tmp.name, "run_metrics.json")) as f:
+            self.assertEqual(json.load(f)["counters"]["rows_dropped_total"][0]["value"], 4)
+        with open(os.path.join(textfile_dir, "panerai_run_metrics.prom")) as f:
+            self.assertEqual(f.read(), text)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["run_metrics.json", "run_metrics.prom", "textfile"])
+
+    def test_each_layer_has_its_own_textfile(self):
+        textfile_dir = os.path.join(self.tmp.name, "textfile")
+        for layer in ("bronze", "silver"):
+            self.metrics.increment("rows_saved_total", format="csv")
+            os.makedirs(os.path.join(self.tmp.name, layer))
+            self.metrics.write(os.path.join(self.tmp.name, layer), textfile_dir=textfile_dir, layer=layer)
+        self.metrics.write(self.tmp.name, "run_metrics_USA_RADIOMIR", textfile_dir=textfile_dir, export=False)
+        self.assertEqual(sorted(os.listdir(textfile_dir)), ["panerai_run_metrics_bronze.prom", "panerai_run_metrics_silver.prom"])
+        with open(os.path.join(textfile_dir, "panerai_run_metrics_silver.prom")) as f:
+            self.assertIn('panerai_rows_saved_total{format="csv",layer="silver"} 2', f.read())
+
+    def test_merge_partition_summaries(self):
+        for seconds in (1.0, 3.0):
+            partition = MetricsRegistry()
+            partition.increment("pages_fetched_total", backend="http", status="ok")
+            partition.observe("stage_seconds", seconds, stage="extraction")
+            self.metrics.merge(json.loads(json.dumps(partition.snapshot())))
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="http", status="ok"), 2)
+        timer = self.metrics.snapshot()["timers"]["stage_seconds"][0]
+        self.assertEqual((timer["count"], timer["seconds"], timer["max"]), (2, 4.0, 3.0))
+
+
+class TestPipelineInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.metrics = get_default_metrics()
+
+    def test_cleaning_and_saving(self):
+        df = pd.DataFrame({
+            "reference": ["PAM1", "PAM1", "PAM2", None, "PAM3"],
+            "country": ["USA"] * 5,
+            "price": ["$6,000", "$6,000", "$7,100", "$1", "on request"],
+        })
+        before = {step: self.metrics.value("rows_dropped_total", step=step)
+                  for step in ("missing_values", "duplicates", "invalid_prices")}
+        cleaned = clean_data(df)
+        self.assertEqual(len(cleaned), 2)
+        for step in before:
+            self.assertEqual(self.metrics.value("rows_dropped_total", step=step) - before[step], 1)
+
+        saved = self.metrics.value("rows_saved_total", format="csv")
+        with tempfile.TemporaryDirectory() as output_dir:
+            save_data(cleaned, "PANERAI_DATA", output_dir)
+        self.assertEqual(self.metrics.value("rows_saved_total", format="csv") - saved, 2)
+
+    def test_extraction_pages_and_waits(self):
+        driver = MagicMock()
+        driver.execute_script.return_value = [{"tracking": None, "href": None, "image": None}] * 4
+        pages = self.metrics.value("pages_fetched_total", backend="selenium", status="ok")
+        cards = self.metrics.value("cards_found_total", country="Japan")
+        waits = self.metrics.value("webdriver_wait_seconds", backend="selenium", wait="page")
+        with patch("scraper.utils.WebDriverWait"):
+            launch_extraction(driver, "Japan", "jp/ja", "RADIOMIR", "http://example.com/{}/{}.html", bulk=True)
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="selenium", status="ok") - pages, 1)
+        self.assertEqual(self.metrics.value("cards_found_total", country="Japan") - cards, 4)
+        self.assertEqual(self.metrics.value("webdriver_wait_seconds", backend="selenium", wait="page") - waits, 1)
+
+        errors = self.metrics.value("pages_fetched_total", backend="selenium", status="error")
+        driver.get.side_effect = Exception("tab crashed")
+        self.assertEqual(launch_extraction(driver, "Japan", "jp/ja", "RADIOMIR", "http://example.com/{}/{}.html"), [])
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="selenium", status="error") - errors, 1)
+
+    def test_card_waits_and_incremental_fetches(self):
+        card_waits = self.metrics.value("webdriver_wait_seconds", backend="selenium", wait="card_image")
+        with patch("scraper.utils.WebDriverWait"):
+            extract_image_url(MagicMock())
+        self.assertEqual(self.metrics.value("webdriver_wait_seconds", backend="selenium", wait="card_image") - card_waits, 1)
+
+        rendered = self.metrics.value("pages_fetched_total", backend="selenium", status="ok")
+        driver = MagicMock()
+        driver.execute_script.return_value = []
+        with patch("scraper.utils.WebDriverWait"):
+            render_collection_cards(driver, "http://example.com/us/en/radiomir.html")
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="selenium", status="ok") - rendered, 1)
+
+        not_modified = self.metrics.value("pages_fetched_total", backend="http", status="not_modified")
+        session = MagicMock()
+        session.get.return_value.status_code = 304
+        fetch_collection_cards(session, "http://example.com/us/en/radiomir.html", etag='"v1"')
+        self.assertEqual(self.metrics.value("pages_fetched_total", backend="http", status="not_modified") - not_modified, 1)
+
+    def test_fx_calls(self):
+        provider = ExchangeRateProvider(api_key="KEY", fetch=lambda base, api_key: {"EUR": 0.9, "USD": 1.0})
+        calls = self.metrics.value("fx_calls_total", source="provider")
+        fetched = self.metrics.value("fx_requests_total", status="ok")
+        self.assertEqual(get_exchange_rate("USD", "EUR", provider=provider), 0.9)
+        self.assertEqual(get_exchange_rate("USD", "EUR", provider=provider), 0.9)
+        self.assertEqual(self.metrics.value("fx_calls_total", source="provider") - calls, 2)
+        # The second call is served from the provider's cache
+        self.assertEqual(self.metrics.value("fx_requests_total", status="ok") - fetched, 1)
+
+
+class TestRunSummaries(unittest.TestCase):
+    def test_each_run_starts_from_zero(self):
+        get_default_metrics().increment("pages_fetched_total", backend="http", status="ok")
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            self.addCleanup(os.chdir, cwd)
+            pd.DataFrame({"brand": ["PANERAI"], "reference": ["PAM1"], "price": ["$6,000"], "currency": ["$"],
+                          "country": ["USA"], "collection": ["RADIOMIR"], "product_url": ["url"], "image_url": ["img"],
+                          "year": [2025]}).to_csv("all_watches_2025.csv", index=False)
+            provider = ExchangeRateProvider(api_key="KEY", fetch=lambda base, api_key: {"USD": 1.0, "EUR": 0.9,
+                                                                                        "GBP": 0.8, "JPY": 150.0})
+            with patch("scraper.utils.get_default_fx_provider", return_value=provider), \
+                    patch.dict(os.environ, {"METRICS_TEXTFILE_DIR": "textfile"}):
+                DataTransformation(input_file="all_watches_2025.csv", destinations=["silver"],
+                                   output_formats=("csv",)).run()
+            self.assertEqual(os.listdir("textfile"), ["panerai_run_metrics_silver.prom"])
+            silver_dir = os.path.join("data", "silver", os.listdir(os.path.join("data", "silver"))[0])
+            with open(os.path.join(silver_dir, "run_metrics.json")) as f:
+                summary = json.load(f)
+        self.assertNotIn("pages_fetched_total", summary["counters"])
+        self.assertIn("rows_saved_total", summary["counters"])
+
+
+if __name__ == "__main__":
+    unittest.main()
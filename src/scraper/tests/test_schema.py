@@ -0,0 +1,67 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import logging
+import tempfile
+import unittest
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.schema import SILVER_SCHEMA, enforce_silver_schema, read_silver, silver_column_order
+
+
+def silver_frame():
+    return pd.DataFrame({
+        "price_USD": [39200.0, 41000.0],
+        "image_url": ["https://img/1.jpg", "https://img/1.jpg"],
+        "country": ["USA", "France"],
+        "reference": ["PAM01", "PAM01"],
+        "year": [2025, 2025],
+        "currency": ["$", "€"],
+        "currency_code": ["USD", "EUR"],
+        "price": [39200, 37500],
+        "brand": ["Panerai", "Panerai"],
+        "collection": ["RADIOMIR", "RADIOMIR"],
+        "product_url": ["https://p/1", "https://p/2"],
+        "run_date": ["2025-01-01", "2025-01-01"],
+    })
+
+
+class TestSilverSchema(unittest.TestCase):
+    def test_canonical_order_with_extras_last(self):
+        df = enforce_silver_schema(silver_frame())
+        expected = [col for col in SILVER_SCHEMA if col in df.columns] + ["run_date"]
+        self.assertEqual(list(df.columns), expected)
+        self.assertEqual(silver_column_order(["year", "brand"]), ["brand", "year"])
+
+    def test_dtypes(self):
+        df = enforce_silver_schema(silver_frame())
+        for col in ("brand", "collection", "country", "currency", "currency_code", "image_url"):
+            self.assertIsInstance(df[col].dtype, pd.CategoricalDtype, col)
+        self.assertEqual(df["year"].dtype, "int16")
+        self.assertEqual(df["price"].dtype, "float64")
+        self.assertEqual(list(df["country"].cat.categories), ["USA", "France", "UK", "Japan"])
+
+    def test_unknown_category_is_kept(self):
+        frame = silver_frame()
+        frame.loc[1, "country"] = "Italy"
+        df = enforce_silver_schema(frame)
+        self.assertEqual(df["country"].tolist(), ["USA", "Italy"])
+
+    def test_read_silver_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "silver.csv")
+            enforce_silver_schema(silver_frame()).to_csv(path, index=False)
+            df = read_silver(path, columns=["reference", "country", "price_USD"])
+        self.assertEqual(list(df.columns), ["reference", "country", "price_USD"])
+        self.assertIsInstance(df["country"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["price_USD"].tolist(), [39200.0, 41000.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
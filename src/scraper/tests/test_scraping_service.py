@@ -0,0 +1,79 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import logging
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+logging.disable(logging.ERROR)
+
+from scraper.scraping_service import ScrapingService, stream_extraction
+
+COUNTRIES = {"USA": "us/en", "Japan": "jp/ja"}
+COLLECTIONS = ["RADIOMIR", "LUMINOR"]
+BASE_URL = "https://www.panerai.com/{}/collections/watch-collection/{}.html"
+
+
+def fake_driver(**kwargs):
+    driver = MagicMock()
+    driver.execute_script.return_value = 1
+    return driver
+
+
+def fake_launch(driver, country, country_url, collection, base_url, bulk=False):
+    return [{"reference": f"{country}-{collection}-{i}", "country": country} for i in range(2)]
+
+
+class TestScrapingService(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            patch("scraper.webdriver_pool.start_webdriver", side_effect=fake_driver),
+            patch("scraper.webdriver_pool.close_webdriver"),
+            patch("scraper.scraping_service.launch_extraction", side_effect=fake_launch),
+        ]
+        self.mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+        self.service = ScrapingService(COUNTRIES, COLLECTIONS, BASE_URL, port=0, pool_size=2)
+        self.thread = threading.Thread(target=self.service.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.service.server.shutdown()
+        self.thread.join(timeout=5)
+
+    def test_stream_all_units(self):
+        records = list(stream_extraction(self.service.address))
+        products = [record["product"] for record in records if record["type"] == "product"]
+        self.assertEqual(len(products), 8)
+        # Units are streamed in request order
+        units = [record["unit"] for record in records if record["type"] == "unit"]
+        self.assertEqual(units, ["USA/RADIOMIR", "USA/LUMINOR", "Japan/RADIOMIR", "Japan/LUMINOR"])
+        self.assertEqual(records[-1]["type"], "done")
+        self.assertEqual(records[-1]["products"], 8)
+
+    def test_warm_browsers_are_reused_across_jobs(self):
+        list(stream_extraction(self.service.address, [{"country": "USA", "collection": "RADIOMIR"}]))
+        list(stream_extraction(self.service.address, [{"country": "Japan", "collection": "LUMINOR"}]))
+        start_webdriver = self.mocks[0]
+        # The pool was warmed once at startup; jobs do not start new browsers
+        self.assertEqual(start_webdriver.call_count, 2)
+        health = requests.get(f"{self.service.address}/health", timeout=5).json()
+        self.assertEqual(health["jobs_served"], 2)
+        self.assertEqual(health["pool"]["started"], 2)
+
+    def test_unknown_unit_is_rejected(self):
+        response = requests.post(f"{self.service.address}/extract",
+                                 json={"units": [{"country": "Italy", "collection": "RADIOMIR"}]}, timeout=5)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
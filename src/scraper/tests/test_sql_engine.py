@@ -0,0 +1,97 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import logging
+import tempfile
+import unittest
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.sql_engine import SqlEngine, discover_tables, sql_available, table_name
+from scraper.parquet_store import parquet_available, write_partitioned
+
+
+def catalog(year: int, prices: list) -> pd.DataFrame:
+    return pd.DataFrame({
+        "collection": ["Luminor", "Luminor", "Radiomir"],
+        "reference": ["PAM01405", "PAM01405", "PAM01570"],
+        "country": ["Japan", "USA", "Japan"],
+        "price_USD": prices,
+        "year": [year] * 3,
+    })
+
+
+class TestSqlEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = self.tmp.name
+        year = datetime.now().year
+        self.runs = [f"{year}-01-01_00-00-00", f"{year}-02-01_00-00-00"]
+        for stage in ("bronze", "silver", "gold"):
+            os.makedirs(os.path.join(self.data_dir, stage))
+        catalog(2021, [7000.0, 7500.0, 4000.0]).to_csv(
+            os.path.join(self.data_dir, "silver", "PANERAI_DATA_2021.csv"), index=False)
+        for offset, run in enumerate(self.runs):
+            for stage, name in (("bronze", "all_watches_2025"), ("silver", "PANERAI_DATA_2025")):
+                folder = os.path.join(self.data_dir, stage, run)
+                os.makedirs(folder)
+                catalog(2025, [8000.0 + offset, 8200.0, 4700.0]).to_csv(os.path.join(folder, f"{name}.csv"), index=False)
+                os.utime(folder, (time.time() + offset, time.time() + offset))
+        pd.DataFrame({"country": ["Japan", "USA"], "Growth Rate (%)": [12.5, 9.0]}).to_csv(
+            os.path.join(self.data_dir, "gold", "Global_Growth_Rate_between_2021_2025_by_country.csv"), index=False)
+
+    def test_table_name(self):
+        self.assertEqual(table_name("gold", "Margin_lost_to_the_gray_market_2025"),
+                         "gold_margin_lost_to_the_gray_market_2025")
+
+    def test_discover_tables(self):
+        tables = discover_tables(self.data_dir)
+        latest = os.path.join(self.data_dir, "silver", self.runs[1], "PANERAI_DATA_2025.csv")
+        self.assertEqual(tables["silver"], ("csv", latest))
+        self.assertEqual(tables["silver_panerai_data_2025"], ("csv", latest))
+        self.assertEqual(tables["silver_panerai_data_2021"][0], "csv")
+        self.assertEqual(tables["bronze_all_watches_history"][0], "history")
+        self.assertIn("gold_global_growth_rate_between_2021_2025_by_country", tables)
+
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet_dataset_wins_over_csv(self):
+        folder = os.path.join(self.data_dir, "silver", self.runs[1])
+        write_partitioned(catalog(2025, [1.0, 2.0, 3.0]), os.path.join(folder, "PANERAI_DATA_2025"))
+        self.assertEqual(discover_tables(self.data_dir)["silver"][0], "parquet")
+
+    @unittest.skipUnless(sql_available(), "duckdb is not installed")
+    def test_queries(self):
+        with SqlEngine(self.data_dir, threads=2) as engine:
+            self.assertIn("silver_panerai_data_2021", engine.tables())
+            medians = engine.query("SELECT country, median(price_USD) AS median FROM silver GROUP BY country ORDER BY country")
+            self.assertEqual(medians["median"].tolist(), [6350.5, 8200.0])
+
+            growth = engine.query("""
+                SELECT c.reference, c.country, (c.price_USD / b.price_USD - 1) * 100 AS growth
+                FROM silver c JOIN silver_panerai_data_2021 b USING (reference, country)
+                ORDER BY growth DESC LIMIT 1""")
+            self.assertEqual(growth.loc[0, "reference"], "PAM01570")
+
+            runs = engine.query("SELECT run, count(*) AS n FROM bronze_all_watches_history GROUP BY run ORDER BY run")
+            self.assertEqual(runs["run"].tolist(), self.runs)
+
+            rate = engine.query("SELECT \"Growth Rate (%)\" AS rate FROM gold_global_growth_rate_between_2021_2025_by_country "
+                                "WHERE country = ?", ["Japan"])
+            self.assertEqual(rate.loc[0, "rate"], 12.5)
+
+    @unittest.skipUnless(sql_available() and parquet_available(), "duckdb and pyarrow are needed")
+    def test_partitioned_parquet_is_pruned(self):
+        folder = os.path.join(self.data_dir, "silver", self.runs[1])
+        write_partitioned(catalog(2025, [1.0, 2.0, 3.0]), os.path.join(folder, "PANERAI_DATA_2025"))
+        with SqlEngine(self.data_dir) as engine:
+            result = engine.query("SELECT sum(price_USD) AS total FROM silver WHERE country = 'Japan'")
+            self.assertEqual(result.loc[0, "total"], 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import json
+import logging
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+logging.disable(logging.ERROR)
+
+from scraper.data_extraction.data_extraction import DataExtraction
+from scraper.data_transformation.data_transformation import DataTransformation
+from scraper.fx_rates import ExchangeRateProvider
+from scraper.run_catalog import RunCatalog
+from scraper.streaming import StreamingPipeline
+from scraper.utils import launch_data_preprocess
+
+USD_RATES = {"USD": 1.0, "EUR": 0.9, "GBP": 0.8, "JPY": 150.0}
+PRICES = {"USA": "$8,200", "France": "8 100 €", "UK": "£7,300", "Japan": "￥1,250,000"}
+
+
+def fake_fetch(base, api_key):
+    return {currency: rate / USD_RATES[base] for currency, rate in USD_RATES.items()}
+
+
+def fake_extract_unit(self, country, country_url, collection):
+    # LUMINOR and LUMINOR-DUE share a reference to exercise cross-chunk deduplication
+    references = [f"PAM-{collection[:7]}-{i}" for i in range(3)]
+    price = PRICES[country] if collection != "SUBMERSIBLE" else None
+    return [{"brand": "PANERAI", "product_url": f"https://panerai.com/{country}/{reference}", "image_url": "img",
+             "collection": collection, "reference": reference, "name": reference, "price": price,
+             "currency": PRICES[country][0], "availability": "in stock", "country": country,
+             "year": datetime.now().year} for reference in references]
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        patcher = patch.object(DataExtraction, "_extract_unit", fake_extract_unit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = ExchangeRateProvider(api_key="KEY", fetch=fake_fetch)
+
+    def run_streaming(self, chunk_size: int, **extractor_options) -> dict:
+        extractor = DataExtraction(backend="http", output_formats=("csv",), **extractor_options)
+        with patch("scraper.data_extraction.data_extraction.start_http_session"), \
+                patch("scraper.data_extraction.data_extraction.close_http_session"):
+            return StreamingPipeline(extractor, chunk_size=chunk_size, fx_provider=self.provider,
+                                     output_formats=("csv",)).run()
+
+    def test_matches_the_batch_preprocessing(self):
+        summary = self.run_streaming(chunk_size=5)
+        year = datetime.now().year
+        self.assertEqual(summary["pages"], 16)
+        self.assertEqual(summary["bronze_rows"], 48)
+        self.assertGreater(summary["chunks"], 1)
+
+        bronze = pd.read_csv(os.path.join(summary["bronze"], f"all_watches_{year}.csv"))
+        self.assertEqual(len(bronze), 48)
+        self.assertEqual(len(pd.read_csv(os.path.join(summary["bronze"], f"Japan_watches_{year}.csv"))), 12)
+
+        streamed = pd.read_csv(os.path.join(summary["silver"], f"PANERAI_DATA_{year}.csv"))
+        batch = launch_data_preprocess(bronze, DataTransformation.CURRENCIES_CODE, fx_provider=self.provider)
+        self.assertEqual(summary["silver_rows"], len(batch))
+        batch_path = os.path.join(self.tmp.name, "batch.csv")
+        batch.to_csv(batch_path, index=False)
+        pd.testing.assert_frame_equal(streamed, pd.read_csv(batch_path))
+
+        with open(os.path.join(summary["silver"], "run_metrics.json")) as f:
+            timers = json.load(f)["timers"]
+        self.assertEqual([series["labels"] for series in timers["stage_seconds"]], [{"stage": "streaming"}])
+        self.assertEqual(timers["preprocess_stage_seconds"][0]["count"], summary["chunks"])
+        self.assertTrue(os.path.exists(os.path.join(summary["bronze"], "run_metrics.prom")))
+
+        self.assertEqual(RunCatalog().latest_path("silver"), summary["silver"])
+        self.assertEqual(RunCatalog().latest_path("bronze"), summary["bronze"])
+
+    def test_parallel_pages(self):
+        summary = self.run_streaming(chunk_size=1000, max_workers=4)
+        self.assertEqual(summary["chunks"], 1)
+        self.assertEqual(summary["bronze_rows"], 48)
+
+    def test_unsupported_modes(self):
+        with self.assertRaises(ValueError):
+            StreamingPipeline(DataExtraction(backend="http", incremental=True))
+        with self.assertRaises(ValueError):
+            StreamingPipeline(DataExtraction(), chunk_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
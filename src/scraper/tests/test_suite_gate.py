@@ -0,0 +1,62 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import tempfile
+import unittest
+
+from scraper.suite_gate import SuiteGate, tree_fingerprint
+
+PASSING = "import unittest\n\nclass TestOk(unittest.TestCase):\n    def test_ok(self):\n        self.assertTrue(True)\n"
+FAILING = "import unittest\n\nclass TestKo(unittest.TestCase):\n    def test_ko(self):\n        self.fail('broken')\n"
+
+
+class TestSuiteGate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.package = f"gatepkg_{id(self)}"
+        os.makedirs(os.path.join(self.root, "src", self.package))
+        self.write("__init__.py", "")
+        self.write("test_ok.py", PASSING)
+        self.write("test_ko.py", FAILING)
+        sys.path.insert(0, os.path.join(self.root, "src"))
+        self.addCleanup(sys.path.remove, os.path.join(self.root, "src"))
+        self.addCleanup(lambda: [sys.modules.pop(name) for name in list(sys.modules) if name.startswith(self.package)])
+
+    def write(self, name: str, content: str) -> None:
+        with open(os.path.join(self.root, "src", self.package, name), "w") as f:
+            f.write(content)
+
+    def test_passing_suites_are_skipped_until_the_sources_change(self):
+        module = f"{self.package}.test_ok"
+        summary = SuiteGate(self.root).run([module])
+        self.assertEqual(summary["passed"], [module])
+
+        summary = SuiteGate(self.root).run([module])
+        self.assertEqual((summary["skipped"], summary["passed"]), ([module], []))
+
+        self.write("helpers.py", "VALUE = 1\n")
+        self.assertEqual(SuiteGate(self.root).pending([module]), [module])
+        self.assertEqual(SuiteGate(self.root).run([module], force=False)["passed"], [module])
+
+    def test_failures_are_not_cached(self):
+        modules = [f"{self.package}.test_ok", f"{self.package}.test_ko", f"{self.package}.test_missing"]
+        summary = SuiteGate(self.root).run(modules)
+        self.assertEqual(summary["failed"], modules[1:])
+        self.assertIn("broken", summary["output"])
+        self.assertEqual(SuiteGate(self.root).pending(modules), modules[1:])
+
+    def test_run_outputs_do_not_change_the_fingerprint(self):
+        before = tree_fingerprint(self.root)
+        os.makedirs(os.path.join(self.root, "src", "logs"))
+        with open(os.path.join(self.root, "src", "logs", "run.log"), "w") as f:
+            f.write("error")
+        self.assertEqual(tree_fingerprint(self.root), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
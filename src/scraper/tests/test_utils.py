@@ -9,6 +9,7 @@ import time
 from datetime import datetime
 import sys
 import logging
+import base64
 import json
 import shutil
 import tempfile
@@ -19,6 +20,7 @@ from unittest.mock import MagicMock, patch
 # Disable logging of error messages during tests
 logging.disable(logging.ERROR)
 
+import numpy as np
 import pandas as pd
 
 # Import functions from your modules (adjust the import paths as needed)
@@ -36,6 +38,17 @@ from scraper.utils import (
     close_webdriver,
     launch_extraction,
     extract,
+    parse_product_cards,
+    fetch_collection_products,
+    launch_http_extraction,
+    harvest_product_cards,
+    DEFAULT_BLOCKED_URLS,
+    fetch_collection_cards,
+    launch_network_extraction,
+    products_from_payloads,
+    parse_prices,
+    PreprocessPipeline,
+    clean_stage,
 )
 from src.log_handler import setup_logging, log_error
 
@@ -102,6 +115,30 @@ class TestUtils(unittest.TestCase):
         # Check that the price column has been converted to a numeric type
         self.assertTrue(pd.api.types.is_numeric_dtype(cleaned_df["price"]))
 
+    def test_parse_prices_all_locales(self):
+        prices = pd.Series(["$6,000", "£5,200", "6\u00a0100\u00a0€", "￥913,000", "９１３，０００",
+                            "6.000,50 €", "$6,000.5", "N/A", None, "1,2345"], index=range(10, 20))
+        parsed = parse_prices(prices)
+        self.assertEqual(parsed.dtype, "float64")
+        self.assertEqual(list(parsed.index), list(range(10, 20)))
+        self.assertEqual(parsed.iloc[:7].tolist(), [6000.0, 5200.0, 6100.0, 913000.0, 913000.0, 6000.5, 6000.5])
+        # Unparseable values are marked instead of failing the whole column
+        self.assertTrue(parsed.iloc[7:].isna().all())
+
+    def test_parse_prices_numeric_passthrough(self):
+        parsed = parse_prices(pd.Series([6000, 5200]))
+        self.assertEqual(parsed.tolist(), [6000.0, 5200.0])
+
+    def test_clean_data_drops_only_unparseable_prices(self):
+        df = pd.DataFrame({
+            "reference": ["PAM01570", "PAM01571", "PAM01572"],
+            "price": ["$6,000", "price on request", "£5,200.50"],
+            "country": ["USA", "USA", "UK"],
+        })
+        cleaned_df = clean_data(df)
+        self.assertEqual(cleaned_df["reference"].tolist(), ["PAM01570", "PAM01572"])
+        self.assertEqual(cleaned_df["price"].tolist(), [6000.0, 5200.5])
+
     @patch("scraper.utils.get_exchange_rate", return_value=1.0)
     def test_transform_data(self, mock_get_exchange_rate):
         data = {
@@ -143,6 +180,47 @@ class TestUtils(unittest.TestCase):
         self.assertFalse(processed_df.empty)
         self.assertIn("currency_code", processed_df.columns)
 
+    @patch("scraper.utils.get_exchange_rate", return_value=2.0)
+    def test_launch_data_preprocess_stage_report(self, mock_get_exchange_rate):
+        df = pd.DataFrame({
+            "brand": ["PANERAI"] * 3,
+            "product_url": ["http://example.com/1", "http://example.com/1", "http://example.com/2"],
+            "image_url": ["http://img.com/1"] * 3,
+            "collection": ["Radiomir"] * 3,
+            "reference": ["PAM01570", "PAM01570", "PAM01571"],
+            "price": ["$6,000", "$6,000", "N/A"],
+            "currency": ["$"] * 3,
+            "country": ["USA"] * 3,
+            "year": [2025] * 3,
+            "note": ["a", "b", "c"],
+        })
+        original = df.copy()
+        report = []
+        processed_df = launch_data_preprocess(df, {"USA": "USD"}, stage_report=report)
+        self.assertEqual([stage["stage"] for stage in report],
+                         ["clean", "map_currency", "convert", "validate", "order"])
+        self.assertEqual(report[0]["row_delta"], -2)
+        self.assertEqual(processed_df["price_USD"].tolist(), [12000.0])
+        # The input frame is left untouched
+        pd.testing.assert_frame_equal(df, original)
+
+    def test_preprocess_pipeline_stops_on_failing_stage(self):
+        def broken(df):
+            raise ValueError("boom")
+
+        df = pd.DataFrame({"reference": ["PAM01570"], "price": ["$6,000"], "country": ["USA"]})
+        pipeline = PreprocessPipeline().then("clean", clean_stage).then("broken", broken).then("clean_again", clean_stage)
+        result = pipeline.run(df)
+        self.assertFalse(pipeline.ok)
+        self.assertEqual([report["status"] for report in pipeline.summary()], ["ok", "failed"])
+        self.assertEqual(result["price"].tolist(), [6000])
+
+    def test_clean_stage_shares_untouched_columns(self):
+        df = pd.DataFrame({"reference": ["PAM01570", "PAM01571"], "price": ["$6,000", "$6,100"],
+                           "country": ["USA", "USA"], "note": [1.0, 2.0]})
+        cleaned = clean_stage(df)
+        self.assertTrue(np.shares_memory(cleaned["note"].to_numpy(), df["note"].to_numpy()))
+
     def test_extract_product_info(self):
         # Create a dummy card (a stand-in for a Selenium WebElement)
         card = MagicMock()
@@ -194,6 +272,39 @@ class TestUtils(unittest.TestCase):
         driver = start_webdriver()
         self.assertEqual(driver, dummy_driver)
 
+    @patch("scraper.utils.webdriver.Chrome")
+    def test_start_webdriver_lean(self, mock_chrome):
+        dummy_driver = MagicMock()
+        mock_chrome.return_value = dummy_driver
+        driver = start_webdriver(debugging_port=9333, profile_dir="/tmp/profile", lean=True)
+        options = mock_chrome.call_args.kwargs["options"]
+        self.assertEqual(options.page_load_strategy, "eager")
+        self.assertIn("--remote-debugging-port=9333", options.arguments)
+        self.assertIn("--user-data-dir=/tmp/profile", options.arguments)
+        driver.execute_cdp_cmd.assert_any_call("Network.setBlockedURLs", {"urls": DEFAULT_BLOCKED_URLS})
+
+    @patch("scraper.utils.webdriver.Chrome")
+    def test_start_webdriver_default_is_not_lean(self, mock_chrome):
+        driver = start_webdriver()
+        options = mock_chrome.call_args.kwargs["options"]
+        self.assertEqual(options.page_load_strategy, "normal")
+        driver.execute_cdp_cmd.assert_not_called()
+
+    def test_launch_extraction_page_metrics(self):
+        driver = MagicMock()
+        driver.execute_script.side_effect = [
+            {"dom_content_loaded_ms": 812.5, "transfer_bytes": 150000, "requests": 12},
+            [],
+        ]
+        page_metrics = []
+        with patch("scraper.utils.WebDriverWait"):
+            launch_extraction(driver, "USA", "us/en", "RADIOMIR", "http://example.com/{}/{}.html",
+                              bulk=True, page_metrics=page_metrics)
+        self.assertEqual(len(page_metrics), 1)
+        self.assertEqual(page_metrics[0]["url"], "http://example.com/us/en/radiomir.html")
+        self.assertEqual(page_metrics[0]["transfer_bytes"], 150000)
+        self.assertIn("ready_ms", page_metrics[0])
+
     def test_launch_extraction(self):
         # Create a dummy driver
         driver = MagicMock()
@@ -218,6 +329,122 @@ class TestUtils(unittest.TestCase):
                 # Since slicing is done as [:len(cards)//2], only one product is processed
                 self.assertEqual(len(products), 1)
 
+    def test_launch_extraction_bulk(self):
+        tracking = json.dumps({"name": "Radiomir", "reference": "PAM01570", "price": "$6,000", "isAvailable": "true"})
+        cards = [
+            {"tracking": tracking, "href": "https://www.panerai.com/us/en/pam01570.html",
+             "image": "/content/dam/pam01570.png.transform.buybox.png"},
+            # Lazy image not loaded yet: no wait, the image URL falls back to "N/A"
+            {"tracking": tracking.replace("PAM01570", "PAM01571"), "href": "https://www.panerai.com/us/en/pam01571.html", "image": None},
+        ]
+        driver = MagicMock()
+        driver.execute_script.return_value = cards + cards
+        with patch("scraper.utils.WebDriverWait") as mock_wait:
+            mock_wait.return_value.until.return_value = True
+            products = launch_extraction(
+                driver, "USA", "us/en", "RADIOMIR",
+                "http://example.com/{}/collections/watch-collection/{}.html", bulk=True,
+            )
+        # One round trip for the whole page and no per-card element lookups
+        driver.execute_script.assert_called_once()
+        driver.find_elements.assert_not_called()
+        mock_wait.assert_called_once()
+        self.assertEqual([p["reference"] for p in products], ["PAM01570", "PAM01571"])
+        self.assertEqual(products[0]["image_url"], "https://www.panerai.com/content/dam/pam01570.png")
+        self.assertEqual(products[1]["image_url"], "N/A")
+        self.assertEqual(products[0]["country"], "USA")
+
+    @patch("scraper.utils.webdriver.Chrome")
+    def test_start_webdriver_capture_network(self, mock_chrome):
+        driver = start_webdriver(capture_network=True)
+        options = mock_chrome.call_args.kwargs["options"]
+        self.assertEqual(options.to_capabilities()["goog:loggingPrefs"], {"performance": "ALL"})
+        driver.execute_cdp_cmd.assert_called_once_with("Network.enable", {})
+
+    def test_launch_network_extraction(self):
+        def event(method, request_id, **params):
+            return {"message": json.dumps({"message": {"method": method, "params": dict(params, requestId=request_id)}})}
+        def response(request_id, url, mime_type):
+            return event("Network.responseReceived", request_id, response={"url": url, "mimeType": mime_type})
+        record = {"name": "Radiomir", "reference": "PAM01570", "collection": "Radiomir", "price": "$6,000",
+                  "isAvailable": True, "url": "/us/en/pam01570.html",
+                  "image": "/content/dam/pam01570.png.transform.buybox.png"}
+        untagged = {key: value for key, value in record.items() if key != "collection"}
+        # The grid does not tag its second record; the carousel repeats the grid's products
+        # and cross-sells another collection
+        grid = {"results": {"products": [record, dict(untagged, reference="PAM01571", isAvailable=False)]}}
+        carousel = {"items": [record], "recommendations": [dict(record, reference="PAM01312", collection="Luminor")]}
+        bodies = {"1": {"body": json.dumps(grid), "base64Encoded": False},
+                  "3": {"body": base64.b64encode(json.dumps(carousel).encode()).decode(), "base64Encoded": True}}
+        finished = set()
+        def get_response_body(command, params):
+            # Like Chromium: no body until the response has finished loading
+            if params["requestId"] not in finished:
+                raise Exception("No data found for resource with given identifier")
+            return bodies[params["requestId"]]
+        polls = [
+            [response("0", "http://example.com/old.json", "application/json")],
+            [response("1", "http://example.com/grid.json", "application/json"),
+             response("2", "http://example.com/app.js", "text/javascript"),
+             response("3", "http://example.com/carousel.json", "application/json; charset=utf-8"),
+             response("4", "http://example.com/stock.json", "application/json")],
+            [event("Network.loadingFinished", "1"), event("Network.loadingFinished", "2"),
+             event("Network.loadingFailed", "4")],
+            [event("Network.loadingFinished", "3")],
+        ]
+        def get_log(log_type):
+            entries = polls.pop(0) if polls else []
+            finished.update(json.loads(entry["message"])["message"]["params"]["requestId"] for entry in entries
+                            if "loadingFinished" in entry["message"])
+            return entries
+        driver = MagicMock()
+        driver.get_log.side_effect = get_log
+        driver.execute_cdp_cmd.side_effect = get_response_body
+
+        products = launch_network_extraction(driver, "USA", "us/en", "RADIOMIR",
+                                             "https://www.panerai.com/{}/collections/watch-collection/{}.html")
+        # Bodies are read once loaded, across drains; the previous page's and failed responses are dropped
+        self.assertEqual([call.args[1]["requestId"] for call in driver.execute_cdp_cmd.call_args_list], ["1", "3"])
+        driver.find_elements.assert_not_called()
+        driver.execute_script.assert_not_called()
+        self.assertEqual([p["reference"] for p in products], ["PAM01570", "PAM01571"])
+        self.assertEqual(products[0]["product_url"], "https://www.panerai.com/us/en/pam01570.html")
+        self.assertEqual(products[0]["image_url"], "https://www.panerai.com/content/dam/pam01570.png")
+        self.assertEqual([p["availability"] for p in products], ["Available", "Out of Stock"])
+        self.assertEqual(products[1]["country"], "USA")
+
+    def test_products_from_payloads_keep_the_page_collection(self):
+        payloads = [("http://example.com/search.json", {"products": [
+            {"reference": "PAM01404", "name": "Luminor Due", "collection": "Luminor Due"},
+            {"reference": "PAM01312", "name": "Luminor", "collection": "LUMINOR"},
+        ]}), ("http://example.com/recently-viewed.json", [
+            {"reference": "PAM01570", "name": "Radiomir", "collection": "Radiomir"},
+        ])]
+        products = products_from_payloads(payloads, "https://www.panerai.com/us/en/luminor-due.html", "LUMINOR-DUE")
+        self.assertEqual([p["reference"] for p in products], ["PAM01404"])
+        self.assertEqual(len(products_from_payloads(payloads, "https://www.panerai.com/")), 3)
+
+    def test_products_from_payloads_untagged_records(self):
+        # A catalog API that does not tag its records: every record is the page's
+        payloads = [("http://example.com/grid.json", {"products": [
+            {"reference": "PAM01404", "name": "Luminor Due", "price": "$8,000"},
+            {"reference": "PAM01329", "name": "Luminor Due", "price": "$39,200", "collection": ""},
+        ]})]
+        products = products_from_payloads(payloads, "https://www.panerai.com/us/en/luminor-due.html", "LUMINOR-DUE")
+        self.assertEqual([p["reference"] for p in products], ["PAM01404", "PAM01329"])
+
+    def test_launch_network_extraction_without_products(self):
+        driver = MagicMock()
+        driver.get_log.return_value = []
+        with patch("scraper.utils.WebDriverWait") as mock_wait:
+            mock_wait.return_value.until.side_effect = TimeoutError("no products")
+            self.assertEqual(launch_network_extraction(driver, "USA", "us/en", "RADIOMIR", "http://example.com/{}/{}.html"), [])
+
+    def test_harvest_product_cards_empty_page(self):
+        driver = MagicMock()
+        driver.execute_script.return_value = None
+        self.assertEqual(harvest_product_cards(driver), [])
+
     def test_extract_wrapper(self):
         card = MagicMock()
         with patch("scraper.utils.extract_product_info", return_value={"name": "dummy"}):
@@ -226,6 +453,94 @@ class TestUtils(unittest.TestCase):
                 self.assertEqual(product["country"], "USA")
                 self.assertEqual(product["year"], datetime.now().year)
 
+    def test_parse_product_cards_fixture(self):
+        fixture = os.path.join(os.path.dirname(__file__), "fixtures", "collection_page.html")
+        with open(fixture, encoding="utf-8") as f:
+            html = f.read()
+        page_url = "https://www.panerai.com/us/en/collections/watch-collection/radiomir.html"
+        products = parse_product_cards(html, page_url)
+        # Six cards on the page: the carousel half is dropped and the card without tracking data is skipped
+        self.assertEqual(len(products), 2)
+        self.assertEqual(products[0], {
+            "name": "Radiomir Quaranta",
+            "reference": "PAM01570",
+            "collection": "Radiomir",
+            "brand": "PANERAI",
+            "price": "$6,000",
+            "currency": "$",
+            "availability": "Available",
+            "product_url": "https://www.panerai.com/us/en/collections/watch-collection/radiomir/pam01570-radiomir-quaranta.html",
+            "image_url": "https://www.panerai.com/content/dam/rcq/pan/km/si/mL/Jw/F0/i4/ti/6H/nA/8r/_Q/kmsimLJwF0i4ti6HnA8r_Q.png",
+        })
+        self.assertEqual(products[1]["availability"], "Out of Stock")
+        self.assertEqual(products[1]["image_url"], "https://www.panerai.com/content/dam/rcq/pan/Ot/NA/-H/39/uE/Kv/rR/oH/H4/S8/hQ/OtNA-H39uEKvrRoHH4S8hQ.png")
+
+    def test_parse_product_cards_matches_selenium_path(self):
+        tracking_data = {"name": "Luminor Due", "reference": "PAM01329", "collection": "Luminor Due",
+                         "brand": "PANERAI", "price": "$39,200", "currency": "$", "isAvailable": "true"}
+        fake_attr = json.dumps(tracking_data).replace('"', '&quot;')
+        product_url = "https://www.panerai.com/us/en/collections/watch-collection/luminor-due/pam01329.html"
+        html = (
+            '<div class="pan-prod-ref-card-v2"><a class="pan-prod-ref-link-v2" href="%s" data-tracking-product="%s">'
+            '<div class="pan-prod-ref-front-image-v2"><img data-src="/content/dam/pam01329.png.transform.x.png"></div>'
+            '</a></div>' % (product_url, fake_attr)
+        ) * 2
+
+        card = MagicMock()
+        product_link_element = MagicMock()
+        product_link_element.get_attribute.side_effect = lambda attr: json.dumps(tracking_data) if attr == "data-tracking-product" else product_url
+        card.find_element.return_value = product_link_element
+        img_element = MagicMock()
+        img_element.get_attribute.side_effect = lambda attr: "/content/dam/pam01329.png.transform.x.png" if attr == "data-src" else None
+        with patch("scraper.utils.WebDriverWait") as mock_wait:
+            mock_wait.return_value.until.return_value = img_element
+            selenium_product = extract_product_info(card)
+
+        self.assertEqual(parse_product_cards(html, product_url), [selenium_product])
+
+    def test_fetch_collection_products(self):
+        session = MagicMock()
+        response = MagicMock()
+        response.text = '<div class="pan-prod-ref-card-v2"><a class="pan-prod-ref-link-v2" href="/p.html" data-tracking-product=\'{"reference": "PAM01570"}\'></a></div>' * 2
+        response.url = "https://www.panerai.com/us/en/collections/watch-collection/radiomir.html"
+        session.get.return_value = response
+        products = fetch_collection_products(
+            session, "USA", "us/en", "RADIOMIR", "https://www.panerai.com/{}/collections/watch-collection/{}.html"
+        )
+        session.get.assert_called_once_with("https://www.panerai.com/us/en/collections/watch-collection/radiomir.html", timeout=15)
+        self.assertEqual(len(products), 1)
+        self.assertEqual(products[0]["product_url"], "https://www.panerai.com/p.html")
+        self.assertEqual(products[0]["image_url"], "N/A")
+        self.assertEqual(products[0]["country"], "USA")
+        self.assertEqual(products[0]["year"], datetime.now().year)
+
+    def test_fetch_collection_cards_conditional(self):
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=304)
+        page = fetch_collection_cards(session, "http://example.com/radiomir.html", etag='"v1"',
+                                      last_modified="Fri, 07 Mar 2025 01:52:40 GMT")
+        session.get.assert_called_once_with(
+            "http://example.com/radiomir.html",
+            headers={"If-None-Match": '"v1"', "If-Modified-Since": "Fri, 07 Mar 2025 01:52:40 GMT"},
+            timeout=15,
+        )
+        self.assertTrue(page["not_modified"])
+        self.assertIsNone(page["cards"])
+
+        response = MagicMock(status_code=200, text='<div class="pan-prod-ref-card-v2"><a class="pan-prod-ref-link-v2" href="/p.html"></a></div>',
+                             headers={"ETag": '"v2"'}, url="http://example.com/radiomir.html")
+        session.get.return_value = response
+        page = fetch_collection_cards(session, "http://example.com/radiomir.html")
+        self.assertFalse(page["not_modified"])
+        self.assertEqual(page["etag"], '"v2"')
+        self.assertEqual(page["cards"], [{"tracking": None, "href": "/p.html", "image": None}])
+
+    def test_launch_http_extraction_on_error(self):
+        session = MagicMock()
+        session.get.side_effect = Exception("Connection reset")
+        products = launch_http_extraction(session, "USA", "us/en", "RADIOMIR", "http://example.com/{}/{}.html")
+        self.assertEqual(products, [])
+
 
 class TestLogHandler(unittest.TestCase):
     def test_log_error(self):
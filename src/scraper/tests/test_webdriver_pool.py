@@ -0,0 +1,140 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import queue
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from scraper.webdriver_pool import WebDriverPool
+
+
+def fake_driver(**kwargs):
+    driver = MagicMock()
+    driver.execute_script.return_value = 1
+    return driver
+
+
+class TestWebDriverPool(unittest.TestCase):
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_each_driver_gets_its_own_port_and_profile(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=2, base_port=9300)
+        first = pool.acquire()
+        second = pool.acquire()
+
+        ports = [call.kwargs["debugging_port"] for call in mock_start_webdriver.call_args_list]
+        profiles = [call.kwargs["profile_dir"] for call in mock_start_webdriver.call_args_list]
+        self.assertEqual(ports, [9300, 9301])
+        self.assertNotEqual(profiles[0], profiles[1])
+        self.assertTrue(all(os.path.isdir(profile) for profile in profiles))
+
+        pool.release(first)
+        pool.release(second)
+        pool.close()
+        self.assertEqual(mock_close_webdriver.call_count, 2)
+        self.assertFalse(any(os.path.exists(profile) for profile in profiles))
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_pool_is_bounded_and_reuses_drivers(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=1)
+        driver = pool.acquire()
+        # The only driver is busy: a second caller has to wait for it
+        with self.assertRaises(queue.Empty):
+            pool.acquire(timeout=0.01)
+        pool.release(driver)
+        self.assertIs(pool.acquire(), driver)
+        self.assertEqual(mock_start_webdriver.call_count, 1)
+        pool.release(driver)
+        pool.close()
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_failing_driver_is_discarded(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=1, base_port=9400)
+        with self.assertRaises(RuntimeError):
+            with pool.driver() as driver:
+                raise RuntimeError("tab crashed")
+        mock_close_webdriver.assert_called_once_with(driver)
+        # The freed slot is reused with the same port
+        with pool.driver() as replacement:
+            self.assertIsNot(replacement, driver)
+        self.assertEqual(mock_start_webdriver.call_args.kwargs["debugging_port"], 9400)
+        pool.close()
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_discard_wakes_a_waiting_caller(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=1)
+        held = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(acquired, [])
+        # The holder's browser crashed: the waiter starts a fresh driver in the freed slot
+        pool.discard(held)
+        waiter.join(timeout=2)
+        self.assertFalse(waiter.is_alive())
+        self.assertIsNot(acquired[0], held)
+        self.assertEqual(mock_start_webdriver.call_count, 2)
+        pool.release(acquired[0])
+        pool.close()
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_drivers_are_recycled_by_uses_and_health(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=1, max_uses=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        pool.release(first)
+        # Served its two pages: replaced on the next checkout
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        mock_close_webdriver.assert_called_once_with(first)
+
+        # A browser that stopped answering is replaced as well
+        second.execute_script.side_effect = Exception("chrome not reachable")
+        pool.release(second)
+        third = pool.acquire()
+        self.assertIsNot(third, second)
+        self.assertEqual(pool.recycled, 2)
+        pool.release(third)
+        pool.close()
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_drivers_are_recycled_by_age(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=1, max_age=0.01)
+        first = pool.acquire()
+        pool.release(first)
+        time.sleep(0.02)
+        self.assertIsNot(pool.acquire(), first)
+        pool.close()
+
+    @patch("scraper.webdriver_pool.close_webdriver")
+    @patch("scraper.webdriver_pool.start_webdriver")
+    def test_warm_starts_every_driver(self, mock_start_webdriver, mock_close_webdriver):
+        mock_start_webdriver.side_effect = fake_driver
+        pool = WebDriverPool(size=3)
+        pool.warm()
+        status = pool.status()
+        self.assertEqual(status["started"], 3)
+        self.assertEqual(status["idle"], 3)
+        pool.close()
+        self.assertEqual(mock_close_webdriver.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,17 +10,49 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support import expected_conditions as EC
+import base64
+import contextlib
 import json
 import glob
 import os
 from datetime import datetime
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from log_handler import log_error  # Import the logging handler
+from scraper.fx_rates import get_default_fx_provider, RUN_DATE_COLUMN
+from scraper.schema import enforce_silver_schema
+from scraper.parquet_store import write_partitioned, read_partitioned
+from scraper.run_catalog import RunCatalog
+from scraper.run_metrics import get_default_metrics
+
+# Resources a lean browser never downloads: we only read DOM attributes
+DEFAULT_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*contentsquare.net*", "*onetrust.com*",
+]
+
+def start_webdriver(debugging_port=9222, profile_dir=None, lean=False, blocked_urls=None, capture_network=False):
+    """
+    Initialize the Chromium WebDriver with the specified service and options.
 
-def start_webdriver():
-    """Initialize the Chromium WebDriver with the specified service and options."""
+    Args:
+        debugging_port (int): Remote debugging port; must be unique per concurrent browser.
+        profile_dir (str): Optional user data directory, so concurrent browsers do not share a profile.
+        lean (bool): Use the eager page-load strategy and block images, fonts, video and trackers.
+        blocked_urls (list): URL patterns blocked in lean mode (defaults to DEFAULT_BLOCKED_URLS).
+        capture_network (bool): Record the DevTools network events in the 'performance' log
+            (see read_network_payloads).
+    """
     try:
         chrome_options = webdriver.ChromeOptions()
         # Enable headless mode for environments without a display
@@ -28,7 +60,17 @@ def start_webdriver():
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--remote-debugging-port=9222")
+        chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
+        if profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        if lean:
+            # Return from driver.get() once the DOM is parsed instead of waiting for every resource
+            chrome_options.page_load_strategy = "eager"
+            chrome_options.add_experimental_option(
+                "prefs", {"profile.managed_default_content_settings.images": 2}
+            )
+        if capture_network:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
         
         # Set the Chromium binary location (installed via apt)
         chrome_options.binary_location = "/usr/bin/chromium-browser"
@@ -36,6 +78,12 @@ def start_webdriver():
         # Use the Chromedriver installed via apt
         service = Service("/usr/lib/chromium-browser/chromedriver")
         driver = webdriver.Chrome(service=service, options=chrome_options)
+        if lean or capture_network:
+            driver.execute_cdp_cmd("Network.enable", {})
+        if lean:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {
+                "urls": DEFAULT_BLOCKED_URLS if blocked_urls is None else list(blocked_urls)
+            })
         return driver
     except Exception as e:
         print(f"Failed to start WebDriver: {str(e)}")
@@ -50,25 +98,54 @@ def close_webdriver(driver):
         log_error(f"Failed to close WebDriver: {str(e)}")
         raise
 
+def build_product_info(data_tracking, product_url, image_url):
+    """
+    Shape the raw attributes of a product card into a product dict.
+
+    Args:
+        data_tracking (str): Raw value of the 'data-tracking-product' attribute.
+        product_url (str): Absolute URL of the product page.
+        image_url (str): Main product image URL (see format_image_url).
+
+    Returns:
+        dict: Product information, or None if the card carries no tracking data.
+    """
+    if not data_tracking:
+        return None
+    return product_from_record(json.loads(data_tracking.replace("&quot;", '"')), product_url, image_url)
+
+def product_from_record(record, product_url, image_url):
+    """Shape a product's tracking record (the JSON behind 'data-tracking-product') into a product dict."""
+    return {
+        'name': record.get('name', 'N/A'),
+        'reference': record.get('reference', 'N/A'),
+        'collection': record.get('collection', 'N/A'),
+        'brand': record.get('brand', 'N/A'),
+        'price': record.get('price', 'N/A'),
+        'currency': record.get('currency', 'N/A'),
+        # JSON payloads carry a boolean, the card attribute the string 'true'
+        'availability': "Available" if str(record.get('isAvailable', 'false')).lower() == 'true' else "Out of Stock",
+        'product_url': product_url,
+        'image_url': image_url
+    }
+
+def format_image_url(main_image):
+    """Strip the rendition suffix from an image path and make it absolute."""
+    if main_image and "transform" in main_image:
+        main_image = main_image.split(".transform")[0]
+    return "https://www.panerai.com" + main_image if main_image else "N/A"
+
 def extract_product_info(card):
     """Extract the product's data from the 'data-tracking-product' attribute."""
     try:
         product_link_element = card.find_element(By.CLASS_NAME, "pan-prod-ref-link-v2")
         data_tracking = product_link_element.get_attribute("data-tracking-product")
         if data_tracking:
-            data_tracking = json.loads(data_tracking.replace("&quot;", '"'))
-            product_info = {
-                'name': data_tracking.get('name', 'N/A'),
-                'reference': data_tracking.get('reference', 'N/A'),
-                'collection': data_tracking.get('collection', 'N/A'),
-                'brand': data_tracking.get('brand', 'N/A'),
-                'price': data_tracking.get('price', 'N/A'),
-                'currency': data_tracking.get('currency', 'N/A'),
-                'availability': "Available" if data_tracking.get('isAvailable', 'false') == 'true' else "Out of Stock",
-                'product_url': product_link_element.get_attribute('href'),
-                'image_url': extract_image_url(card)  # Added image URL extraction
-            }
-            return product_info
+            return build_product_info(
+                data_tracking,
+                product_link_element.get_attribute('href'),
+                extract_image_url(card)
+            )
         else:
             return None
     except Exception as e:
@@ -78,14 +155,12 @@ def extract_product_info(card):
 def extract_image_url(card):
     """Extract the main product image URL."""
     try:
-        img_element = WebDriverWait(card, 5).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ".pan-prod-ref-front-image-v2 img"))
-        )
+        with get_default_metrics().timer("webdriver_wait_seconds", backend="selenium", wait="card_image"):
+            img_element = WebDriverWait(card, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".pan-prod-ref-front-image-v2 img"))
+            )
         main_image = img_element.get_attribute("data-src") or img_element.get_attribute("src")
-        if main_image and "transform" in main_image:
-            main_image = main_image.split(".transform")[0]
-        image_url = "https://www.panerai.com" + main_image if main_image else "N/A"
-        return image_url
+        return format_image_url(main_image)
     except Exception as e:
         log_error(f"Error extracting image URL: {str(e)}")
         return "N/A"
@@ -97,45 +172,292 @@ def create_output_directory(stage):
     os.makedirs(output_dir, exist_ok=True)
     return output_dir
 
-def save_data(df, filename, output_dir):
-    """Save extracted data into a CSV file in the given directory."""
+def save_data(df, filename, output_dir, formats=("csv",)):
+    """
+    Save data into the given directory.
+
+    formats: any of 'csv' (<filename>.csv) and 'parquet' (<filename>/ dataset partitioned
+    by year/country, see scraper.parquet_store).
+    """
     if df.empty:
         print(f"No data to save for {filename}.")
         return None
     
-    file_path = os.path.join(output_dir, f"{filename}.csv")
-    df.to_csv(file_path, index=False)
-    print(f"Saved data for {filename} to {file_path}")
+    metrics = get_default_metrics()
+    if "csv" in formats:
+        file_path = os.path.join(output_dir, f"{filename}.csv")
+        with metrics.timer("save_seconds", format="csv"):
+            df.to_csv(file_path, index=False)
+        metrics.increment("rows_saved_total", len(df), format="csv")
+        print(f"Saved data for {filename} to {file_path}")
+    if "parquet" in formats:
+        with metrics.timer("save_seconds", format="parquet"):
+            dataset_path = write_partitioned(df, os.path.join(output_dir, filename))
+        metrics.increment("rows_saved_total", len(df), format="parquet")
+        print(f"Saved data for {filename} to {dataset_path}")
     return df
 
-def launch_extraction(driver, country, country_url, collection, base_url):
+def load_data(file_path, columns=None):
+    """Read a file written by save_data: <name>.csv, or the <name>/ Parquet dataset when there is no CSV."""
+    dataset_path = os.path.splitext(file_path)[0]
+    if not os.path.exists(file_path) and os.path.isdir(dataset_path):
+        return read_partitioned(dataset_path, columns=columns)
+    return pd.read_csv(file_path, usecols=columns)
+
+def save_run_metrics(output_dir, name="run_metrics", layer=None, export=True):
+    """
+    Save the run summary of the default metrics registry (<name>.json and the Prometheus
+    <name>.prom, see scraper.run_metrics) next to the data files; never fails the run.
+    layer ('bronze', 'silver'...) keeps each layer's file apart in the textfile collector;
+    export=False keeps the summary out of the collector (e.g. one partition of a run).
+    """
+    try:
+        return get_default_metrics().write(output_dir, name, layer=layer, export=export)
+    except Exception as e:
+        log_error(f"Failed to save run metrics to {output_dir}: {str(e)}")
+        return None
+
+def save_json(data, filename, output_dir):
+    """Save a JSON document (reports, manifests) next to the data files of a run."""
+    file_path = os.path.join(output_dir, f"{filename}.json")
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    return file_path
+
+# Reads every card of the page in a single WebDriver round trip. 'href' is the resolved
+# link (what get_attribute('href') returns) and a lazy image that has not loaded yet is null.
+HARVEST_CARDS_SCRIPT = """
+return Array.from(document.getElementsByClassName('pan-prod-ref-card-v2')).map(function (card) {
+    var link = card.querySelector('.pan-prod-ref-link-v2');
+    var img = card.querySelector('.pan-prod-ref-front-image-v2 img');
+    return {
+        tracking: link ? link.getAttribute('data-tracking-product') : null,
+        href: link ? link.href : null,
+        image: img ? (img.getAttribute('data-src') || img.getAttribute('src')) : null
+    };
+});
+"""
+
+PAGE_METRICS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? nav.transferSize : 0;
+for (var i = 0; i < resources.length; i++) { bytes += resources[i].transferSize || 0; }
+return {
+    dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    transfer_bytes: bytes,
+    requests: resources.length + (nav ? 1 : 0)
+};
+"""
+
+def collect_page_metrics(driver):
+    """Read the navigation/resource timing of the current page (load time, bytes transferred)."""
+    try:
+        return driver.execute_script(PAGE_METRICS_SCRIPT) or {}
+    except Exception as e:
+        log_error(f"Error collecting page metrics: {str(e)}")
+        return {}
+
+def harvest_product_cards(driver):
+    """Return the raw attributes of every product card on the current page as plain dicts."""
+    return driver.execute_script(HARVEST_CARDS_SCRIPT) or []
+
+def render_collection_cards(driver, url):
+    """Load a collection page in the browser and harvest its raw card payloads (same dict as fetch_collection_cards)."""
+    metrics = get_default_metrics()
+    with metrics.timer("page_seconds", backend="selenium"):
+        try:
+            driver.get(url)
+            with metrics.timer("webdriver_wait_seconds", backend="selenium", wait="page"):
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "pan-prod-ref-card-v2"))
+                )
+            cards = harvest_product_cards(driver)
+        except Exception:
+            metrics.increment("pages_fetched_total", backend="selenium", status="error")
+            raise
+    metrics.increment("pages_fetched_total", backend="selenium", status="ok")
+    return {"cards": cards, "etag": None, "last_modified": None, "not_modified": False, "url": url}
+
+def launch_extraction(driver, country, country_url, collection, base_url, bulk=False, page_metrics=None):
+    """
+    Scrape one collection page for a country.
+
+    With bulk=True all cards are harvested in one execute_script call instead of
+    several WebDriver calls per card. When a page_metrics list is given, the page's
+    timing and transferred bytes are appended to it.
+    """
+    metrics = get_default_metrics()
+    started = time.perf_counter()
     try:
         collection_lower = collection.lower()
         url = base_url.format(country_url, collection_lower)
         driver.get(url)
         print(f"Scraping: {url}")
 
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "pan-prod-ref-card-v2"))
-        )
-        product_cards = driver.find_elements(By.CLASS_NAME, "pan-prod-ref-card-v2")
-        print(f"Found {len(product_cards)} products for collection: {collection}")
-
-        product_infos = []
-        for card in product_cards[:len(product_cards)//2]:
-            product_info = extract(country, card)
-            if product_info:
-                product_infos.append(product_info)
+        with metrics.timer("webdriver_wait_seconds", backend="selenium", wait="page"):
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "pan-prod-ref-card-v2"))
+            )
+        if page_metrics is not None:
+            page = {"country": country, "collection": collection, "url": url,
+                    "ready_ms": round((time.perf_counter() - started) * 1000, 1)}
+            page.update(collect_page_metrics(driver))
+            page_metrics.append(page)
+        if bulk:
+            cards = harvest_product_cards(driver)
+            print(f"Found {len(cards)} products for collection: {collection}")
+            product_infos = tag_products(build_products_from_cards(cards), country)
+        else:
+            cards = driver.find_elements(By.CLASS_NAME, "pan-prod-ref-card-v2")
+            print(f"Found {len(cards)} products for collection: {collection}")
+
+            product_infos = []
+            for card in cards[:len(cards)//2]:
+                product_info = extract(country, card)
+                if product_info:
+                    product_infos.append(product_info)
+        metrics.increment("cards_found_total", len(cards), country=country)
+        metrics.increment("products_parsed_total", len(product_infos), backend="selenium", country=country)
+        metrics.increment("pages_fetched_total", backend="selenium", status="ok")
         return product_infos
     except Exception as e:
         log_error(f"Error processing {collection} in {country}: {str(e)}")
+        metrics.increment("pages_fetched_total", backend="selenium", status="error")
         return []
+    finally:
+        metrics.observe("page_seconds", time.perf_counter() - started, backend="selenium")
     
+# Keys that hold the product page and the main image in the catalog's JSON records
+RECORD_URL_KEYS = ("url", "productUrl", "pdpUrl", "link", "href")
+RECORD_IMAGE_KEYS = ("image", "imageUrl", "mainImage", "img")
+
+def read_network_payloads(driver, pending=None):
+    """
+    Drain the browser's 'performance' log (start_webdriver(capture_network=True)) and return
+    the JSON responses whose body finished loading since the last call, as (url, payload)
+    pairs in completion order.
+
+    A JSON response is remembered on Network.responseReceived and its body is only read on
+    Network.loadingFinished: before that a large body is not there yet. Pass the same
+    `pending` dict (requestId -> response) to every call of a page, as the two events can
+    land in different drains. Failed requests, and bodies that are gone or not valid JSON,
+    are skipped.
+    """
+    pending = {} if pending is None else pending
+    payloads = []
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.responseReceived":
+                if "json" in (params["response"].get("mimeType") or ""):
+                    pending[params["requestId"]] = params["response"]
+                continue
+            if method == "Network.loadingFailed":
+                pending.pop(params.get("requestId"), None)
+                continue
+            if method != "Network.loadingFinished" or params.get("requestId") not in pending:
+                continue
+            response = pending.pop(params["requestId"])
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            text = base64.b64decode(body["body"]).decode("utf-8") if body.get("base64Encoded") else body["body"]
+            payloads.append((response.get("url"), json.loads(text)))
+        except Exception as e:
+            log_error(f"Skipping network response: {str(e)}", exc_info=False)
+    return payloads
+
+def find_product_records(payload):
+    """Yield the product records (dicts with a reference and a name or price) nested anywhere in a JSON payload."""
+    if isinstance(payload, dict):
+        if payload.get("reference") and ("name" in payload or "price" in payload):
+            yield payload
+            return
+        children = payload.values()
+    elif isinstance(payload, list):
+        children = payload
+    else:
+        return
+    for value in children:
+        yield from find_product_records(value)
+
+def same_collection(name, collection):
+    """Case-insensitive match of collection names, 'Luminor Due' == 'LUMINOR-DUE'."""
+    normalize = lambda value: " ".join(str(value).lower().replace("-", " ").replace("_", " ").split())
+    return name is not None and normalize(name) == normalize(collection)
+
+def in_collection(record, collection):
+    """
+    Whether a product record belongs to the page of `collection`: records tagged with a
+    collection must match it, untagged records are taken as the page's own.
+    """
+    return not record.get("collection") or same_collection(record["collection"], collection)
+
+def products_from_payloads(payloads, page_url, collection=None):
+    """
+    Turn captured JSON payloads into product dicts shaped like extract_product_info,
+    keeping the first record of every reference. With a collection, records tagged with
+    another collection are dropped (see in_collection), so the recommendation, recently-viewed
+    or cross-sell payloads a page also loads do not add other collections' products to it.
+    """
+    product_infos, seen = [], set()
+    for url, payload in payloads:
+        for record in find_product_records(payload):
+            if record["reference"] in seen:
+                continue
+            if collection is not None and not in_collection(record, collection):
+                continue
+            seen.add(record["reference"])
+            product_url = next((record[key] for key in RECORD_URL_KEYS if record.get(key)), None)
+            image = next((record[key] for key in RECORD_IMAGE_KEYS if isinstance(record.get(key), str) and record[key]), None)
+            image_url = image.split(".transform")[0] if image and image.startswith("http") else format_image_url(image)
+            product_infos.append(product_from_record(record, urljoin(page_url, product_url) if product_url else "N/A", image_url))
+    return product_infos
+
+def launch_network_extraction(driver, country, country_url, collection, base_url, timeout=10):
+    """
+    Extract one collection page from the product JSON the page loads, without DOM queries.
+
+    The driver must capture its network traffic (start_webdriver(capture_network=True)).
+    The page is loaded and the JSON responses are read back from the performance log until
+    they hold products of the collection; records tagged with other collections are ignored
+    and the rest deduplicated by reference, so the carousel duplicates the DOM path drops by halving
+    the card list never appear.
+    """
+    metrics = get_default_metrics()
+    started = time.perf_counter()
+    try:
+        url = base_url.format(country_url, collection.lower())
+        # Drop the responses of the previous page
+        driver.get_log("performance")
+        driver.get(url)
+        print(f"Capturing: {url}")
+
+        payloads, pending = [], {}
+        def products_captured(d):
+            payloads.extend(read_network_payloads(d, pending))
+            return any(in_collection(record, collection)
+                       for _, payload in payloads for record in find_product_records(payload))
+        with metrics.timer("webdriver_wait_seconds", backend="network", wait="payload"):
+            WebDriverWait(driver, timeout, poll_frequency=0.5).until(products_captured)
+        # Responses that finished while the last poll was being read
+        payloads.extend(read_network_payloads(driver, pending))
+
+        product_infos = products_from_payloads(payloads, url, collection)
+        print(f"Found {len(product_infos)} products for collection: {collection}")
+        metrics.increment("products_parsed_total", len(product_infos), backend="network", country=country)
+        metrics.increment("pages_fetched_total", backend="network", status="ok")
+        return tag_products(product_infos, country)
+    except Exception as e:
+        log_error(f"Error processing {collection} in {country}: {str(e)}")
+        metrics.increment("pages_fetched_total", backend="network", status="error")
+        return []
+    finally:
+        metrics.observe("page_seconds", time.perf_counter() - started, backend="network")
+
 def extract(country, card):
     try:
         product_info = extract_product_info(card)
-        image_url = extract_image_url(card)
-        # product_info["image"] = image_url
         product_info["country"] = country
         product_info["year"] = datetime.now().year
         return product_info
@@ -143,51 +465,432 @@ def extract(country, card):
         log_error(f"Error in data_extraction for {country}: {str(e)}")
         return None
     
-def get_exchange_rate(from_currency: str, to_currency: str) -> float:
+def start_http_session(pool_size=10, retries=3):
+    """
+    Create a pooled HTTP session for fetching collection pages without a browser.
+
+    With retries > 0, connection errors and 429/5xx answers are retried inside the adapter;
+    retries=0 leaves every failed request to the caller (e.g. the CrawlScheduler).
+    """
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)) if retries else 0
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml",
+    })
+    return session
+
+def close_http_session(session):
+    """Close the HTTP session and release its pooled connections."""
+    try:
+        if session:
+            session.close()
+    except Exception as e:
+        log_error(f"Failed to close HTTP session: {str(e)}")
+        raise
+
+class ProductCardParser(HTMLParser):
+    """
+    Collect the raw attributes of every '.pan-prod-ref-card-v2' card in a collection page.
+
+    Each card is reported as a dict with the 'data-tracking-product' value, the link 'href'
+    and the front image 'data-src' (or 'src'), i.e. what the Selenium path reads through the DOM.
+    """
+    VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                     "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = []
+        self._card = None
+        self._card_depth = 0
+        self._image_depth = 0
+
+    @staticmethod
+    def _classes(attrs):
+        return (attrs.get("class") or "").split()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = self._classes(attrs)
+        if self._card is None:
+            if "pan-prod-ref-card-v2" in classes:
+                self._card = {"tracking": None, "href": None, "image": None}
+                self._card_depth = 1
+            return
+
+        if "pan-prod-ref-link-v2" in classes and self._card["tracking"] is None:
+            self._card["tracking"] = attrs.get("data-tracking-product")
+            self._card["href"] = attrs.get("href")
+        if tag == "img" and self._image_depth and self._card["image"] is None:
+            self._card["image"] = attrs.get("data-src") or attrs.get("src")
+
+        if tag in self.VOID_ELEMENTS:
+            return
+        self._card_depth += 1
+        if self._image_depth:
+            self._image_depth += 1
+        elif "pan-prod-ref-front-image-v2" in classes:
+            self._image_depth = 1
+
+    def handle_endtag(self, tag):
+        if self._card is None or tag in self.VOID_ELEMENTS:
+            return
+        if self._image_depth:
+            self._image_depth -= 1
+        self._card_depth -= 1
+        if self._card_depth == 0:
+            self.cards.append(self._card)
+            self._card = None
+
+def parse_product_cards(html, page_url):
+    """
+    Parse the product cards of a collection page into product dicts.
+
+    Args:
+        html (str): Collection page markup.
+        page_url (str): URL the page was fetched from, used to resolve relative links.
+
+    Returns:
+        list: Product dicts shaped like extract_product_info (cards without tracking data are skipped).
+    """
+    parser = ProductCardParser()
+    parser.feed(html)
+    parser.close()
+    return build_products_from_cards(parser.cards, page_url)
+
+def tag_products(product_infos, country):
+    """Stamp product dicts with the country and extraction year, as extract() does."""
+    year = datetime.now().year
+    for product_info in product_infos:
+        product_info["country"] = country
+        product_info["year"] = year
+    return product_infos
+
+def build_products_from_cards(cards, page_url=None):
+    """
+    Turn raw card payloads ({'tracking', 'href', 'image'}) into product dicts.
+
+    Args:
+        cards (list): Card payloads in page order, as harvested from the DOM or the markup.
+        page_url (str): Base URL for relative links; None when hrefs are already absolute.
+
+    Returns:
+        list: Product dicts shaped like extract_product_info (cards without tracking data are skipped).
+    """
+    product_infos = []
+    # Same rule as launch_extraction: the second half of the cards is the duplicated carousel
+    for card in cards[:len(cards)//2]:
+        try:
+            product_url = card.get("href")
+            if product_url and page_url:
+                product_url = urljoin(page_url, product_url)
+            product_info = build_product_info(card.get("tracking"), product_url, format_image_url(card.get("image")))
+            if product_info:
+                product_infos.append(product_info)
+        except Exception as e:
+            log_error(f"Error processing product: {str(e)}")
+    return product_infos
+
+def fetch_collection_products(session, country, country_url, collection, base_url, timeout=15):
+    """
+    Fetch a collection page over HTTP and return its products; raises on network errors.
+    """
+    metrics = get_default_metrics()
+    url = base_url.format(country_url, collection.lower())
+    print(f"Fetching: {url}")
+    with metrics.timer("page_seconds", backend="http"):
+        try:
+            response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+        except Exception:
+            metrics.increment("pages_fetched_total", backend="http", status="error")
+            raise
+        product_infos = parse_product_cards(response.text, response.url or url)
+    print(f"Found {len(product_infos)} products for collection: {collection}")
+    metrics.increment("products_parsed_total", len(product_infos), backend="http", country=country)
+    metrics.increment("pages_fetched_total", backend="http", status="ok")
+    return tag_products(product_infos, country)
+
+def fetch_collection_cards(session, url, etag=None, last_modified=None, timeout=15):
+    """
+    Conditional GET of a collection page, returning its raw card payloads.
+
+    Returns:
+        dict: 'cards' (None when the server answered 304 Not Modified), 'etag',
+              'last_modified', 'not_modified' and the final 'url'.
+    """
+    metrics = get_default_metrics()
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    with metrics.timer("page_seconds", backend="http"):
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304:
+                metrics.increment("pages_fetched_total", backend="http", status="not_modified")
+                return {"cards": None, "etag": etag, "last_modified": last_modified, "not_modified": True, "url": url}
+            response.raise_for_status()
+        except Exception:
+            metrics.increment("pages_fetched_total", backend="http", status="error")
+            raise
+        parser = ProductCardParser()
+        parser.feed(response.text)
+        parser.close()
+    metrics.increment("pages_fetched_total", backend="http", status="ok")
+    return {
+        "cards": parser.cards,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "not_modified": False,
+        "url": response.url or url,
+    }
+
+def launch_http_extraction(session, country, country_url, collection, base_url):
+    """Browserless counterpart of launch_extraction."""
+    try:
+        return fetch_collection_products(session, country, country_url, collection, base_url)
+    except Exception as e:
+        log_error(f"Error processing {collection} in {country}: {str(e)}")
+        return []
+
+def get_exchange_rate(from_currency: str, to_currency: str, provider=None) -> float:
     """
     Fetches real-time exchange rates using ExchangeRate-API.
+
+    Rates come from an ExchangeRateProvider (the process-wide one by default), which makes
+    one request per base currency and caches the response, so converting between N
+    currencies costs N requests at most instead of N x N.
     
     Args:
         from_currency (str): Base currency (e.g., 'USD').
         to_currency (str): Target currency (e.g., 'EUR').
+        provider (ExchangeRateProvider): Optional provider (cache, TTL, offline replay settings).
 
     Returns:
         float: Exchange rate from 'from_currency' to 'to_currency', or None if an error occurs.
     """
+    metrics = get_default_metrics()
     if from_currency.upper() == to_currency.upper():
+        metrics.increment("fx_calls_total", source="identity")
         return 1.0
-        
-    load_dotenv()
 
-    EXCHANGE_API_KEY = os.getenv("EXCHANGE_API_KEY")
-    if not EXCHANGE_API_KEY:
-        log_error("Missing API key")
-        return None
+    if provider is None:
+        provider = get_default_fx_provider()
+    metrics.increment("fx_calls_total", source="provider")
+    return provider.get_rate(from_currency, to_currency)
 
-    url = f"https://v6.exchangerate-api.com/v6/{EXCHANGE_API_KEY}/latest/{from_currency.upper()}"
-    print(url)
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+# Thousands groups of 3 digits, optionally followed by a 1-2 digit decimal part, with either
+# '.' or ',' as separator: '6,000', '6 100' (spaces are stripped), '6.000,50', '913,000.5'
+PRICE_PATTERN = r"^(?P<units>\d+(?:[.,]\d{3})*)(?:[.,](?P<decimals>\d{1,2}))?$"
 
-        if "conversion_rates" not in data:
-            raise ValueError("Invalid API response: missing 'conversion_rates'")
+def parse_prices(prices):
+    """
+    Vectorized price parser for the four locales (USD '$6,000', GBP '£5,200',
+    EUR '6\u00a0100\u00a0€', JPY '￥913,000', full-width digits included).
 
-        rate = data["conversion_rates"].get(to_currency.upper())
-        if rate is None:
-            raise ValueError(f"Exchange rate for {to_currency.upper()} not found in API response")
+    Args:
+        prices (pd.Series): Raw prices (strings, or already numeric).
 
-        return rate
+    Returns:
+        pd.Series: float64 prices on the same index; NaN marks values that cannot be parsed.
+    """
+    if pd.api.types.is_numeric_dtype(prices):
+        return prices.astype('float64')
+
+    # A catalog has few distinct price strings: parse each once and broadcast back
+    codes, uniques = pd.factorize(prices, use_na_sentinel=True)
+    # NFKC folds full-width digits, separators and the full-width yen sign to ASCII
+    text = pd.Series(uniques, dtype='string').str.normalize('NFKC').str.replace(r'[^\d.,]', '', regex=True)
+    parts = text.str.extract(PRICE_PATTERN)
+    units = parts['units'].str.replace(r'[.,]', '', regex=True)
+    parsed = pd.to_numeric(units + '.' + parts['decimals'].fillna('0'), errors='coerce').to_numpy(dtype='float64')
+    values = np.append(parsed, np.nan)[codes]  # code -1 (missing) picks the trailing NaN
+    return pd.Series(values, index=prices.index, name=prices.name)
+
+@dataclass
+class StageReport:
+    """Timing and row counts of one preprocessing stage."""
+    name: str
+    rows_in: int
+    rows_out: int
+    seconds: float
+    status: str = "ok"
+
+    @property
+    def row_delta(self) -> int:
+        return self.rows_out - self.rows_in
+
+    def to_dict(self) -> dict:
+        return {"stage": self.name, "status": self.status, "rows_in": self.rows_in, "rows_out": self.rows_out,
+                "row_delta": self.row_delta, "seconds": round(self.seconds, 4)}
+
+
+class PreprocessPipeline:
+    """
+    Chain of DataFrame -> DataFrame stages, run in order.
 
-    except requests.exceptions.RequestException as e:
-        log_error(f"Network error: {e}")
-    except ValueError as e:
-        log_error(f"Data error: {e}")
-    except Exception as e:
-        log_error(f"Unexpected error: {e}")
+    Stages never copy the whole frame: rows are filtered once with a single mask and new
+    columns are added with `assign`, which under copy-on-write (always on with pandas >= 3)
+    shares the existing column buffers. Every run records a StageReport per stage in `reports`.
+    A stage that raises stops the pipeline (`ok` becomes False) and the frame as of the last
+    successful stage is returned; a stage returning an empty frame also ends the run.
+
+        pipeline = PreprocessPipeline().then("clean", clean_stage).then("order", order_stage)
+        df = pipeline.run(raw_df)
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.reports = []
+        self.ok = True
+
+    def then(self, name: str, stage, **kwargs) -> "PreprocessPipeline":
+        """Append a stage; keyword arguments are passed to it on every run."""
+        self.stages.append((name, stage, kwargs))
+        return self
+
+    def run(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        self.reports = []
+        self.ok = True
+        df = dataframe
+        with _copy_on_write():
+            for name, stage, kwargs in self.stages:
+                if df.empty:
+                    break
+                start = time.perf_counter()
+                try:
+                    result = stage(df, **kwargs)
+                except Exception as e:
+                    log_error(f"PreprocessPipeline: {name} stage failed - {str(e)}")
+                    self.reports.append(StageReport(name, len(df), len(df), time.perf_counter() - start, "failed"))
+                    get_default_metrics().observe("preprocess_stage_seconds", self.reports[-1].seconds, stage=name)
+                    self.ok = False
+                    return df
+                self.reports.append(StageReport(name, len(df), len(result), time.perf_counter() - start))
+                get_default_metrics().observe("preprocess_stage_seconds", self.reports[-1].seconds, stage=name)
+                df = result
+        return df
+
+    def summary(self) -> list:
+        return [report.to_dict() for report in self.reports]
+
+
+def _copy_on_write():
+    """Enable copy-on-write on pandas 2.x; it is always on (and the option deprecated) from pandas 3."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return contextlib.nullcontext()
+    return pd.option_context("mode.copy_on_write", True)
+
+
+def clean_stage(df):
+    """Drop rows without reference or price, duplicates and unparseable prices, in a single row filter."""
+    metrics = get_default_metrics()
+    keep = (df['reference'].notna() & df['price'].notna()).to_numpy()
+    if (missing := int((~keep).sum())) > 0:
+        log_error(f"clean_data: Removed {missing} rows with missing values")
+        metrics.increment("rows_dropped_total", missing, step="missing_values")
+
+    # Deduplication (per run when several runs are cleaned together)
+    dedup_subset = ['reference', 'country'] + ([RUN_DATE_COLUMN] if RUN_DATE_COLUMN in df.columns else [])
+    duplicated = np.zeros(len(df), dtype=bool)
+    duplicated[keep] = df.loc[keep, dedup_subset].duplicated().to_numpy()
+    if (dup_count := int(duplicated.sum())) > 0:
+        log_error(f"clean_data: Removing {dup_count} duplicates")
+        metrics.increment("rows_dropped_total", dup_count, step="duplicates")
+    keep = keep & ~duplicated
+
+    # Parse the locale-formatted prices; unparseable ones come back as NaN
+    prices = parse_prices(df['price']).to_numpy()
+    invalid = keep & np.isnan(prices)
+    if (invalid_prices := int(invalid.sum())) > 0:
+        log_error(f"clean_data: {invalid_prices} invalid price values")
+        metrics.increment("rows_dropped_total", invalid_prices, step="invalid_prices")
+    keep = keep & ~invalid
+
+    prices = prices[keep]
+    if (prices % 1 == 0).all():
+        prices = prices.astype('int64')
+    if not keep.all():
+        df = df.loc[keep]
+    return df.assign(price=prices)
+
+
+def map_currency_stage(df, CURRENCIES_CODE):
+    """Add the ISO currency code of each row's country."""
+    currency_codes = df["country"].map(CURRENCIES_CODE)
+    if (missing_codes := currency_codes.isna().sum()) > 0:
+        log_error(f"transform_data: {missing_codes} missing currency mappings")
+    return df.assign(currency_code=currency_codes)
+
+
+def convert_stage(df, CURRENCIES_CODE, fx_provider=None, fx_table=None, rate_date=None):
+    """Add one price_<code> column per target currency (live rates, or point-in-time with fx_table)."""
+    valid_currencies = set(CURRENCIES_CODE.values())
+    if fx_table is not None:
+        # Point-in-time conversion: as-of join on each row's run date (or rate_date)
+        converted = fx_table.convert(df, sorted(valid_currencies), date=rate_date)
+        if (missing_rates := converted.isna().any(axis=1).sum()) > 0:
+            log_error(f"transform_data: {missing_rates} rows without a known rate as of their date")
+        return df.assign(**{col_name: converted[col_name] for col_name in converted.columns})
+
+    # Extract unique source currencies that are valid
+    currency_codes = df['currency_code'].astype(object)
+    unique_source_currencies = currency_codes[currency_codes.isin(valid_currencies)].unique()
+
+    # Precompute exchange rates for each (source, target) pair
+    exchange_rates = {}
+    for source_currency in unique_source_currencies:
+        for target_currency in valid_currencies:
+            rate = get_exchange_rate(source_currency, target_currency, provider=fx_provider)
+            if rate is None:
+                log_error(f"transform_data: Failed rate fetch for {source_currency}->{target_currency}")
+            exchange_rates[(source_currency, target_currency)] = rate
+
+    # For each target currency, map source currency -> rate and multiply in one vectorized pass
+    converted = {}
+    for target_currency in valid_currencies:
+        rate_mapping = {
+            source: exchange_rates[(source, target_currency)]
+            for source in unique_source_currencies
+            if exchange_rates[(source, target_currency)] is not None
+        }
+        converted[f"price_{target_currency}"] = df['price'] * currency_codes.map(rate_mapping)
+    return df.assign(**converted)
+
+
+def validate_stage(df):
+    """Check that the silver columns are present; an empty frame ends the pipeline otherwise."""
+    required_columns = {'brand', 'product_url', 'image_url', 'collection',
+                        'reference', 'price', 'currency', 'country', 'year'}
+    missing_cols = required_columns - set(df.columns)
+    if missing_cols:
+        log_error(f"clean_data: Missing required columns {missing_cols}")
+        return pd.DataFrame()
+    return df
 
-    return None  # Return None in case of an error
+
+def order_stage(df):
+    """Canonical column order and compact silver dtypes."""
+    return enforce_silver_schema(df)
+
+
+def build_preprocess_pipeline(CURRENCIES_CODE, fx_provider=None, fx_table=None, rate_date=None, clean=True):
+    """clean -> map currency -> convert -> validate -> order columns."""
+    pipeline = PreprocessPipeline()
+    if clean:
+        pipeline.then("clean", clean_stage)
+    return (pipeline
+            .then("map_currency", map_currency_stage, CURRENCIES_CODE=CURRENCIES_CODE)
+            .then("convert", convert_stage, CURRENCIES_CODE=CURRENCIES_CODE, fx_provider=fx_provider,
+                  fx_table=fx_table, rate_date=rate_date)
+            .then("validate", validate_stage)
+            .then("order", order_stage))
 
 def clean_data(dataframe):
     """
@@ -199,167 +902,93 @@ def clean_data(dataframe):
     Returns:
         pd.DataFrame: Cleaned DataFrame. Returns empty DataFrame on critical errors.
     """
-    try:
-        # Validate input type
-        if not isinstance(dataframe, pd.DataFrame):
-            log_error("clean_data: Input is not a pandas DataFrame")
-            return pd.DataFrame()
-
-        if dataframe.empty:
-            return dataframe.copy()
-
-        df = dataframe.copy()
-        
-        # Handle missing values
-        try:
-            initial_count = len(df)
-            df.dropna(subset=['reference', 'price'], inplace=True)
-            if (diff := initial_count - len(df)) > 0:
-                log_error(f"clean_data: Removed {diff} rows with missing values")
-        except Exception as e:
-            log_error(f"clean_data: Error handling missing values - {str(e)}")
-        
-        # Deduplication
-        try:
-            dup_count = df.duplicated(subset=['reference', 'country']).sum()
-            if dup_count > 0:
-                log_error(f"clean_data: Removing {dup_count} duplicates")
-                df.drop_duplicates(subset=['reference', 'country'], keep='first', inplace=True)
-        except Exception as e:
-            log_error(f"clean_data: Deduplication failed - {str(e)}")
-        
-        # Price cleaning with validation
-        try:
-            # Remove currency symbols and convert to float values
-            if df["price"].dtype == 'object':
-                df['price'] = df['price'].str.replace(r'[￥$£€, \u00A0]', '', regex=True).astype(int)
-            
-            # Validate numeric conversion
-            if (invalid_prices := df['price'].isna().sum()) > 0:
-                log_error(f"clean_data: {invalid_prices} invalid price values")
-                df = df.dropna(subset=['price'])
-        except Exception as e:
-            log_error(f"clean_data: Price cleaning failed - {str(e)}")
-            return df if 'price' in df.columns else pd.DataFrame()
-
-        return df
-
-    except Exception as e:
-        log_error(f"clean_data: Critical error - {str(e)}")
+    # Validate input type
+    if not isinstance(dataframe, pd.DataFrame):
+        log_error("clean_data: Input is not a pandas DataFrame")
         return pd.DataFrame()
 
+    if dataframe.empty:
+        return dataframe.copy()
 
-def transform_data(dataframe, CURRENCIES_CODE):
+    pipeline = PreprocessPipeline().then("clean", clean_stage)
+    with get_default_metrics().timer("stage_seconds", stage="clean_data"):
+        df = pipeline.run(dataframe)
+    return df if pipeline.ok else pd.DataFrame()
+
+def transform_data(dataframe, CURRENCIES_CODE, fx_provider=None, fx_table=None, rate_date=None):
     """
     Transforms data with currency conversions and error handling.
     
     Args:
         dataframe (pd.DataFrame): Cleaned DataFrame
         CURRENCIES_CODE (dict): Currency mapping dictionary
+        fx_provider (ExchangeRateProvider): Optional rate provider, see get_exchange_rate
+        fx_table (FxRateTable): Convert with historical rates as of each row's 'run_date'
+            (or rate_date) instead of live rates
+        rate_date: Date used by fx_table for rows without a 'run_date'
         
     Returns:
-        pd.DataFrame: Transformed DataFrame. Returns input on error.
+        pd.DataFrame: Transformed DataFrame in the silver schema (scraper.schema). Returns input on error.
     """
-    try:
-        # Validate inputs
-        if not isinstance(dataframe, pd.DataFrame) or dataframe.empty:
-            log_error("transform_data: Invalid input DataFrame")
-            return dataframe
-        
-        if not isinstance(CURRENCIES_CODE, dict) or not CURRENCIES_CODE:
-            log_error("transform_data: Invalid currency code mapping")
-            return dataframe
-
-        df = dataframe.copy()
-
-        # Currency code mapping
-        try:
-            df["currency_code"] = df["country"].map(CURRENCIES_CODE)
-            if (missing_codes := df["currency_code"].isna().sum()) > 0:
-                log_error(f"transform_data: {missing_codes} missing currency mappings")
-        except Exception as e:
-            log_error(f"transform_data: Currency mapping failed - {str(e)}")
-            return df
-
-        # # Currency conversion
-        try:
-            valid_currencies = set(CURRENCIES_CODE.values())
-            # Extract unique source currencies that are valid
-            unique_source_currencies = df.loc[df['currency_code'].isin(valid_currencies), 'currency_code'].unique()
-
-            # Precompute exchange rates for each (source, target) pair
-            exchange_rates = {}
-            for source_currency in unique_source_currencies:
-                for target_currency in valid_currencies:
-                    rate = get_exchange_rate(source_currency, target_currency)
-                    if rate is None:
-                        log_error(f"transform_data: Failed rate fetch for {source_currency}->{target_currency}")
-                    exchange_rates[(source_currency, target_currency)] = rate
-            
-            # For each target currency, build a mapping from source currency to exchange rate
-            for target_currency in valid_currencies:
-                col_name = f"price_{target_currency}"
-                rate_mapping = {
-                    source: exchange_rates[(source, target_currency)]
-                    for source in unique_source_currencies
-                    if exchange_rates[(source, target_currency)] is not None
-                }
-                # Use vectorized mapping to apply the conversion
-                df[col_name] = df['price'] * df['currency_code'].map(rate_mapping)
-        except Exception as e:
-            log_error(f"transform_data: Currency conversion failed - {str(e)}")
-            return df
-
-        
-        # Validate required columns
-        required_columns = {'brand', 'product_url', 'image_url', 'collection',
-                           'reference', 'price', 'currency', 'country', 'year'}
-        missing_cols = required_columns - set(df.columns)
-        if missing_cols:
-            log_error(f"clean_data: Missing required columns {missing_cols}")
-            return pd.DataFrame()
-        
-        try:
-            # Column reordering with fallback for missing columns
-            column_list_ref = list(required_columns)
-            remaining_columns = [col for col in df.columns if col not in required_columns]
-            df = df[column_list_ref + remaining_columns]
-        except KeyError as e:
-            log_error(f"clean_data: Column reordering failed - {str(e)}")
-            return pd.DataFrame()
-
-        return df
-
-    except Exception as e:
-        log_error(f"transform_data: Critical error - {str(e)}")
+    # Validate inputs
+    if not isinstance(dataframe, pd.DataFrame) or dataframe.empty:
+        log_error("transform_data: Invalid input DataFrame")
+        return dataframe
+    
+    if not isinstance(CURRENCIES_CODE, dict) or not CURRENCIES_CODE:
+        log_error("transform_data: Invalid currency code mapping")
         return dataframe
 
-def launch_data_preprocess(dataframe, CURRENCIES_CODE):
+    pipeline = build_preprocess_pipeline(CURRENCIES_CODE, fx_provider=fx_provider, fx_table=fx_table,
+                                         rate_date=rate_date, clean=False)
+    with get_default_metrics().timer("stage_seconds", stage="transform_data"):
+        df = pipeline.run(dataframe)
+    return df if pipeline.ok else dataframe
+
+def launch_data_preprocess(dataframe, CURRENCIES_CODE, fx_provider=None, fx_table=None, rate_date=None,
+                           stage_report=None):
     """
     Cleans and transforms the dataset.
     
     Args:
         dataframe (pd.DataFrame): Input DataFrame containing watch product data.
         CURRENCIES_CODE (dict): Dictionary mapping currency symbols to standard codes.
+        fx_provider (ExchangeRateProvider): Optional rate provider for the conversions.
+        fx_table (FxRateTable): Optional point-in-time rate table (see transform_data).
+        rate_date: Date of the rates used with fx_table.
+        stage_report (list): If given, receives one timing / row-delta dict per stage.
         
     Returns:
         pd.DataFrame: Processed DataFrame with standardized and converted prices.
     """
-    # First clean the data
-    cleaned_df = clean_data(dataframe)
-    
-    # Then transform the data
-    transformed_df = transform_data(cleaned_df, CURRENCIES_CODE)
-    
-    return transformed_df
+    if not isinstance(dataframe, pd.DataFrame):
+        log_error("clean_data: Input is not a pandas DataFrame")
+        return pd.DataFrame()
+    if not isinstance(CURRENCIES_CODE, dict) or not CURRENCIES_CODE:
+        log_error("transform_data: Invalid currency code mapping")
+        return pd.DataFrame()
+
+    pipeline = build_preprocess_pipeline(CURRENCIES_CODE, fx_provider=fx_provider, fx_table=fx_table,
+                                         rate_date=rate_date)
+    with get_default_metrics().timer("stage_seconds", stage="preprocess"):
+        df = pipeline.run(dataframe)
+    if stage_report is not None:
+        stage_report.extend(pipeline.summary())
+    return df if pipeline.ok else pd.DataFrame()
 
 def get_latest_folder(path):
-    # Get a list of all directories in the given path
-    folders = [f for f in glob.glob(os.path.join(path, f"{datetime.now().year}-*")) if os.path.isdir(f)]
-    
-    # Sort folders based on modification time (newest first) and return the first one
-    if folders:
-        latest_folder = max(folders, key=os.path.getmtime)
+    """
+    Latest run folder of a stage folder ('data/bronze/'): the latest successful run recorded
+    in the run catalog (data/runs/) when there is one, else the run folder with the highest
+    name (run folders are named by timestamp, so this holds across years).
+    """
+    catalog, stage = RunCatalog.for_stage_dir(path)
+    latest_folder = catalog.latest_path(stage)
+    if latest_folder:
         return latest_folder
+
+    folders = [f for f in glob.glob(os.path.join(path, "[0-9]*-*")) if os.path.isdir(f)]
+    if folders:
+        return max(folders, key=os.path.basename)
     else:
         return None
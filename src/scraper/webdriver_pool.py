@@ -0,0 +1,211 @@
+import os
+import time
+from datetime import datetime
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import collections
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+from contextlib import contextmanager
+from scraper.utils import start_webdriver, close_webdriver
+from log_handler import log_error
+
+
+def free_port() -> int:
+    """A TCP port that is free right now, for a browser started outside a shared pool."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class WebDriverPool:
+    """
+    Bounded pool of headless Chromium drivers.
+
+    Drivers are started lazily, up to `size`, each with its own remote debugging port
+    and profile directory so several browsers can run side by side on one host.
+    Extra keyword arguments (e.g. lean, blocked_urls) are passed on to start_webdriver.
+
+    Drivers are recycled when they are older than `max_age` seconds, have served
+    `max_uses` pages, or fail a health check when taken from the pool.
+
+    Idle drivers and free slots are guarded by one condition: release() and discard() both
+    wake a caller waiting in acquire(), which then takes the driver or starts a new one.
+    """
+
+    def __init__(self, size: int = 2, base_port: int = 9222, max_age: float = None,
+                 max_uses: int = None, **driver_options):
+        if size < 1:
+            raise ValueError("WebDriverPool size must be at least 1")
+        self.size = size
+        self.base_port = base_port
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.driver_options = driver_options
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._started = 0
+        self._slots = {}  # id(driver) -> {"port", "profile_dir", "started_at", "uses"}
+        self._free_ports = []
+        self._closed = False
+        self.recycled = 0
+
+    def _reserve_port_locked(self):
+        """Reserve a slot (the lock is held); returns its port, or None when the pool is full."""
+        if self._started >= self.size:
+            return None
+        if self._free_ports:
+            port = self._free_ports.pop()
+        else:
+            port = self.base_port + self._started
+        self._started += 1
+        return port
+
+    def _reserve_port(self):
+        with self._lock:
+            return self._reserve_port_locked()
+
+    def _free_slot(self, port) -> None:
+        with self._available:
+            self._started -= 1
+            if port is not None:
+                self._free_ports.append(port)
+            self._available.notify()
+
+    def _start_driver(self, port):
+        profile_dir = tempfile.mkdtemp(prefix=f"chromium-profile-{port}-")
+        try:
+            driver = start_webdriver(debugging_port=port, profile_dir=profile_dir, **self.driver_options)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            self._free_slot(port)
+            raise
+        self._slots[id(driver)] = {"port": port, "profile_dir": profile_dir,
+                                   "started_at": time.monotonic(), "uses": 0}
+        return driver
+
+    def is_healthy(self, driver) -> bool:
+        """A driver is healthy if its browser still answers a trivial script."""
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _needs_recycling(self, driver) -> bool:
+        slot = self._slots.get(id(driver))
+        if slot is None:
+            return True
+        if self.max_age is not None and time.monotonic() - slot["started_at"] > self.max_age:
+            return True
+        if self.max_uses is not None and slot["uses"] >= self.max_uses:
+            return True
+        return not self.is_healthy(driver)
+
+    def _checkout(self, driver):
+        slot = self._slots.get(id(driver))
+        if slot is not None:
+            slot["uses"] += 1
+        return driver
+
+    def acquire(self, timeout: float = None):
+        """
+        Take an idle driver, starting a new one if the pool is not full yet; otherwise wait
+        until a driver is released or discarded (queue.Empty after `timeout` seconds).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("WebDriverPool is closed")
+                    driver = self._idle.popleft() if self._idle else None
+                    port = None if driver is not None else self._reserve_port_locked()
+                    if driver is not None or port is not None:
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._available.wait(remaining)
+            if driver is None:
+                return self._checkout(self._start_driver(port))
+            if not self._needs_recycling(driver):
+                return self._checkout(driver)
+            # Too old, worn out or dead: replace it and try again
+            self.recycled += 1
+            self.discard(driver)
+
+    def warm(self) -> None:
+        """Start every driver of the pool up front so the first jobs do not pay the cold start."""
+        drivers = []
+        while (port := self._reserve_port()) is not None:
+            drivers.append(self._start_driver(port))
+        with self._available:
+            self._idle.extend(drivers)
+            self._available.notify(len(drivers))
+
+    def status(self) -> dict:
+        """Snapshot of the pool for health endpoints."""
+        now = time.monotonic()
+        return {
+            "size": self.size,
+            "started": self._started,
+            "idle": len(self._idle),
+            "recycled": self.recycled,
+            "drivers": [{"port": slot["port"], "age": round(now - slot["started_at"], 1), "uses": slot["uses"]}
+                        for slot in list(self._slots.values())],
+        }
+
+    def release(self, driver) -> None:
+        """Give a driver back to the pool."""
+        with self._available:
+            if not self._closed:
+                self._idle.append(driver)
+                self._available.notify()
+                return
+        self.discard(driver)
+
+    def discard(self, driver) -> None:
+        """Quit a driver and free its slot, e.g. after it crashed."""
+        slot = self._slots.pop(id(driver), {})
+        port, profile_dir = slot.get("port"), slot.get("profile_dir")
+        try:
+            close_webdriver(driver)
+        except Exception as e:
+            log_error(f"WebDriverPool: failed to quit driver on port {port}: {str(e)}")
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        # Wakes a caller waiting in acquire(), which can start a fresh driver in this slot
+        self._free_slot(port)
+
+    @contextmanager
+    def driver(self, timeout: float = None):
+        """Context manager yielding a pooled driver; a driver that raised is replaced."""
+        driver = self.acquire(timeout=timeout)
+        try:
+            yield driver
+        except Exception:
+            self.discard(driver)
+            raise
+        else:
+            self.release(driver)
+
+    def close(self) -> None:
+        """Quit every idle driver and remove the profile directories; waiting callers get a RuntimeError."""
+        with self._available:
+            self._closed = True
+            drivers = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for driver in drivers:
+            self.discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()